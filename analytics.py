@@ -1,66 +1,194 @@
 # analytics.py (Final and Complete Version)
 import pandas as pd
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 
-DB_NAME = 'inventory.db'
+from context_encoder import CUSTOMER_FIELDS, LOW_STOCK_FIELDS, PRODUCT_FIELDS, SALE_FIELDS, encode_rows, encode_table
+from database import get_db_connection
 
-def get_db_connection():
-    return sqlite3.connect(DB_NAME)
+# --- Data versions (change counters maintained by install_triggers.py) ---
+VERSIONED_TABLES = ('products', 'sales_history', 'suppliers')
+
+def get_data_versions(conn=None):
+    """Returns {table_name: version} from the data_versions change counters.
+
+    Returns None if the counters are not installed (run install_triggers.py),
+    in which case callers should treat every read as a cache miss.
+    """
+    if conn is None:
+        with get_db_connection() as conn:
+            return get_data_versions(conn)
+    try:
+        return dict(conn.execute("SELECT table_name, version FROM data_versions").fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+def get_catalog_version(conn):
+    """Returns the version that changes only when products are added, removed or renamed.
+
+    Falls back to the products counter on databases without the catalog
+    counter, and to None when no counters are installed.
+    """
+    versions = get_data_versions(conn)
+    if versions is None:
+        return None
+    return versions.get('catalog', versions.get('products'))
+
+def get_data_version(tables=VERSIONED_TABLES):
+    """Returns a single hashable version for the given tables (None if unknown)."""
+    versions = get_data_versions()
+    if versions is None:
+        return None
+    return tuple(versions.get(table, 0) for table in tables)
 
 # --- Functions to retrieve data for the LLM and the public dashboard ---
+
+# Hot dashboard / chat queries. Kept as constants (with bound parameters) so
+# sqlite3's statement cache reuses them and create_indexes.py can check their
+# query plans against the exact SQL the app runs.
+TOP_SELLERS_QUERY = """
+    SELECT p.product_name, SUM(s.quantity_sold) as total_sales
+    FROM sales_history s
+    JOIN products p ON s.product_id = p.product_id
+    WHERE s.sale_date >= ?
+    GROUP BY p.product_name
+    ORDER BY total_sales DESC
+    LIMIT ?
+"""
+
+# Same result from the per-day rollup (install_triggers.py), which has one
+# row per product per day instead of one per sale. Takes a YYYY-MM-DD date.
+TOP_SELLERS_ROLLUP_QUERY = """
+    SELECT p.product_name, SUM(r.units_sold) as total_sales
+    FROM sales_daily_rollup r
+    JOIN products p ON r.product_id = p.product_id
+    WHERE r.sale_day >= ?
+    GROUP BY p.product_name
+    ORDER BY total_sales DESC
+    LIMIT ?
+"""
+
+SALES_SUMMARY_QUERY = """
+    SELECT 
+        COUNT(*) as total_transactions,
+        SUM(total_amount) as total_revenue,
+        AVG(total_amount) as avg_transaction,
+        MAX(total_amount) as largest_sale
+    FROM sales_history
+"""
+
+SALES_SUMMARY_ROLLUP_QUERY = """
+    SELECT 
+        COALESCE(SUM(transaction_count), 0) as total_transactions,
+        SUM(revenue) as total_revenue,
+        SUM(revenue) / NULLIF(SUM(priced_count), 0) as avg_transaction,
+        MAX(max_sale) as largest_sale
+    FROM sales_daily_rollup
+"""
+
+RECENT_SALES_QUERY = """
+    SELECT product_id, quantity_sold, unit_price, total_amount, sale_date, customer_name, payment_method
+    FROM sales_history
+    ORDER BY sale_date DESC
+    LIMIT 50
+"""
+
+TOP_CUSTOMERS_QUERY = """
+    SELECT customer_name, COUNT(*) as transaction_count, SUM(total_amount) as customer_total
+    FROM sales_history
+    WHERE customer_name IS NOT NULL
+    GROUP BY customer_name
+    ORDER BY customer_total DESC
+    LIMIT 10
+"""
+
+# Rendered text for each section of the LLM context, keyed by section name:
+# {section: (version_of_source_table, text)}. A section is only re-queried and
+# re-rendered when its source table's change counter has moved.
+_context_cache = {}
+_context_cache_lock = threading.Lock()
+
+def _render_products_section(conn):
+    cursor = conn.execute(
+        f"SELECT {', '.join(column for column, _, _ in PRODUCT_FIELDS)} FROM products ORDER BY category, product_id"
+    )
+    columns = [description[0] for description in cursor.description]
+    return (
+        "=== PRODUCTS INVENTORY (grouped by category) ===\n"
+        + encode_rows(columns, cursor.fetchall(), PRODUCT_FIELDS, group_by="category")
+        + "\n"
+    )
+
+def has_sales_rollup(conn):
+    """True once install_triggers.py has created (and backfilled) sales_daily_rollup."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sales_daily_rollup'"
+    ).fetchone() is not None
+
+def _render_summary_section(conn):
+    # Calculate payment summary
+    query = SALES_SUMMARY_ROLLUP_QUERY if has_sales_rollup(conn) else SALES_SUMMARY_QUERY
+    summary = tuple(value or 0 for value in conn.execute(query).fetchone())
+    return (
+        "=== PAYMENT & REVENUE SUMMARY ===\n"
+        f"Total Transactions: {summary[0]}\n"
+        f"Total Revenue: ₹{summary[1]:,.2f}\n"
+        f"Average Transaction: ₹{summary[2]:,.2f}\n"
+        f"Largest Sale: ₹{summary[3]:,.2f}\n"
+        "\n"
+    )
+
+def _render_top_customers_section(conn):
+    cursor = conn.execute(TOP_CUSTOMERS_QUERY)
+    columns = [description[0] for description in cursor.description]
+    return (
+        "=== TOP 10 CUSTOMERS BY TOTAL PURCHASES (total in ₹) ===\n"
+        + encode_rows(columns, cursor.fetchall(), CUSTOMER_FIELDS)
+    )
+
+def _render_recent_sales_section(conn):
+    sales_df = pd.read_sql_query(RECENT_SALES_QUERY, conn)
+    return (
+        "\n=== RECENT SALES (Last 50 Transactions) ===\n"
+        + encode_table(sales_df, SALE_FIELDS)
+    )
+
+# (section name, source table, renderer) in prompt order
+CONTEXT_SECTIONS = (
+    ("products", "products", _render_products_section),
+    ("summary", "sales_history", _render_summary_section),
+    ("top_customers", "sales_history", _render_top_customers_section),
+    ("recent_sales", "sales_history", _render_recent_sales_section),
+)
+
+def get_inventory_context_sections(names=None):
+    """Returns [(section_name, text)] for the LLM context, re-rendering only stale sections.
+
+    names optionally restricts the result to a subset of CONTEXT_SECTIONS.
+    """
+    with get_db_connection() as conn:
+        versions = get_data_versions(conn)
+        sections = []
+        for name, table, render in CONTEXT_SECTIONS:
+            if names is not None and name not in names:
+                continue
+            version = versions.get(table) if versions is not None else None
+            with _context_cache_lock:
+                cached = _context_cache.get(name)
+            if version is not None and cached is not None and cached[0] == version:
+                text = cached[1]
+            else:
+                text = render(conn)
+                if version is not None:
+                    with _context_cache_lock:
+                        _context_cache[name] = (version, text)
+            sections.append((name, text))
+        return sections
+
 def get_all_inventory_data():
     """Retrieves all relevant data and formats it for the LLM."""
-    with get_db_connection() as conn:
-        products_df = pd.read_sql_query("SELECT * FROM products", conn)
-        sales_df = pd.read_sql_query(
-            "SELECT product_id, quantity_sold, unit_price, total_amount, sale_date, customer_name, payment_method FROM sales_history ORDER BY sale_date DESC LIMIT 50", 
-            conn
-        )
-        
-        # Calculate payment summary
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_transactions,
-                SUM(total_amount) as total_revenue,
-                AVG(total_amount) as avg_transaction,
-                MAX(total_amount) as largest_sale
-            FROM sales_history
-        """)
-        summary = cursor.fetchone()
-        
-        cursor.execute("""
-            SELECT customer_name, COUNT(*) as transaction_count, SUM(total_amount) as customer_total
-            FROM sales_history
-            WHERE customer_name IS NOT NULL
-            GROUP BY customer_name
-            ORDER BY customer_total DESC
-            LIMIT 10
-        """)
-        top_customers = cursor.fetchall()
-        
-        inventory_data_text = (
-            "=== PRODUCTS INVENTORY ===\n"
-            + products_df.to_string(index=False)
-            + "\n\n"
-            + "=== PAYMENT & REVENUE SUMMARY ===\n"
-            f"Total Transactions: {summary[0]}\n"
-            f"Total Revenue: ₹{summary[1]:,.2f}\n"
-            f"Average Transaction: ₹{summary[2]:,.2f}\n"
-            f"Largest Sale: ₹{summary[3]:,.2f}\n"
-            + "\n"
-            + "=== TOP 10 CUSTOMERS BY TOTAL PURCHASES ===\n"
-        )
-        
-        for customer_name, count, total in top_customers:
-            inventory_data_text += f"- {customer_name}: {count} purchases, Total: ₹{total:,.2f}\n"
-        
-        inventory_data_text += (
-            "\n=== RECENT SALES (Last 50 Transactions) ===\n"
-            + sales_df.to_string(index=False)
-        )
-        return inventory_data_text
+    return "".join(text for _, text in get_inventory_context_sections())
 
 def get_low_stock_alerts():
     """Returns a DataFrame of products with stock below their reorder point."""
@@ -72,19 +200,74 @@ def get_low_stock_alerts():
 def get_top_sellers(num_products=5):
     """Finds the top N best-selling products from sales history."""
     with get_db_connection() as conn:
+        if has_sales_rollup(conn):
+            thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            return pd.read_sql_query(TOP_SELLERS_ROLLUP_QUERY, conn, params=(thirty_days_ago, num_products))
         thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S')
-        query = f"""
-            SELECT p.product_name, SUM(s.quantity_sold) as total_sales
-            FROM sales_history s
-            JOIN products p ON s.product_id = p.product_id
-            WHERE s.sale_date >= '{thirty_days_ago}'
-            GROUP BY p.product_name
-            ORDER BY total_sales DESC
-            LIMIT {num_products}
-        """
-        df = pd.read_sql_query(query, conn)
+        df = pd.read_sql_query(TOP_SELLERS_QUERY, conn, params=(thirty_days_ago, num_products))
         return df
 
+# --- Functions for the rule-based chatbot (chatbot_logic.py) ---
+# These return the column names the chatbot was written against.
+CHATBOT_PRODUCT_COLUMNS = """
+    product_id AS ProductID,
+    product_name AS ProductName,
+    category AS Category,
+    current_stock AS StockLevel,
+    reorder_point AS ReorderLevel,
+    unit_price AS Price
+"""
+
+def get_inventory_status():
+    """Returns a DataFrame of every product for the rule-based chatbot."""
+    with get_db_connection() as conn:
+        return pd.read_sql_query(f"SELECT {CHATBOT_PRODUCT_COLUMNS} FROM products", conn)
+
+def check_low_stock_items():
+    """Returns a DataFrame of products below their reorder point for the rule-based chatbot."""
+    with get_db_connection() as conn:
+        return pd.read_sql_query(
+            f"SELECT {CHATBOT_PRODUCT_COLUMNS} FROM products WHERE current_stock < reorder_point", conn
+        )
+
+def _fetch_product_details(where, value):
+    with get_db_connection() as conn:
+        cursor = conn.execute(f"SELECT {CHATBOT_PRODUCT_COLUMNS} FROM products WHERE {where} LIMIT 1", (value,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        details = dict(zip([column[0] for column in cursor.description], row))
+        details['StockLevel'] = details['StockLevel'] or 0
+        details['ReorderLevel'] = details['ReorderLevel'] or 0
+        details['Price'] = details['Price'] or 0.0
+        return details
+
+def get_product_details(product_name):
+    """Returns a dict of details for one product (matched case-insensitively), or None."""
+    return _fetch_product_details("lower(product_name) = lower(?)", product_name)
+
+def get_product_details_by_id(product_id):
+    """Returns a dict of details for the product with this ID, or None."""
+    return _fetch_product_details("product_id = ?", product_id)
+
+# --- Catalog change listeners ---
+# In-memory indexes (e.g. product_search.py) register here to be updated
+# incrementally when a product is added or deleted through the functions
+# below, instead of being rebuilt from the whole table.
+_catalog_listeners = []
+
+def register_catalog_listener(listener):
+    """Registers listener(event, product, conn), called after 'added' / 'deleted' commits."""
+    if listener not in _catalog_listeners:
+        _catalog_listeners.append(listener)
+
+def _notify_catalog_listeners(event, product, conn):
+    for listener in _catalog_listeners:
+        try:
+            listener(event, product, conn)
+        except Exception as e:
+            print(f"Catalog listener failed: {e}")
+
 # --- Functions for Owner Tools ---
 def get_reorder_list():
     """Returns a DataFrame of low-stock items with supplier and restock quantity."""
@@ -115,7 +298,7 @@ def get_low_stock_items_for_llm():
         low_stock_df = pd.read_sql_query(query, conn)
         
         if not low_stock_df.empty:
-            return low_stock_df.to_string(index=False)
+            return encode_table(low_stock_df, LOW_STOCK_FIELDS)
         else:
             return "There are no items that need to be restocked at this time."
 
@@ -129,6 +312,9 @@ def add_new_product(product_id, product_name, category, current_stock, reorder_p
                 (product_id, product_name, category, current_stock, reorder_point, supplier_id)
             )
             conn.commit()
+            _notify_catalog_listeners(
+                "added", {"product_id": product_id, "product_name": product_name, "category": category}, conn
+            )
             return True
         except sqlite3.IntegrityError:
             return False
@@ -145,6 +331,7 @@ def delete_product(product_id):
             cursor.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
             conn.commit()
             if cursor.rowcount > 0:
+                _notify_catalog_listeners("deleted", {"product_id": product_id}, conn)
                 return True
             else:
                 return False
@@ -152,44 +339,57 @@ def delete_product(product_id):
             print(f"An error occurred during deletion: {e}")
             return False
 
+# One statement per line item (run through executemany) instead of an
+# UPDATE, a SELECT and a second UPDATE per product. total_value and
+# updated_date are set here too, so no trigger has to rewrite the row.
+RESTOCK_UPDATE = """
+    UPDATE products
+    SET current_stock = current_stock + ?,
+        total_value = unit_price * (current_stock + ?),
+        updated_date = datetime('now'),
+        last_restock_quantity = ?,
+        restock_date = ?,
+        restock_time = ?,
+        total_restocks = COALESCE(total_restocks, 0) + 1
+    WHERE product_id = ?
+"""
+# Stays under SQLite's default limit of 999 bound parameters
+RESTOCK_LOOKUP_CHUNK = 500
+
 def restock_products(restock_list):
     """Restocks products in the database with the specified quantities.
     Also updates restock metadata: last_restock_quantity, restock_date, restock_time,
     and increments total_restocks. This ensures the LLM can report recent restocks.
+
+    The whole order is applied in a single transaction. Returns
+    {product_id: new current_stock} (None for IDs not in the catalog), or an
+    empty dict if the restock failed and was rolled back.
     """
-    from datetime import datetime
     now = datetime.now()
     date_str = now.strftime('%Y-%m-%d')
     time_str = now.strftime('%H:%M:%S')
+    rows = [
+        (quantity_to_add, quantity_to_add, quantity_to_add, date_str, time_str, product_id)
+        for product_id, quantity_to_add in restock_list.items()
+    ]
 
     with get_db_connection() as conn:
-        cursor = conn.cursor()
         try:
-            for product_id, quantity_to_add in restock_list.items():
-                # update current stock
-                cursor.execute(
-                    "UPDATE products SET current_stock = current_stock + ? WHERE product_id = ?",
-                    (quantity_to_add, product_id)
-                )
-
-                # read existing total_restocks (may be NULL)
-                cursor.execute("SELECT total_restocks FROM products WHERE product_id = ?", (product_id,))
-                row = cursor.fetchone()
-                total_restocks = row[0] if row and row[0] is not None else 0
-                total_restocks = total_restocks + 1
-
-                # update restock metadata
-                cursor.execute(
-                    """
-                    UPDATE products
-                    SET last_restock_quantity = ?, restock_date = ?, restock_time = ?, total_restocks = ?
-                    WHERE product_id = ?
-                    """,
-                    (quantity_to_add, date_str, time_str, total_restocks, product_id)
-                )
+            conn.executemany(RESTOCK_UPDATE, rows)
+
+            results = dict.fromkeys(restock_list)
+            product_ids = list(restock_list)
+            for start in range(0, len(product_ids), RESTOCK_LOOKUP_CHUNK):
+                chunk = product_ids[start:start + RESTOCK_LOOKUP_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                results.update(conn.execute(
+                    f"SELECT product_id, current_stock FROM products WHERE product_id IN ({placeholders})",
+                    chunk
+                ).fetchall())
 
             conn.commit()
-            return True
+            return results
         except Exception as e:
             print(f"An error occurred during restocking: {e}")
-            return False
\ No newline at end of file
+            conn.rollback()
+            return {}
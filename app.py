@@ -1,23 +1,32 @@
 # app.py (Corrected Version)
 import streamlit as st
 import time
-import sqlite3
 import pandas as pd
 
 import google.generativeai as genai
 
 from datetime import datetime, timedelta
 
+from database import get_db_connection
+from dashboard_data import DASHBOARD_LOADERS, load_dashboard_data, load_uncached
+from chat_history import archive_overflow, init_chat_state, show_earlier, visible_messages
 from analytics import (
-    get_all_inventory_data,
+    get_data_version,
     add_new_product,
-    get_low_stock_alerts,
-    get_top_sellers,
     delete_product,
     get_reorder_list,
     get_low_stock_items_for_llm,
     restock_products
 )
+from context_retrieval import build_relevant_context
+from conversation_memory import ConversationMemory
+from intent_router import PRICE_NOT_SET_NOTE, answer_locally, get_router_stats
+from llm_gateway import GeminiModel, LLMGateway, LLMTimeoutError
+from llm_telemetry import LLMCallRecord, split_sections
+from response_cache import get_response_cache
+from speech_to_text import AudioDecodeError, format_timings, transcribe, transcribe_pcm
+from text_normalization import clean_text_for_speech
+from tts_cache import TTS_TIMEOUT, get_tts_cache
 
 st.set_page_config(
     page_title="AI-Driven Inventory Assistant",
@@ -28,25 +37,11 @@ st.title("🤖 AI Inventory Assistant (LLM-Powered)")
 
 OWNER_PASSWORD = "owner123"
 
-def clean_text_for_speech(text):
-    """Remove markdown formatting from text for speech synthesis while preserving Hindi."""
-    import re
-    # Remove bold (**text** or __text__)
-    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-    text = re.sub(r'__(.+?)__', r'\1', text)
-    # Remove italic (*text* or _text_)
-    text = re.sub(r'\*(.+?)\*', r'\1', text)
-    text = re.sub(r'_(.+?)_', r'\1', text)
-    # Remove links [text](url)
-    text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)
-    # Remove inline code (`text`)
-    text = re.sub(r'`(.+?)`', r'\1', text)
-    # Remove only emojis (keep Hindi/Unicode text)
-    # This pattern removes emoji ranges but preserves Hindi characters
-    text = re.sub(r'[\U0001F300-\U0001F9FF]|[\U0001F600-\U0001F64F]|[\U0001F900-\U0001F9FF]|[\U0001FA00-\U0001FA6F]|[\U0001F680-\U0001F6FF]', '', text)
-    # Remove markdown symbols but keep punctuation and unicode characters
-    text = re.sub(r'[#*_\[\](){}|\\`~^]', ' ', text)
-    return text.strip()
+# ---- Cached dashboard reads ----
+# Keyed by data version and day (see dashboard_data.py); shared by every session
+@st.cache_data(max_entries=4 * len(DASHBOARD_LOADERS), show_spinner=False)
+def _load_versioned(name, version, day):
+    return load_uncached(name, version, day)
 
 # ---- Load API key ----
 try:
@@ -56,8 +51,14 @@ except KeyError:
     st.stop()
 
 # ---- Initialize Gemini ----
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-1.5-flash')
+# One gateway per server process, shared by every session: calls run on its
+# worker pool with a deadline, and identical in-flight prompts share a call
+@st.cache_resource
+def get_llm_gateway(api_key):
+    genai.configure(api_key=api_key)
+    return LLMGateway(GeminiModel(genai.GenerativeModel('gemini-1.5-flash')))
+
+llm = get_llm_gateway(api_key)
 
 # ---- System Prompt ----
 system_prompt = """
@@ -80,25 +81,36 @@ Examples of BRIEF responses:
 """
 
 # ---- Initialize Chat Session ----
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-    st.session_state.messages.append({
-        "role": "assistant",
-        "content": "Hello! I am your AI-powered Inventory Assistant. I am here to help you manage your inventory efficiently. How can I assist you today?"
-    })
+init_chat_state(
+    st.session_state,
+    "Hello! I am your AI-powered Inventory Assistant. I am here to help you manage your inventory efficiently. How can I assist you today?"
+)
+# Long sessions keep only their newest messages in memory; older ones go to app_state.db
+archive_overflow(st.session_state)
+# What the LLM is told about earlier turns (bounded, see conversation_memory.py)
+if "conversation_memory" not in st.session_state:
+    st.session_state.conversation_memory = ConversationMemory()
 
 if "show_stt_upload" not in st.session_state:
     st.session_state.show_stt_upload = False
 
 # ---- CHAT DISPLAY SECTION ----
+# Each message is drawn once per run: the newest CHAT_WINDOW here, and a
+# new turn is appended to the same container below as it is produced
+def render_message(message):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+
 st.markdown("### 💬 Chat History")
 chat_container = st.container(border=True, height=400)
 
 with chat_container:
-    # Display all messages in the chat
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    visible, has_earlier = visible_messages(st.session_state)
+    if has_earlier and st.button("⬆️ Show earlier messages", key="show_earlier"):
+        show_earlier(st.session_state)
+        visible, has_earlier = visible_messages(st.session_state)
+    for message in visible:
+        render_message(message)
 
 # ---- Voice Features: TTS & STT ----
 st.markdown("### 🎤 Voice Chat")
@@ -111,8 +123,6 @@ with col2:
     # Text-to-Speech: Play last assistant message
     if st.button("🔊 Play Last Reply"):
         try:
-            from gtts import gTTS
-            import io
             last_assistant = None
             for m in reversed(st.session_state.messages):
                 if m.get("role") == "assistant":
@@ -120,15 +130,16 @@ with col2:
                     break
             if last_assistant:
                 lang_code = "en" if voice_lang == "English" else "hi"
-                tts = gTTS(text=last_assistant, lang=lang_code, slow=False)
-                mp3_buffer = io.BytesIO()
-                tts.write_to_fp(mp3_buffer)
-                mp3_buffer.seek(0)
-                st.audio(mp3_buffer.read(), format="audio/mp3")
+                # Usually a cache hit: the reply was synthesised when it was sent
+                tts = get_tts_cache()
+                audio = tts.synthesize(clean_text_for_speech(last_assistant), lang_code)
+                st.audio(audio, format=tts.engine.mime)
             else:
                 st.info("No assistant reply yet.")
-        except Exception as e:
+        except ImportError:
             st.error(f"TTS error: Install gTTS with `pip install gtts`")
+        except Exception as e:
+            st.error(f"TTS error: {str(e)}")
 
 with col3:
     # Speech-to-Text: Upload audio file
@@ -142,31 +153,31 @@ if st.session_state.get("show_stt_upload", False):
     
     if audio_file:
         try:
-            import speech_recognition as sr
-            import io
-            
-            recognizer = sr.Recognizer()
-            
-            # Load audio file
-            if audio_file.type == "audio/mpeg":
-                # MP3 file
-                st.warning("MP3 support requires ffmpeg. Using WAV is recommended.")
-                audio_data = sr.AudioData(audio_file.read(), sample_rate=16000, sample_width=2)
+            # Decode to PCM, resample to 16 kHz mono and show the text as it is recognised
+            lang_code = "en" if voice_lang == "English" else "hi"
+            transcript_placeholder = st.empty()
+            result = transcribe(
+                audio_file.getvalue(), audio_file.name, lang_code,
+                on_segment=lambda text: transcript_placeholder.info(f"🎧 {text}…")
+            )
+            transcribed_text = result["text"]
+            st.caption(f"⏱️ {format_timings(result)}")
+
+            if not transcribed_text:
+                transcript_placeholder.error("❌ Couldn't understand the recording.")
             else:
-                # WAV file
-                audio_data = sr.AudioData(audio_file.read(), sample_rate=16000, sample_width=2)
-            
-            lang_code = "en-US" if voice_lang == "English" else "hi-IN"
-            transcribed_text = recognizer.recognize_google(audio_data, language=lang_code)
-            
-            st.success(f"Transcribed: {transcribed_text}")
-            
-            if st.button("Send Transcribed Text as Message"):
-                st.session_state.show_stt_upload = False
-                st.session_state.messages.append({"role": "user", "content": transcribed_text})
-                st.rerun()
+                transcript_placeholder.success(f"Transcribed: {transcribed_text}")
+
+                if st.button("Send Transcribed Text as Message"):
+                    st.session_state.show_stt_upload = False
+                    st.session_state.messages.append({"role": "user", "content": transcribed_text})
+                    st.rerun()
+        except AudioDecodeError as e:
+            st.error(f"STT error: {str(e)}")
+        except ImportError:
+            st.error("STT error: Install an engine with `pip install vosk` (offline) or `pip install SpeechRecognition`")
         except Exception as e:
-            st.error(f"STT error: {str(e)}. Install with `pip install SpeechRecognition`")
+            st.error(f"STT error: {str(e)}")
 
 st.markdown("---")
 
@@ -205,15 +216,19 @@ if mic_clicked:
                     # Record for up to 10 seconds
                     audio = recognizer.listen(source, timeout=10, phrase_time_limit=10)
                     
-                    # Transcribe to text
-                    lang_code = "en-US" if st.session_state.get("voice_lang", "English") == "English" else "hi-IN"
-                    transcribed_text = recognizer.recognize_google(audio, language=lang_code)
-                    
-                    st.success(f"✅ You said: **{transcribed_text}**")
-                    
-                    # Store for processing below
-                    mic_transcribed = transcribed_text
-                    
+                # Transcribe to text (locally when a Vosk model is installed)
+                lang_code = "en" if st.session_state.get("voice_lang", "English") == "English" else "hi"
+                result = transcribe_pcm(audio.get_raw_data(), audio.sample_rate, audio.sample_width, lang=lang_code)
+                transcribed_text = result["text"]
+                if not transcribed_text:
+                    raise sr.UnknownValueError()
+
+                st.success(f"✅ You said: **{transcribed_text}**")
+                st.caption(f"⏱️ {format_timings(result)}")
+
+                # Store for processing below
+                mic_transcribed = transcribed_text
+
             except sr.UnknownValueError:
                 st.error("❌ Couldn't understand. Please speak clearly.")
             except sr.RequestError:
@@ -226,85 +241,112 @@ if mic_clicked:
 # ---- Chat Input Processing ----
 # Use either text input or mic transcribed text
 final_user_input = user_input or mic_transcribed
+pending_audio = None   # (placeholder, Future of the reply's audio)
 
 if final_user_input:
-    st.session_state.messages.append({"role": "user", "content": final_user_input})
-    
-    # Re-display all messages in chat container after adding new one
+    user_message = {"role": "user", "content": final_user_input}
+    st.session_state.messages.append(user_message)
+
+    # The new turn goes below the history already on screen
     with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-    
-    # Process assistant response
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
+        render_message(user_message)
+
+        # Process assistant response
+        with st.chat_message("assistant"):
+            # Prompt size per section, latency and route of this turn (see llm_telemetry.py)
+            call = LLMCallRecord(final_user_input, session_id=st.session_state.chat_session_id)
             try:
-                if "low stock" in final_user_input.lower() or "restock" in final_user_input.lower():
-                    inventory_data = get_low_stock_items_for_llm()
-                else:
-                    inventory_data = get_all_inventory_data()
+                with st.spinner("Thinking..."):
+                    # Follow-ups ("and its price?") name the product discussed last
+                    memory = st.session_state.conversation_memory
+                    resolved_input = memory.resolve(final_user_input)
+
+                    # Stock, price, low-stock and top-seller questions are answered
+                    # straight from the database; everything else goes to Gemini
+                    local_answer = answer_locally(resolved_input)
+
+                    # Repeated questions about unchanged data reuse the earlier answer;
+                    # mid-conversation answers only within the same conversation context
+                    cached_answer = None
+                    conversation = memory.render()
+                    if local_answer is None:
+                        data_version = get_data_version()
+                        cached_answer = get_response_cache().get(resolved_input, data_version, conversation)
+
+                    if local_answer is None and cached_answer is None:
+                        if "low stock" in resolved_input.lower() or "restock" in resolved_input.lower():
+                            inventory_data = get_low_stock_items_for_llm()
+                        else:
+                            inventory_data = build_relevant_context(resolved_input)
 
-                # Build the complete prompt
-                full_prompt = f"""{system_prompt}
+                        # Build the complete prompt
+                        full_prompt = f"""{system_prompt}
 
 Inventory & Sales Data:
 {inventory_data}
 
-User Question: {final_user_input}"""
+{conversation}User Question: {resolved_input}"""
+                        call.set_prompt(
+                            [("system_prompt", system_prompt)]
+                            + split_sections(inventory_data, default="products")
+                            + [("conversation", conversation), ("question", resolved_input)],
+                            full_prompt
+                        )
 
                 # Call Gemini API
+                response_placeholder = st.empty()
                 try:
-                    response = model.generate_content(full_prompt)
-                    response_text = response.text
-                    
+                    if local_answer is not None:
+                        route, response_text = "local", local_answer
+                    elif cached_answer is not None:
+                        route, response_text = "cache", cached_answer
+                    else:
+                        route = "llm"
+                        # Render the answer as it streams in instead of waiting
+                        # for the whole completion
+                        response_placeholder.markdown("_Thinking..._")
+                        response_text = ""
+                        for chunk in llm.stream(full_prompt):
+                            call.mark_first_chunk()
+                            response_text += chunk
+                            response_placeholder.markdown(response_text + "▌")
+                        get_response_cache().put(resolved_input, response_text, data_version, conversation)
+                
                     if not response_text:
+                        call.finish(route, error="empty response")
+                        response_placeholder.empty()
                         st.error("❌ Empty response from API. Please try again.")
                     else:
+                        call.finish(route, response_text)
+                        # Local answers already carry the note when the product's price is 0
                         is_price_query = any(kw in final_user_input.lower() for kw in ['price', 'cost', 'how much', 'kitna'])
-                        if is_price_query and ('0.0' in response_text or 'price is 0' in response_text.lower()):
-                            response_text += "\n\n📝 **Note:** Price not yet set. Ask owner to update in Owner Tools > Edit Product Prices."
+                        if route != "local" and is_price_query and ('0.0' in response_text or 'price is 0' in response_text.lower()):
+                            response_text += PRICE_NOT_SET_NOTE
 
-                        st.markdown(response_text)
+                        response_placeholder.markdown(response_text)
                         st.session_state.messages.append({"role": "assistant", "content": response_text})
-                        
-                        # Convert response to speech and play it
-                        try:
-                            from gtts import gTTS
-                            import io
-                            
-                            # Clean the text for speech (remove markdown formatting)
-                            speech_text = clean_text_for_speech(response_text)
-                            
-                            lang_code = "en" if st.session_state.get("voice_lang", "English") == "English" else "hi"
-                            tts = gTTS(text=speech_text, lang=lang_code, slow=False)
-                            mp3_buffer = io.BytesIO()
-                            tts.write_to_fp(mp3_buffer)
-                            mp3_buffer.seek(0)
-                            
-                            st.audio(mp3_buffer.read(), format="audio/mp3", autoplay=True)
-                            
-                        except Exception as audio_error:
-                            st.warning(f"⚠️ Could not generate audio: {str(audio_error)}. Text response is available.")
-                        
+                        memory.add_turn(resolved_input, response_text)
+                    
+                        # Convert response to speech in the background; the audio
+                        # is attached to this placeholder at the end of the run,
+                        # so the text reply and the rest of the page show first
+                        speech_text = clean_text_for_speech(response_text)
+                        lang_code = "en" if st.session_state.get("voice_lang", "English") == "English" else "hi"
+                        pending_audio = (st.empty(), get_tts_cache().submit(speech_text, lang_code))
+                    
+                except LLMTimeoutError as timeout_error:
+                    call.finish("timeout", error=timeout_error)
+                    response_placeholder.empty()
+                    st.error("⏱️ The AI took too long to answer. Please try again.")
                 except Exception as api_error:
+                    call.finish("error", error=api_error)
+                    response_placeholder.empty()
                     st.error(f"❌ API Error: {str(api_error)}. Check your API key or try again.")
-                                # Re-display chat with new assistant response
-                with chat_container:
-                    for message in st.session_state.messages:
-                        with st.chat_message(message["role"]):
-                            st.markdown(message["content"])
-                
             except Exception as e:
+                call.finish("error", error=e)
                 error_msg = f"❌ Error: {str(e)}"
                 st.error(error_msg)
                 st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                
-                # Re-display chat with error message
-                with chat_container:
-                    for message in st.session_state.messages:
-                        with st.chat_message(message["role"]):
-                            st.markdown(message["content"])
 
 
 # ---- SIDEBAR: Dashboard (Always Visible) + Owner Tools ----
@@ -312,7 +354,7 @@ with st.sidebar:
     st.header("📊 Inventory Dashboard")
 
     st.subheader("Products Nearing Restock Point")
-    low_stock_df = get_low_stock_alerts()
+    low_stock_df = load_dashboard_data("low_stock", _load_versioned)
     if not low_stock_df.empty:
         st.dataframe(low_stock_df, hide_index=True, use_container_width=True)
     else:
@@ -321,7 +363,7 @@ with st.sidebar:
     st.markdown("---")
 
     st.subheader("Top Selling Products (Last 30 Days)")
-    top_sellers_df = get_top_sellers()
+    top_sellers_df = load_dashboard_data("top_sellers", _load_versioned)
     if not top_sellers_df.empty:
         st.bar_chart(
             data=top_sellers_df,
@@ -331,6 +373,19 @@ with st.sidebar:
     else:
         st.info("Not enough sales data yet to show top sellers.")
 
+    router_stats = get_router_stats()
+    if router_stats["queries"]:
+        st.caption(
+            f"⚡ Answered without the LLM: {router_stats['local_answers']}/{router_stats['queries']} "
+            f"({router_stats['hit_rate']:.0%}), avg routing {router_stats['avg_classify_ms']:.2f} ms"
+        )
+    cache_stats = get_response_cache().get_stats()
+    if cache_stats["stores"] or cache_stats["hits"] or cache_stats["similar_hits"]:
+        st.caption(
+            f"♻️ Cached LLM answers reused: {cache_stats['hits'] + cache_stats['similar_hits']} "
+            f"({cache_stats['hit_rate']:.0%} of LLM-bound questions), {cache_stats['entries']} stored"
+        )
+
     st.markdown("---")
     st.header("🔑 Owner Access")
 
@@ -380,10 +435,8 @@ with st.sidebar:
                 new_reorder_point = st.number_input("Reorder Point", min_value=0, value=20)
 
                 try:
-                    conn = sqlite3.connect('inventory.db')
-                    suppliers_df = pd.read_sql_query("SELECT supplier_id, supplier_name FROM suppliers", conn)
+                    suppliers_df = load_dashboard_data("suppliers", _load_versioned)
                     supplier_options = {row['supplier_name']: row['supplier_id'] for _, row in suppliers_df.iterrows()}
-                    conn.close()
                 except Exception:
                     supplier_options = {}
 
@@ -421,9 +474,7 @@ with st.sidebar:
             st.subheader("💰 Edit Product Prices")
             with st.form(key='edit_price_form'):
                 try:
-                    conn = sqlite3.connect('inventory.db')
-                    df_products = pd.read_sql_query("SELECT product_id, product_name, unit_price, current_stock FROM products ORDER BY product_id", conn)
-                    conn.close()
+                    df_products = load_dashboard_data("products", _load_versioned)
                     product_list = list(df_products['product_id'])
                 except Exception:
                     product_list = []
@@ -438,11 +489,9 @@ with st.sidebar:
                         st.write(f"**Product:** {product_name} | **Stock:** {current_stock} | **Price:** ${current_price:.2f}")
                         new_price = st.number_input("New Unit Price ($)", min_value=0.0, value=current_price, step=0.01, key="new_price_input")
                         if st.form_submit_button("Update Price"):
-                            conn = sqlite3.connect('inventory.db')
                             new_total = new_price * current_stock
-                            conn.execute("UPDATE products SET unit_price=?, total_value=?, updated_date=? WHERE product_id=?", (new_price, new_total, pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'), selected_product))
-                            conn.commit()
-                            conn.close()
+                            with get_db_connection() as conn:
+                                conn.execute("UPDATE products SET unit_price=?, total_value=? * current_stock, updated_date=? WHERE product_id=?", (new_price, new_price, pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'), selected_product))
                             st.success(f"✅ {product_name}: ${new_price:.2f}/unit (Total: ${new_total:.2f})")
                             st.rerun()
                 else:
@@ -453,9 +502,7 @@ with st.sidebar:
 
             with st.form(key='delete_product_form'):
                 try:
-                    conn = sqlite3.connect('inventory.db')
-                    df_products = pd.read_sql_query("SELECT product_id FROM products", conn)
-                    conn.close()
+                    df_products = load_dashboard_data("products", _load_versioned)
                     product_list = list(df_products['product_id'])
                 except Exception:
                     product_list = []
@@ -691,3 +738,12 @@ Thank you for your purchase!
                             st.error("Failed to restock products. Please try again.")
             else:
                 st.info("No items need to be restocked.")
+
+# ---- Attach the reply's audio once it is ready ----
+if pending_audio is not None:
+    audio_placeholder, audio_future = pending_audio
+    try:
+        audio_placeholder.audio(audio_future.result(timeout=TTS_TIMEOUT),
+                                format=get_tts_cache().engine.mime, autoplay=True)
+    except Exception as audio_error:
+        audio_placeholder.warning(f"⚠️ Could not generate audio: {str(audio_error) or 'timed out'}. Text response is available.")
@@ -0,0 +1,76 @@
+# benchmark_chat_history.py
+"""
+Messages drawn per chat turn: full redraws vs the windowed transcript.
+
+Simulates a long session (TURNS questions and answers) against
+chat_history.py with a plain dict as session state and a temporary
+app_state.db, counting the st.chat_message calls each turn would make:
+
+  Before: the whole history at the top of the run, again after the user
+          message and again after the reply (3 x O(n) per turn).
+  After:  the newest CHAT_WINDOW messages once, plus the new turn.
+
+Also checks that the session never holds more than MAX_SESSION_MESSAGES
+and that paging back through the archive returns the full conversation
+in order.
+
+Run: python benchmark_chat_history.py
+"""
+import os
+import tempfile
+import time
+
+from chat_history import (
+    CHAT_WINDOW, MAX_SESSION_MESSAGES, archive_overflow, init_chat_state, show_earlier, visible_messages
+)
+
+TURNS = 500
+
+def main():
+    print("=" * 60)
+    print(f"CHAT TRANSCRIPT RENDERING ({TURNS} turns)")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as workdir:
+        db_name = os.path.join(workdir, "app_state.db")
+        state = {}
+        init_chat_state(state, "Hello!")
+        transcript = list(state["messages"])   # everything ever said, for checking
+
+        legacy_drawn = drawn = 0
+        largest_session = 0
+        start = time.perf_counter()
+        for turn in range(TURNS):
+            # Top of the run
+            archive_overflow(state, db_name)
+            visible, _ = visible_messages(state, db_name)
+            history = len(transcript)
+            legacy_drawn += history + (history + 1) + (history + 2)
+            drawn += len(visible) + 2
+
+            question = {"role": "user", "content": f"Question {turn}: stock of PROD{turn % 50:03d}?"}
+            answer = {"role": "assistant", "content": f"Answer {turn}: {turn % 40} units."}
+            state["messages"] += [question, answer]
+            transcript += [question, answer]
+            largest_session = max(largest_session, len(state["messages"]))
+        elapsed = time.perf_counter() - start
+
+        print(f"Messages drawn, before: {legacy_drawn:>10,} ({legacy_drawn / TURNS:,.0f} per turn, growing)")
+        print(f"Messages drawn, after:  {drawn:>10,} ({drawn / TURNS:,.0f} per turn, at most {CHAT_WINDOW + 2})")
+        print(f"Session holds at most {largest_session} messages (limit {MAX_SESSION_MESSAGES + 2} incl. the new turn), "
+              f"{state['archived_count']} archived; {elapsed * 1000 / TURNS:.2f} ms bookkeeping per turn")
+        assert largest_session <= MAX_SESSION_MESSAGES + 2
+
+        # Page back to the very first message
+        pages = 0
+        while True:
+            visible, has_earlier = visible_messages(state, db_name)
+            if not has_earlier:
+                break
+            show_earlier(state)
+            pages += 1
+        assert visible == transcript, "paged history differs from the conversation"
+        print(f"Paged back {pages} times to the greeting: all {len(transcript):,} messages in order")
+    print("\n✅ Each turn draws a bounded number of messages")
+
+if __name__ == "__main__":
+    main()
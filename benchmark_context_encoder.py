@@ -0,0 +1,180 @@
+# benchmark_context_encoder.py
+"""
+Size of the LLM inventory context: DataFrame.to_string() vs context_encoder.py.
+
+For a copy of inventory.db and for a 10,000-product catalog (the shipped
+products cloned with new ids, names and categories), renders every table
+section of the prompt both ways:
+
+  * products     full get_all_inventory_data() product table
+  * top_customers / recent_sales   the other table sections of the dump
+  * low_stock    get_low_stock_items_for_llm()
+  * relevant     build_relevant_context() for a few typical questions
+                 (capped at its token budget, so also the rows it fits)
+
+and prints characters and estimated tokens saved. It also checks that the
+encoded product table still carries the information the assistant uses:
+every kept column decodes back to the database value (prices to the
+paisa, dates to the day).
+
+Run: python benchmark_context_encoder.py
+"""
+import os
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+from benchmark_restock import build_database
+
+CATALOG_SIZE = 10_000
+QUESTIONS = [
+    "How many keyboards do we have?",
+    "How are webcam sales this month?",
+    "Which office supplies are low on stock?",
+]
+
+def build_catalog(path, num_products):
+    """inventory.db with its products cloned (new id, name and category) up to num_products."""
+    build_database(path, 0)
+    conn = sqlite3.connect(path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+    products = conn.execute("SELECT * FROM products ORDER BY product_id").fetchall()
+    position = {column: index for index, column in enumerate(columns)}
+    clones = []
+    for i in range(num_products - len(products)):
+        row = list(products[i % len(products)])
+        row[position["product_id"]] = f"PROD{len(products) + i + 1:05d}"
+        row[position["product_name"]] = f"{row[position['product_name']]} v{i // len(products) + 2}"
+        row[position["category"]] = f"{row[position['category']]} {i % 12 + 1}"
+        clones.append(row)
+    conn.executemany(
+        f"INSERT INTO products ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})", clones
+    )
+    conn.commit()
+    conn.close()
+
+
+# --- The previous renderers (DataFrame.to_string) ---
+
+def legacy_sections(conn):
+    from analytics import RECENT_SALES_QUERY, TOP_CUSTOMERS_QUERY, _render_summary_section
+    products_df = pd.read_sql_query("SELECT * FROM products", conn)
+    top_customers = conn.execute(TOP_CUSTOMERS_QUERY).fetchall()
+    customers = "=== TOP 10 CUSTOMERS BY TOTAL PURCHASES ===\n"
+    for customer_name, count, total in top_customers:
+        customers += f"- {customer_name}: {count} purchases, Total: ₹{total:,.2f}\n"
+    low_stock_df = pd.read_sql_query(
+        "SELECT product_name, current_stock, reorder_point FROM products WHERE current_stock < reorder_point", conn
+    )
+    return {
+        "products": "=== PRODUCTS INVENTORY ===\n" + products_df.to_string(index=False) + "\n\n",
+        "top_customers": customers,
+        "recent_sales": "\n=== RECENT SALES (Last 50 Transactions) ===\n"
+                        + pd.read_sql_query(RECENT_SALES_QUERY, conn).to_string(index=False),
+        "low_stock": low_stock_df.to_string(index=False),
+        "summary": _render_summary_section(conn),
+    }
+
+def legacy_relevant(question, legacy):
+    """build_relevant_context() with the old to_string renderers and sections swapped back in."""
+    import context_retrieval
+    encode_table, get_sections = context_retrieval.encode_table, context_retrieval.get_inventory_context_sections
+    context_retrieval.encode_table = lambda df, fields, group_by=None: df.to_string(index=False) + "\n"
+    context_retrieval.get_inventory_context_sections = lambda names=None: [(name, legacy[name]) for name in names]
+    try:
+        return context_retrieval.build_relevant_context(question)
+    finally:
+        context_retrieval.encode_table, context_retrieval.get_inventory_context_sections = encode_table, get_sections
+
+
+# --- Checks ---
+
+def check_products(conn, encoded):
+    """Decodes the grouped product table and compares it with the database."""
+    from context_encoder import PRODUCT_FIELDS
+    lines = encoded.split("\n")[1:]
+    headers = lines[0].split("|")
+    columns = [column for column, header, _ in PRODUCT_FIELDS if header in headers]
+    decoded, category = {}, None
+    for line in lines[1:]:
+        if line.startswith("## "):
+            category = line[3:]
+        elif line:
+            values = dict(zip(columns, line.split("|")))
+            values["category"] = category
+            decoded[values["product_id"]] = values
+
+    rows = conn.execute(f"SELECT {', '.join(column for column, _, _ in PRODUCT_FIELDS)} FROM products").fetchall()
+    assert len(decoded) == len(rows), (len(decoded), len(rows))
+    for row in rows:
+        values = decoded[row[0]]
+        for (column, _, _), expected in zip(PRODUCT_FIELDS, row):
+            got = values[column]
+            if expected is None:
+                assert got == "", (row[0], column, got)
+            elif column == "unit_price":
+                assert abs(float(got) - expected) <= 0.005, (row[0], got, expected)
+            elif column.endswith("_date"):
+                assert got == str(expected)[:10], (row[0], column, got, expected)
+            else:
+                assert got == str(expected).replace("|", "/"), (row[0], column, got, expected)
+    return len(rows)
+
+def report(label, legacy, compact):
+    from context_retrieval import estimate_tokens
+    before, after = estimate_tokens(legacy), estimate_tokens(compact)
+    print(f"  {label:<34} {len(legacy):>10,} -> {len(compact):>9,} chars "
+          f"{before:>8,} -> {after:>7,} tokens  ({after / before - 1:+.0%})")
+    return before, after
+
+def run(db_path, label):
+    from analytics import _context_cache, get_inventory_context_sections, get_low_stock_items_for_llm
+    from context_retrieval import _customer_cache, _index_cache, build_relevant_context
+
+    workdir = os.path.dirname(db_path)
+    os.chdir(workdir)
+    _context_cache.clear()
+    _index_cache["version"] = None
+    _customer_cache["last_sale_id"] = None
+    with sqlite3.connect(db_path) as conn:
+        num_products = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        print(f"\n{label} ({num_products:,} products)")
+        legacy = legacy_sections(conn)
+        compact = dict(get_inventory_context_sections(["products", "top_customers", "recent_sales"]))
+        compact["low_stock"] = get_low_stock_items_for_llm()
+        checked = check_products(conn, compact["products"])
+
+    total_before = total_after = 0
+    for name in ("products", "top_customers", "recent_sales", "low_stock"):
+        before, after = report(name, legacy[name], compact[name])
+        if name != "low_stock":
+            total_before, total_after = total_before + before, total_after + after
+    print(f"  {'full dump tables':<34} {total_before:>29,} -> {total_after:>7,} tokens  ({total_after / total_before - 1:+.0%})")
+    for question in QUESTIONS:
+        legacy_context, compact_context = legacy_relevant(question, legacy), build_relevant_context(question)
+        report(f"relevant: {question[:24]}", legacy_context, compact_context)
+        # Both are capped at the token budget; a budget-bound context shows more rows instead
+        rows = [sum(line.lstrip().startswith("PROD") for line in context.split("\n"))
+                for context in (legacy_context, compact_context)]
+        print(f"  {'':<34} product/sale rows in the prompt: {rows[0]} -> {rows[1]}")
+    print(f"  product table decodes back to the database for {checked:,} products")
+
+def main():
+    print("=" * 60)
+    print("INVENTORY CONTEXT SIZE (to_string vs context_encoder)")
+    print("=" * 60)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            for name, size in (("shipped", 0), ("catalog", CATALOG_SIZE)):
+                os.mkdir(os.path.join(workdir, name))
+                db_path = os.path.join(workdir, name, "inventory.db")
+                build_catalog(db_path, size)
+                run(db_path, "inventory.db" if not size else "Synthetic catalog")
+        finally:
+            os.chdir(cwd)
+    print("\n✅ Same information, a fraction of the prompt tokens")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmark_conversation_memory.py
+"""
+Prompt growth over a long chat: full history vs conversation_memory.py.
+
+Plays a TURNS-turn session over the products in inventory.db (a copy, in a
+temporary directory), alternating questions that name a product with
+follow-ups that do not ("and its price?", "is it running low?"):
+
+  * Follow-up resolution: every follow-up must resolve to the product
+    asked about just before it.
+  * Prompt size: tokens of conversation context per turn when the whole
+    history is sent vs the memory's rolling summary + last turns. The
+    memory must stay under its fixed bound however long the session runs.
+
+Run: python benchmark_conversation_memory.py
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from context_retrieval import estimate_tokens
+
+TURNS = 60
+FOLLOW_UPS = ["and its price?", "is it running low?", "what about its sales this month?", "uska stock kitna hai?"]
+REPORT_AT = (1, 5, 10, 20, 40, 60)
+
+def fake_answer(product, turn):
+    """A reply like the assistant's: short, with a long explanation now and then."""
+    name, stock, price = product
+    answer = f"{name}: {stock} units in stock at Rs. {price:,.2f} each."
+    if turn % 5 == 0:
+        answer += " " + " ".join(
+            f"Over the last {days} days {name} sold steadily and revenue tracked the category average." for days in (7, 30, 90)
+        ) * 3
+    return answer
+
+def main():
+    print("=" * 60)
+    print(f"CONVERSATION MEMORY ({TURNS} turns)")
+    print("=" * 60)
+    repo = os.path.dirname(os.path.abspath(__file__))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copy(os.path.join(repo, "inventory.db"), workdir)
+        os.chdir(workdir)
+        try:
+            from conversation_memory import ConversationMemory
+            with sqlite3.connect("inventory.db") as conn:
+                products = conn.execute(
+                    "SELECT product_name, current_stock, unit_price FROM products ORDER BY product_id LIMIT 15"
+                ).fetchall()
+
+            memory = ConversationMemory()
+            history = ""
+            resolved_ok = follow_ups = 0
+            rows = []
+            for turn in range(1, TURNS + 1):
+                product = products[((turn - 1) // 2) % len(products)]
+                if turn % 2:
+                    question = f"How many {product[0]} do we have?"
+                else:
+                    question = FOLLOW_UPS[(turn // 2) % len(FOLLOW_UPS)]
+                    follow_ups += 1
+                resolved = memory.resolve(question)
+                if turn % 2 == 0 and resolved.endswith(f"({product[0]})"):
+                    resolved_ok += 1
+
+                # Conversation context this turn's prompt would carry
+                full_tokens = estimate_tokens(history) if history else 0
+                memory_tokens = memory.prompt_tokens() if memory.turns else 0
+                if turn in REPORT_AT:
+                    rows.append((turn, full_tokens, memory_tokens))
+
+                answer = fake_answer(product, turn)
+                history += f"User: {question}\nAssistant: {answer}\n"
+                memory.add_turn(resolved, answer)
+                assert memory.prompt_tokens() <= memory.max_prompt_tokens(), memory.render()
+        finally:
+            os.chdir(cwd)
+
+    print(f"Follow-ups resolved to the right product: {resolved_ok}/{follow_ups}")
+    assert resolved_ok == follow_ups
+    print("\nConversation tokens in the prompt:")
+    print(f"  {'turn':>4}  {'full history':>12}  {'memory':>8}")
+    for turn, full_tokens, memory_tokens in rows:
+        print(f"  {turn:>4}  {full_tokens:>12,}  {memory_tokens:>8,}")
+    print(f"\n✅ Memory stays under {memory.max_prompt_tokens()} tokens per prompt "
+          f"(full history reached {rows[-1][1]:,})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmark_intent.py
+"""
+Micro-benchmark for intent classification in chatbot_logic.py.
+
+Compares the original per-intent loop (re-vectorising every pattern and
+calling cosine_similarity once per intent) with the precomputed single-matrix
+classifier, for single queries and for the batch API.
+
+Run: python benchmark_intent.py
+"""
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from chatbot_logic import knowledge_base, vectorizer, get_intent, classify_intents
+
+QUERIES = [
+    "show all inventory",
+    "what needs restocking this week",
+    "how many keyboards do we have",
+    "tell me about the standing desk",
+    "hello there",
+    "thanks bye",
+    "what is the total revenue",
+    "are we running out of webcams",
+]
+
+def legacy_get_intent(user_query):
+    """The original implementation, kept here as the baseline."""
+    query_vector = vectorizer.transform([user_query])
+    max_similarity = 0
+    best_intent = "unknown"
+    for intent, data in knowledge_base.items():
+        if "patterns" in data:
+            patterns_vector = vectorizer.transform(data["patterns"])
+            similarities = cosine_similarity(query_vector, patterns_vector)
+            current_max_sim = np.max(similarities)
+            if current_max_sim > max_similarity:
+                max_similarity = current_max_sim
+                best_intent = intent
+    return best_intent if max_similarity > 0.3 else "unknown"
+
+def time_per_query(function, queries, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            function(query)
+    return (time.perf_counter() - start) / (repeats * len(queries))
+
+def main(repeats=200):
+    # Both implementations must agree before timing means anything
+    for query in QUERIES:
+        assert legacy_get_intent(query) == get_intent(query), query
+
+    legacy = time_per_query(legacy_get_intent, QUERIES, repeats)
+    vectorized = time_per_query(get_intent, QUERIES, repeats)
+
+    batch = QUERIES * 125  # 1,000 queries
+    start = time.perf_counter()
+    for _ in range(max(1, repeats // 20)):
+        classify_intents(batch)
+    batched = (time.perf_counter() - start) / (max(1, repeats // 20) * len(batch))
+
+    print("=" * 60)
+    print("INTENT CLASSIFICATION BENCHMARK")
+    print("=" * 60)
+    print(f"Per-intent loop (before):   {legacy * 1e6:9.1f} µs/query")
+    print(f"Single matrix (after):      {vectorized * 1e6:9.1f} µs/query  ({legacy / vectorized:.1f}x faster)")
+    print(f"Batch of {len(batch)} (after):    {batched * 1e6:9.1f} µs/query  ({legacy / batched:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmark_llm_gateway.py
+"""
+Offline latency / concurrency checks for llm_gateway.py against the local
+stub model server (no API key or network needed).
+
+  1. Coalescing: 20 users send the same prompt at once -> 1 model call,
+     for generate() and for stream() (the chat's path).
+  2. Concurrency: 20 distinct prompts through the worker pool vs one by one.
+  3. Deadlines: a model slower than the deadline fails fast with LLMTimeoutError.
+  4. Retries: a server failing 30% of requests still answers nearly everything.
+
+Run: python benchmark_llm_gateway.py
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_gateway import HTTPModel, LLMGateway, LLMTimeoutError, serve_stub
+
+USERS = 20
+LATENCY = 0.3
+
+def start_stub(port, **options):
+    server = serve_stub(port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, HTTPModel(f"http://127.0.0.1:{port}/")
+
+def fan_out(function, prompts):
+    """Calls function(prompt) from one thread per prompt; returns (results, seconds)."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(len(prompts)) as users:
+        results = list(users.map(function, prompts))
+    return results, time.perf_counter() - start
+
+def main():
+    print("=" * 60)
+    print("LLM GATEWAY BENCHMARK (stub model server)")
+    print("=" * 60)
+
+    server, model = start_stub(8765, latency=LATENCY)
+    try:
+        # 1. Identical prompts share one in-flight call
+        gateway = LLMGateway(model)
+        results, elapsed = fan_out(gateway.generate, ["What needs restocking?"] * USERS)
+        stats = gateway.get_stats()
+        assert len(set(results)) == 1 and stats["model_calls"] == 1, stats
+        print(f"Coalescing:  {USERS} identical requests -> {stats['model_calls']} model call "
+              f"({stats['coalesced']} coalesced) in {elapsed * 1000:.0f} ms")
+        gateway.shutdown()
+
+        gateway = LLMGateway(model)
+        results, elapsed = fan_out(lambda prompt: "".join(gateway.stream(prompt)), ["What needs restocking?"] * USERS)
+        stats = gateway.get_stats()
+        assert len(set(results)) == 1 and stats["model_calls"] == 1, stats
+        print(f"             {USERS} identical streams  -> {stats['model_calls']} model call "
+              f"({stats['coalesced']} coalesced) in {elapsed * 1000:.0f} ms")
+        gateway.shutdown()
+
+        # 2. Distinct prompts run concurrently on the worker pool
+        prompts = [f"Question {i}" for i in range(USERS)]
+        start = time.perf_counter()
+        for prompt in prompts:
+            model.generate(prompt, timeout=10)
+        sequential = time.perf_counter() - start
+        gateway = LLMGateway(model, max_workers=8)
+        _, elapsed = fan_out(gateway.generate, prompts)
+        print(f"Concurrency: {USERS} distinct requests {sequential:.2f} s one by one, "
+              f"{elapsed:.2f} s through 8 workers ({sequential / elapsed:.1f}x)")
+        gateway.shutdown()
+    finally:
+        server.shutdown()
+
+    # 3. Deadlines are enforced even when the model hangs
+    server, model = start_stub(8766, latency=3.0)
+    try:
+        gateway = LLMGateway(model, timeout=0.5)
+        start = time.perf_counter()
+        try:
+            gateway.generate("slow question")
+            raise AssertionError("expected a timeout")
+        except LLMTimeoutError:
+            elapsed = time.perf_counter() - start
+        assert elapsed < 1.0, elapsed
+        print(f"Deadline:    3 s model, 0.5 s deadline -> LLMTimeoutError after {elapsed * 1000:.0f} ms")
+        gateway.shutdown()
+    finally:
+        server.shutdown()
+
+    # 4. Transient failures are retried with backoff
+    server, model = start_stub(8767, latency=0.05, failure_rate=0.3)
+    try:
+        gateway = LLMGateway(model, max_workers=8, retries=3, backoff=0.05, timeout=5)
+
+        def ask(prompt):
+            try:
+                return gateway.generate(prompt)
+            except Exception:
+                return None
+
+        results, elapsed = fan_out(ask, [f"Flaky {i}" for i in range(100)])
+        stats = gateway.get_stats()
+        answered = sum(result is not None for result in results)
+        print(f"Retries:     30% failing server -> {answered}/100 answered, "
+              f"{stats['retries']} retries, {elapsed:.2f} s")
+        gateway.shutdown()
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
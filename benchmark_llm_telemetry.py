@@ -0,0 +1,133 @@
+# benchmark_llm_telemetry.py
+"""
+Exercises llm_telemetry.py on a scripted chat and prints its report.
+
+Runs app.py's answer path (conversation memory -> intent router ->
+response cache -> relevant context -> streamed LLM) for QUESTIONS on a
+copy of inventory.db, with a StubModel instead of Gemini, recording every
+turn to a temporary JSONL file and an SQLite table. Then prints:
+
+  * the telemetry report (routes, latency, prompt tokens by section);
+  * the section sizes of the full get_all_inventory_data() dump, for
+    comparison with what the relevance-filtered prompts actually carry;
+  * the cost of recording one turn.
+
+Run: python benchmark_llm_telemetry.py
+"""
+import ast
+import os
+import tempfile
+import time
+
+from benchmark_restock import build_database
+from llm_gateway import LLMGateway, StubModel
+
+QUESTIONS = [
+    "How many keyboards do we have?",
+    "and its price?",
+    "Why are sales of webcams slow this month?",
+    "Who are our top customers?",
+    "What is low on stock?",
+    "Why are sales of webcams slow this month?",     # repeat in a later context -> LLM again
+    "Suggest a restock plan for next week",
+    "Compare Wireless Mouse and Ergonomic Mouse sales",
+    "what about its revenue last month?",
+    "Hello",
+    "Explain the revenue trend this year",
+    "Suggest a restock plan for next week",          # repeat in a later context -> LLM again
+]
+
+def load_system_prompt():
+    """app.py's system_prompt, read without importing Streamlit."""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "system_prompt" for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise LookupError("system_prompt not found in app.py")
+
+def chat_turn(question, memory, cache, gateway, system_prompt, sinks):
+    """One turn of app.py's answer path, recorded to every sink."""
+    from analytics import get_data_version
+    from context_retrieval import build_relevant_context
+    from intent_router import answer_locally
+    from llm_telemetry import LLMCallRecord, split_sections
+
+    calls = [LLMCallRecord(question, session_id="benchmark", sink=sink) for sink in sinks]
+    resolved = memory.resolve(question)
+    answer = answer_locally(resolved)
+    route = "local"
+    if answer is None:
+        version = get_data_version()
+        answer = cache.get(resolved, version, memory.render())
+        route = "cache"
+    if answer is None:
+        route = "llm"
+        inventory_data = build_relevant_context(resolved)
+        prompt = f"{system_prompt}\n\nInventory & Sales Data:\n{inventory_data}\n\n{memory.render()}User Question: {resolved}"
+        sections = ([("system_prompt", system_prompt)] + split_sections(inventory_data, default="products")
+                    + [("conversation", memory.render()), ("question", resolved)])
+        answer = ""
+        for chunk in gateway.stream(prompt):
+            for call in calls:
+                call.mark_first_chunk()
+            answer += chunk
+        for call in calls:
+            call.set_prompt(sections, prompt)
+        cache.put(resolved, answer, version, memory.render())
+    for call in calls:
+        call.finish(route, answer)
+    memory.add_turn(resolved, answer)
+    return route
+
+def main():
+    print("=" * 60)
+    print(f"LLM TELEMETRY ({len(QUESTIONS)} scripted chat turns, stub model)")
+    print("=" * 60)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        build_database(os.path.join(workdir, "inventory.db"), 0)
+        os.chdir(workdir)
+        try:
+            from analytics import get_all_inventory_data
+            from conversation_memory import ConversationMemory
+            from context_retrieval import estimate_tokens
+            from llm_telemetry import JSONLSink, SQLiteSink, build_report, split_sections
+            from response_cache import ResponseCache
+
+            jsonl = JSONLSink(os.path.join(workdir, "llm_calls.jsonl"))
+            table = SQLiteSink(os.path.join(workdir, "app_state.db"))
+            gateway = LLMGateway(StubModel(latency=0.05, respond=lambda prompt: "Stub analysis of the data. " * 8))
+            memory = ConversationMemory()
+            cache = ResponseCache(db_name=os.path.join(workdir, "app_state.db"))
+            system_prompt = load_system_prompt()
+
+            routes = [chat_turn(q, memory, cache, gateway, system_prompt, (jsonl, table)) for q in QUESTIONS]
+            gateway.shutdown()
+            sizes = lambda records: [(r["route"], r["prompt_chars"], r["sections"], r["response_chars"]) for r in records]
+            assert sizes(jsonl.read()) == sizes(table.read()), "JSONL and SQLite sinks disagree"
+            assert len(table.read()) == len(QUESTIONS)
+            print(f"Routes: {', '.join(routes)}\n")
+            print(build_report(table.read(), input_price=0.075, output_price=0.30))
+
+            print("\nFull get_all_inventory_data() dump, for comparison:")
+            dump = {}
+            for name, text in split_sections(get_all_inventory_data()):
+                dump[name] = dump.get(name, "") + text
+            for name, text in dump.items():
+                print(f"  {name:<14} {len(text):>9,} chars {estimate_tokens(text):>8,} tokens")
+
+            # Recording overhead
+            from llm_telemetry import LLMCallRecord
+            start = time.perf_counter()
+            for _ in range(200):
+                call = LLMCallRecord("overhead", sink=table)
+                call.set_prompt([("system_prompt", system_prompt)], system_prompt)
+                call.finish("llm", "ok")
+            print(f"\nRecording one turn to SQLite: {(time.perf_counter() - start) / 200 * 1000:.2f} ms")
+        finally:
+            os.chdir(cwd)
+    print("\n✅ Telemetry recorded for every turn")
+
+if __name__ == "__main__":
+    main()
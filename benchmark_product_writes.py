@@ -0,0 +1,121 @@
+# benchmark_product_writes.py
+"""
+Write amplification of stock changes: old cascading triggers vs single pass.
+
+Before: every stock change fired a nested UPDATE products for total_value
+plus another for updated_date (each located by product_id and each bumping
+the products change counter again). After: the write path sets total_value
+and updated_date in the same UPDATE, and the sync_product_derived_columns
+fallback trigger stays idle.
+
+For a 10,000-product catalog this restocks every product and then sells one
+unit of each, reporting the rows written per line item (from
+sqlite3's total_changes, which counts trigger writes too) and the latency.
+Both variants must end with identical stock and total_value.
+
+Runs on copies of inventory.db. Run: python benchmark_product_writes.py
+"""
+import os
+import sqlite3
+import tempfile
+import time
+
+from analytics import RESTOCK_UPDATE
+from benchmark_restock import build_database
+from sales_ingestion import SELL_UPDATE
+
+NUM_PRODUCTS = 10_000
+
+# The trigger set install_triggers.py used to create
+LEGACY_TRIGGERS = """
+DROP TRIGGER IF EXISTS sync_product_derived_columns;
+CREATE TRIGGER update_product_total_value
+AFTER UPDATE OF current_stock, unit_price ON products
+FOR EACH ROW
+BEGIN
+    UPDATE products SET total_value = NEW.unit_price * NEW.current_stock WHERE product_id = NEW.product_id;
+END;
+CREATE TRIGGER update_product_updated_date_on_stock_change
+AFTER UPDATE OF current_stock ON products
+FOR EACH ROW
+BEGIN
+    UPDATE products SET updated_date = datetime('now') WHERE product_id = NEW.product_id;
+END;
+CREATE TRIGGER update_product_updated_date_on_price_change
+AFTER UPDATE OF unit_price ON products
+FOR EACH ROW
+BEGIN
+    UPDATE products SET updated_date = datetime('now') WHERE product_id = NEW.product_id;
+END;
+"""
+
+# ... and the statements the app used with them
+LEGACY_RESTOCK_UPDATE = """
+    UPDATE products
+    SET current_stock = current_stock + ?,
+        last_restock_quantity = ?,
+        restock_date = ?,
+        restock_time = ?,
+        total_restocks = COALESCE(total_restocks, 0) + 1
+    WHERE product_id = ?
+"""
+LEGACY_SELL_UPDATE = """
+    UPDATE products
+    SET current_stock = current_stock - :quantity
+    WHERE product_id = :product_id AND current_stock >= :quantity
+"""
+
+def measure(conn, statement, rows):
+    """Runs one executemany in a transaction: returns (rows written per item, seconds)."""
+    before = conn.total_changes
+    start = time.perf_counter()
+    conn.executemany(statement, rows)
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    return (conn.total_changes - before) / len(rows), elapsed
+
+def run(label, workdir, legacy):
+    path = os.path.join(workdir, f"{label}.db")
+    build_database(path, NUM_PRODUCTS)
+    conn = sqlite3.connect(path)
+    if legacy:
+        conn.executescript(LEGACY_TRIGGERS)
+    product_ids = [row[0] for row in conn.execute("SELECT product_id FROM products ORDER BY product_id")]
+
+    if legacy:
+        restock_rows = [(10, 10, "2025-01-01", "12:00:00", product_id) for product_id in product_ids]
+        restock = measure(conn, LEGACY_RESTOCK_UPDATE, restock_rows)
+        sell = measure(conn, LEGACY_SELL_UPDATE, [{"quantity": 1, "product_id": p} for p in product_ids])
+    else:
+        restock_rows = [(10, 10, 10, "2025-01-01", "12:00:00", product_id) for product_id in product_ids]
+        restock = measure(conn, RESTOCK_UPDATE, restock_rows)
+        sell = measure(conn, SELL_UPDATE, [{"quantity": 1, "product_id": p} for p in product_ids])
+
+    state = conn.execute("SELECT product_id, current_stock, total_value FROM products ORDER BY product_id").fetchall()
+    inconsistent = conn.execute(
+        "SELECT COUNT(*) FROM products WHERE total_value IS NOT unit_price * current_stock"
+    ).fetchone()[0]
+    conn.close()
+    assert inconsistent == 0, f"{label}: {inconsistent} products with a stale total_value"
+    return restock, sell, state
+
+def main():
+    print("=" * 60)
+    print(f"PRODUCT WRITE AMPLIFICATION ({NUM_PRODUCTS:,} products)")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as workdir:
+        legacy_restock, legacy_sell, legacy_state = run("legacy", workdir, legacy=True)
+        restock, sell, state = run("single_pass", workdir, legacy=False)
+    assert legacy_state == state, "single-pass writes diverged from the trigger cascade"
+
+    for name, (legacy_rows, legacy_time), (rows, elapsed) in (
+        ("Restock", legacy_restock, restock),
+        ("Sell", legacy_sell, sell),
+    ):
+        print(f"{name}:")
+        print(f"  Trigger cascade (before): {legacy_rows:4.1f} rows written/item, {legacy_time * 1000:8.1f} ms")
+        print(f"  Single pass (after):      {rows:4.1f} rows written/item, {elapsed * 1000:8.1f} ms"
+              f"  ({legacy_time / elapsed:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
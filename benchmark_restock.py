@@ -0,0 +1,121 @@
+# benchmark_restock.py
+"""
+Benchmark for restock_products at 1,000 and 10,000 line items.
+
+Compares the original per-product loop (UPDATE stock, SELECT total_restocks,
+UPDATE metadata for every product) with the executemany bulk path. Each run
+works on its own copy of inventory.db padded with synthetic products, with
+the triggers and indexes installed as in production; inventory.db itself is
+never modified.
+
+Run: python benchmark_restock.py
+"""
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from create_indexes import create_indexes
+from database import DB_NAME, get_db_connection, get_pool
+from install_triggers import install_triggers
+from analytics import restock_products
+
+SIZES = (1_000, 10_000)
+COMPARED_COLUMNS = "product_id, current_stock, total_value, last_restock_quantity, total_restocks"
+
+def legacy_restock_products(restock_list):
+    """The original implementation, kept here as the baseline."""
+    now = datetime.now()
+    date_str = now.strftime('%Y-%m-%d')
+    time_str = now.strftime('%H:%M:%S')
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for product_id, quantity_to_add in restock_list.items():
+            cursor.execute(
+                "UPDATE products SET current_stock = current_stock + ? WHERE product_id = ?",
+                (quantity_to_add, product_id)
+            )
+            cursor.execute("SELECT total_restocks FROM products WHERE product_id = ?", (product_id,))
+            row = cursor.fetchone()
+            total_restocks = (row[0] if row and row[0] is not None else 0) + 1
+            cursor.execute(
+                """
+                UPDATE products
+                SET last_restock_quantity = ?, restock_date = ?, restock_time = ?, total_restocks = ?
+                WHERE product_id = ?
+                """,
+                (quantity_to_add, date_str, time_str, total_restocks, product_id)
+            )
+        conn.commit()
+        return True
+
+def build_database(path, num_products):
+    """Copies inventory.db and pads it with synthetic products up to num_products."""
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_NAME), path)
+    conn = sqlite3.connect(path)
+    existing = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    conn.executemany(
+        """
+        INSERT INTO products (product_id, product_name, category, current_stock, reorder_point,
+                              supplier_id, unit_price, total_restocks)
+        VALUES (?, ?, 'Benchmark', ?, 20, 'SUP001', ?, ?)
+        """,
+        [
+            (f"BENCH{i:06d}", f"Benchmark Item {i}", i % 50, 10.0 + i % 90, None if i % 3 else i % 4)
+            for i in range(num_products - existing)
+        ]
+    )
+    conn.commit()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_indexes(conn)
+        conn.close()
+        install_triggers(path)
+
+def run(restock, num_products, workdir, label):
+    rundir = os.path.join(workdir, f"{label}_{num_products}")
+    os.mkdir(rundir)
+    build_database(os.path.join(rundir, DB_NAME), num_products)
+
+    # restock functions use the default database, resolved from the working directory
+    cwd = os.getcwd()
+    os.chdir(rundir)
+    try:
+        with get_db_connection() as conn:
+            product_ids = [row[0] for row in conn.execute("SELECT product_id FROM products")]
+        restock_list = {product_id: 10 + i % 40 for i, product_id in enumerate(product_ids)}
+
+        start = time.perf_counter()
+        result = restock(restock_list)
+        elapsed = time.perf_counter() - start
+
+        with get_db_connection() as conn:
+            rows = conn.execute(f"SELECT {COMPARED_COLUMNS} FROM products ORDER BY product_id").fetchall()
+        get_pool().close_all()
+    finally:
+        os.chdir(cwd)
+    return elapsed, result, rows
+
+def main():
+    print("=" * 60)
+    print("BULK RESTOCK BENCHMARK")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as workdir:
+        for num_products in SIZES:
+            legacy_time, _, legacy_rows = run(legacy_restock_products, num_products, workdir, "legacy")
+            bulk_time, result, bulk_rows = run(restock_products, num_products, workdir, "bulk")
+
+            # Both implementations must leave the products table identical
+            assert legacy_rows == bulk_rows, "bulk restock diverged from the per-product loop"
+            assert len(result) == num_products and None not in result.values()
+
+            print(f"{num_products:>6,} line items:")
+            print(f"  Per-product loop (before): {legacy_time * 1000:9.1f} ms")
+            print(f"  executemany (after):       {bulk_time * 1000:9.1f} ms  ({legacy_time / bulk_time:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
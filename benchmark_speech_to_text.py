@@ -0,0 +1,94 @@
+# benchmark_speech_to_text.py
+"""
+Offline checks for speech_to_text.py with generated WAV files and the
+StubEngine (no microphone, models or network needed).
+
+  1. Decoding: 44.1 kHz stereo, 8 kHz 8-bit and 16 kHz mono WAVs all come
+     out as the right length of 16 kHz mono PCM. The old upload path fed
+     the raw file to the recognizer as 16 kHz PCM, so a 5 s CD-quality
+     upload looked like 27 s of noise.
+  2. Streaming: the first segment is available after the first chunk, not
+     after the whole recording.
+  3. Per-stage timings (decode, resample, recognize) for a 10 s upload.
+
+Run: python benchmark_speech_to_text.py
+"""
+import io
+import math
+import struct
+import wave
+
+from speech_to_text import (
+    CHUNK_SECONDS, STT_SAMPLE_RATE, StubEngine, decode_audio, format_timings, to_pcm16_mono, transcribe
+)
+
+SECONDS = 5.0
+
+def make_wav(sample_rate, sample_width, channels, seconds=SECONDS, pitch=220.0):
+    """A sine tone as WAV file bytes."""
+    frames = int(sample_rate * seconds)
+    peak = 100 if sample_width == 1 else 12000
+    samples = []
+    for i in range(frames):
+        value = int(peak * math.sin(2 * math.pi * pitch * i / sample_rate))
+        samples.extend([value] * channels)
+    if sample_width == 1:
+        pcm = bytes(sample + 128 for sample in samples)
+    else:
+        pcm = struct.pack(f"<{len(samples)}h", *samples)
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return wav_buffer.getvalue()
+
+def peak_amplitude(pcm):
+    samples = struct.unpack(f"<{len(pcm) // 2}h", pcm)
+    return max(abs(sample) for sample in samples)
+
+def main():
+    print("=" * 60)
+    print("SPEECH-TO-TEXT PIPELINE CHECKS (stub engine)")
+    print("=" * 60)
+
+    # 1. Every format ends up as SECONDS of 16 kHz mono audio
+    for label, rate, width, channels in (
+        ("44.1 kHz stereo 16-bit", 44100, 2, 2),
+        ("8 kHz mono 8-bit", 8000, 1, 1),
+        ("16 kHz mono 16-bit", 16000, 2, 1),
+    ):
+        data = make_wav(rate, width, channels)
+        result = transcribe(data, "upload.wav", engine=StubEngine())
+        legacy_seconds = len(data) / 2 / 16000
+        assert abs(result["audio_seconds"] - SECONDS) < 0.01, result["audio_seconds"]
+        print(f"{label:<24} -> {result['audio_seconds']:.2f}s of 16 kHz PCM "
+              f"(raw bytes as 16 kHz PCM: {legacy_seconds:.2f}s)")
+
+    # 8-bit audio is unsigned: a tone must stay a tone, not become a DC offset
+    pcm = to_pcm16_mono(*decode_audio(make_wav(8000, 1, 1)))
+    assert 20000 < peak_amplitude(pcm) < 32768, peak_amplitude(pcm)
+
+    # 2. Segments arrive while the audio is still being fed in
+    engine = StubEngine("what is the stock of wireless mouse", latency=0.05)
+    data = make_wav(44100, 2, 2, seconds=2.0)
+    partials = []
+    result = transcribe(data, "upload.wav", engine=engine, on_segment=partials.append)
+    chunks = math.ceil(2.0 / CHUNK_SECONDS)
+    timings = result["timings"]
+    assert result["text"] == engine.transcript and len(partials) == len(result["segments"])
+    assert timings["first_segment_ms"] < timings["recognize_ms"] / 2
+    print(f"\nStreaming: {chunks} chunks -> first text after {timings['first_segment_ms']:.0f} ms, "
+          f"full transcript after {timings['recognize_ms']:.0f} ms")
+    for partial in partials:
+        print(f"  … {partial}")
+
+    # 3. Stage timings for a longer CD-quality upload
+    data = make_wav(44100, 2, 2, seconds=10.0)
+    result = transcribe(data, "upload.wav", engine=StubEngine())
+    print(f"\nStage timings: {format_timings(result)}")
+    print(f"\n✅ Audio is decoded and resampled to {STT_SAMPLE_RATE} Hz before recognition")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmark_streaming.py
+"""
+Time-to-first-byte of streamed vs. blocking LLM answers, measured offline
+against the fake streaming backends in llm_gateway.py (the in-process
+StubModel and the stub HTTP server), so it can run in CI.
+
+The fake model takes LATENCY seconds for a whole answer and produces its
+first chunk after FIRST_CHUNK seconds, like Gemini. A blocking call shows
+nothing until the whole answer is there; a streamed one can render the
+first words after roughly FIRST_CHUNK.
+
+Run: python benchmark_streaming.py
+"""
+import threading
+import time
+
+from llm_gateway import HTTPModel, LLMGateway, StubModel, serve_stub
+
+LATENCY = 1.5
+FIRST_CHUNK = 0.3
+REQUESTS = 5
+ANSWER = " ".join(["The", "Keyboard", "has", "42", "units", "in", "stock", "at", "Rs.", "1,499", "each."] * 3)
+
+def blocking_ttfb(gateway, prompt):
+    start = time.perf_counter()
+    text = gateway.generate(prompt)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, text
+
+def streaming_ttfb(gateway, prompt):
+    start = time.perf_counter()
+    first = None
+    text = ""
+    for chunk in gateway.stream(prompt):
+        if first is None:
+            first = time.perf_counter() - start
+        text += chunk
+    return first, time.perf_counter() - start, text
+
+def measure(label, model):
+    gateway = LLMGateway(model)
+    rows = []
+    for name, function in (("Blocking generate()", blocking_ttfb), ("Streaming stream()", streaming_ttfb)):
+        # Distinct prompts so nothing is coalesced
+        runs = [function(gateway, f"{name} question {i}") for i in range(REQUESTS)]
+        assert all(text == ANSWER for _, _, text in runs), "streamed text differs from the full answer"
+        rows.append((name, sum(r[0] for r in runs) / REQUESTS, sum(r[1] for r in runs) / REQUESTS))
+    gateway.shutdown()
+
+    print(f"\n{label}:")
+    for name, ttfb, total in rows:
+        print(f"  {name:<20} first byte {ttfb * 1000:7.0f} ms, complete {total * 1000:7.0f} ms")
+    (_, blocking, _), (_, streaming, _) = rows
+    assert streaming < blocking / 2, "streaming did not cut time-to-first-byte"
+    return blocking, streaming
+
+def main():
+    print("=" * 60)
+    print(f"STREAMING TTFB BENCHMARK (model: {LATENCY}s per answer, first chunk after {FIRST_CHUNK}s)")
+    print("=" * 60)
+    respond = lambda prompt: ANSWER
+    measure("In-process fake model", StubModel(LATENCY, respond=respond, first_chunk_latency=FIRST_CHUNK))
+
+    server = serve_stub(8768, latency=LATENCY, first_chunk_latency=FIRST_CHUNK, respond=respond)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        blocking, streaming = measure("Stub HTTP server", HTTPModel("http://127.0.0.1:8768/"))
+    finally:
+        server.shutdown()
+    print(f"\n✅ Time to first byte cut {blocking / streaming:.1f}x by streaming")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmark_text_normalization.py
+"""
+Golden checks and timings for text_normalization.clean_text_for_speech()
+against the original implementation from app.py.
+
+  1. Golden replies (English and Hindi) give the expected speech text.
+  2. 20,000 random strings built from markdown markers, emoji, Hindi and
+     newlines give exactly the legacy output, one at a time and batched.
+  3. Timings for a short reply, a long reply and a batch of replies.
+
+Run: python benchmark_text_normalization.py
+"""
+import random
+import time
+
+from text_normalization import clean_text_for_speech, clean_texts
+
+def legacy_clean_text_for_speech(text):
+    """The version app.py used to ship."""
+    import re
+    # Remove bold (**text** or __text__)
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'__(.+?)__', r'\1', text)
+    # Remove italic (*text* or _text_)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = re.sub(r'_(.+?)_', r'\1', text)
+    # Remove links [text](url)
+    text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)
+    # Remove inline code (`text`)
+    text = re.sub(r'`(.+?)`', r'\1', text)
+    # Remove only emojis (keep Hindi/Unicode text)
+    # This pattern removes emoji ranges but preserves Hindi characters
+    text = re.sub(r'[\U0001F300-\U0001F9FF]|[\U0001F600-\U0001F64F]|[\U0001F900-\U0001F9FF]|[\U0001FA00-\U0001FA6F]|[\U0001F680-\U0001F6FF]', '', text)
+    # Remove markdown symbols but keep punctuation and unicode characters
+    text = re.sub(r'[#*_\[\](){}|\\`~^]', ' ', text)
+    return text.strip()
+
+GOLDEN = [
+    ("Yes, **45 units** in stock at Rs. 8,500 each.",
+     "Yes, 45 units in stock at Rs. 8,500 each."),
+    ("📦 **Keyboard** (PROD003): _12 left_ — see [the report](http://x/r) or `PROD003`.",
+     "Keyboard  PROD003 : 12 left — see the report or PROD003."),
+    ("### Low stock\n* Mouse: 3\n* Monitor: 1 🚨",
+     "Low stock\n  Mouse: 3\n  Monitor: 1"),
+    ("__Total revenue__ this month: Rs. 2.4 crores 💰📈",
+     "Total revenue this month: Rs. 2.4 crores"),
+    ("Raj Patel spent ~Rs. 95,000 on {5} orders | ^top^ customer",
+     "Raj Patel spent  Rs. 95,000 on  5  orders    top  customer"),
+    ("**कीबोर्ड** का स्टॉक: *45 यूनिट* 👍",
+     "कीबोर्ड का स्टॉक: 45 यूनिट"),
+    ("मैं आपकी **इन्वेंटरी** में मदद कर सकती हूँ। [रिपोर्ट](http://x) देखें 🙏",
+     "मैं आपकी इन्वेंटरी में मदद कर सकती हूँ। रिपोर्ट देखें"),
+    ("मूल्य अभी सेट नहीं है।\n\n📝 **नोट:** `Owner Tools` में अपडेट करें।",
+     "मूल्य अभी सेट नहीं है।\n\n नोट: Owner Tools में अपडेट करें।"),
+    ("***bold italic*** and **unclosed * mix__ of_ markers",
+     "bold italic and  unclosed  mix  of markers"),
+    ("", ""),
+]
+
+ASCII_ALPHABET = list("ab 1.,:") + list("*_[]()`#~|{}^\\") + ["\n"]
+FUZZ_ALPHABET = ASCII_ALPHABET + ["कि", "हूँ", "📦", "🚀", "🤖", "✅", "🩺", "™"]
+
+def fuzz_text(rng, alphabet=FUZZ_ALPHABET):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+
+def timed(function, argument, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(argument)
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    print("=" * 60)
+    print("TEXT NORMALIZATION (speech cleaning) CHECKS")
+    print("=" * 60)
+
+    # 1. Golden replies
+    for text, expected in GOLDEN:
+        assert legacy_clean_text_for_speech(text) == expected, (text, legacy_clean_text_for_speech(text))
+        assert clean_text_for_speech(text) == expected, (text, clean_text_for_speech(text))
+    assert clean_texts(text for text, _ in GOLDEN) == [expected for _, expected in GOLDEN]
+    print(f"Golden:  {len(GOLDEN)} English/Hindi replies match")
+
+    # 2. Random markdown soup
+    rng = random.Random(42)
+    samples = [fuzz_text(rng) for _ in range(10_000)] + [fuzz_text(rng, ASCII_ALPHABET) for _ in range(10_000)]
+    expected = [legacy_clean_text_for_speech(text) for text in samples]
+    assert [clean_text_for_speech(text) for text in samples] == expected
+    assert clean_texts(samples) == expected
+    print(f"Fuzz:    {len(samples):,} random strings identical to the legacy output (single and batched)")
+
+    # 3. Timings
+    english = "\n".join(text for text, _ in GOLDEN if text.isascii()) * 500
+    mixed = "\n".join(text for text, _ in GOLDEN) * 200
+    batch = [text for text, _ in GOLDEN] * 1_000
+    print("\nTimings (before -> after):")
+    for label, legacy, current, argument, repeat in (
+        ("Plain reply", legacy_clean_text_for_speech, clean_text_for_speech, "Total revenue this month: Rs. 2.4 crores.", 20_000),
+        ("Markdown reply", legacy_clean_text_for_speech, clean_text_for_speech, GOLDEN[1][0], 20_000),
+        ("Hindi reply", legacy_clean_text_for_speech, clean_text_for_speech, GOLDEN[6][0], 20_000),
+        (f"English report ({len(english) // 1000} KB)", legacy_clean_text_for_speech, clean_text_for_speech, english, 20),
+        (f"Mixed report ({len(mixed) // 1000} KB)", legacy_clean_text_for_speech, clean_text_for_speech, mixed, 20),
+        (f"Batch of {len(batch):,}", lambda texts: [legacy_clean_text_for_speech(t) for t in texts], clean_texts, batch, 5),
+    ):
+        before = timed(legacy, argument, repeat)
+        after = timed(current, argument, repeat)
+        print(f"  {label:<24} {before * 1000:9.3f} ms -> {after * 1000:9.3f} ms  ({before / after:.1f}x)")
+    print("\n✅ Speech cleaning is byte-for-byte identical")
+
+if __name__ == "__main__":
+    main()
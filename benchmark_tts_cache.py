@@ -0,0 +1,73 @@
+# benchmark_tts_cache.py
+"""
+Checks for tts_cache.py with the StubEngine (no network or audio device).
+
+  1. Reply latency: synchronous synthesis blocks the reply for the whole
+     engine latency; submit() hands back a Future almost at once.
+  2. Replays: "Play Last Reply" for an already spoken reply is a cache hit.
+  3. Coalescing: the same text submitted by several sessions at once is
+     synthesised once.
+  4. Size bound: the cache directory never grows past max_bytes.
+
+Run: python benchmark_tts_cache.py
+"""
+import os
+import tempfile
+import time
+
+from tts_cache import StubEngine, TTSCache
+
+LATENCY = 0.4
+REPLY = "Yes, 45 units of Keyboard in stock at Rs. 1,499 each."
+
+def main():
+    print("=" * 60)
+    print(f"TTS CACHE BENCHMARK (stub engine: {LATENCY}s per reply)")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = StubEngine(latency=LATENCY)
+        tts = TTSCache(engine, cache_dir=os.path.join(workdir, "audio"))
+
+        # 1. Time until the app can move on after a reply
+        start = time.perf_counter()
+        engine.synthesize(REPLY, "en")
+        blocking = time.perf_counter() - start
+        start = time.perf_counter()
+        future = tts.submit(REPLY, "en")
+        background = time.perf_counter() - start
+        audio = future.result()
+        print(f"Reply blocked: {blocking * 1000:7.1f} ms synchronous, {background * 1000:7.2f} ms with submit()")
+        assert background < blocking / 10
+
+        # 2. Replaying the same reply
+        start = time.perf_counter()
+        replay = tts.synthesize(REPLY, "en")
+        elapsed = time.perf_counter() - start
+        assert replay == audio and engine.calls == 2, engine.calls
+        print(f"Replay:        {elapsed * 1000:7.2f} ms (cache hit, no synthesis)")
+
+        # 3. Concurrent requests for the same text
+        calls = engine.calls
+        futures = [tts.submit("What needs restocking?", "en") for _ in range(10)]
+        assert len({f.result() for f in futures}) == 1 and engine.calls == calls + 1
+        print(f"Coalescing:    10 requests for one new text -> {engine.calls - calls} synthesis")
+
+        # 4. Eviction keeps the directory under its limit
+        small = TTSCache(StubEngine(), cache_dir=os.path.join(workdir, "small"), max_bytes=50_000)
+        for i in range(40):
+            small.synthesize(f"Reply number {i} about product PROD{i:03d}", "en")
+        on_disk = sum(entry.stat().st_size for entry in os.scandir(small.cache_dir))
+        stats = small.get_stats()
+        assert on_disk <= small.max_bytes and on_disk == stats["bytes"], (on_disk, stats)
+        print(f"Size bound:    40 replies -> {stats['files']} files, {on_disk:,} bytes "
+              f"(limit {small.max_bytes:,}), {stats['evicted']} evicted")
+
+        # The index is rebuilt from disk after a restart
+        reopened = TTSCache(StubEngine(), cache_dir=small.cache_dir, max_bytes=50_000)
+        assert reopened.get("Reply number 39 about product PROD039", "en") is not None
+        tts.shutdown()
+        small.shutdown()
+    print("\n✅ TTS cache checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# chat_history.py (Bounded chat transcript with an SQLite archive)
+"""
+Keeps the chat transcript cheap to draw however long a session runs.
+
+* The session keeps at most MAX_SESSION_MESSAGES messages; older ones are
+  moved, a page at a time, to the chat_archive table in app_state.db.
+* Only the newest CHAT_WINDOW messages are drawn. "Show earlier messages"
+  widens the window by PAGE_SIZE, paging older messages in from the
+  session first and then from the archive.
+* app.py draws the visible history once at the top of the run and then
+  only the new turn, instead of redrawing the whole list after each
+  message.
+
+The functions take the session state (st.session_state or any dict), so
+they can be exercised without Streamlit.
+"""
+import time
+import uuid
+
+from database import STATE_DB, get_db_connection
+
+CHAT_WINDOW = 20
+PAGE_SIZE = 20
+MAX_SESSION_MESSAGES = 60
+
+ARCHIVE_TABLE = """
+CREATE TABLE IF NOT EXISTS chat_archive (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    archived_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID
+"""
+
+def init_chat_state(state, greeting):
+    """Sets up the chat keys of a new session."""
+    if "messages" not in state:
+        state["messages"] = [{"role": "assistant", "content": greeting}]
+    if "chat_session_id" not in state:
+        state["chat_session_id"] = uuid.uuid4().hex
+    if "archived_count" not in state:
+        state["archived_count"] = 0      # messages moved to chat_archive so far
+    if "chat_window" not in state:
+        state["chat_window"] = CHAT_WINDOW
+
+def archive_overflow(state, db_name=STATE_DB, limit=MAX_SESSION_MESSAGES):
+    """Moves the oldest messages to the archive once the session holds more than limit.
+
+    A whole page is moved at a time, so this writes once every PAGE_SIZE
+    messages rather than on every turn. Returns the number archived.
+    """
+    messages = state["messages"]
+    if len(messages) <= limit:
+        return 0
+    count = len(messages) - max(limit - PAGE_SIZE, 0)
+    start = state["archived_count"]
+    now = time.time()
+    rows = [(state["chat_session_id"], start + offset, message["role"], message["content"], now)
+            for offset, message in enumerate(messages[:count])]
+    with get_db_connection(db_name) as conn:
+        conn.execute(ARCHIVE_TABLE)
+        conn.executemany(
+            "INSERT OR REPLACE INTO chat_archive (session_id, seq, role, content, archived_at) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+    del messages[:count]
+    state["archived_count"] = start + count
+    return count
+
+def load_archived(state, count, db_name=STATE_DB):
+    """Returns the newest `count` archived messages of this session, oldest first."""
+    end = state["archived_count"]
+    if count <= 0 or end == 0:
+        return []
+    with get_db_connection(db_name) as conn:
+        conn.execute(ARCHIVE_TABLE)
+        rows = conn.execute(
+            "SELECT role, content FROM chat_archive WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (state["chat_session_id"], max(end - count, 0), end)
+        ).fetchall()
+    return [{"role": role, "content": content} for role, content in rows]
+
+def visible_messages(state, db_name=STATE_DB):
+    """Returns (messages to draw, whether there are older ones) for the current window."""
+    messages = state["messages"]
+    window = state["chat_window"]
+    if window <= len(messages):
+        return messages[len(messages) - window:], len(messages) > window or state["archived_count"] > 0
+    missing = window - len(messages)
+    return load_archived(state, missing, db_name) + messages, state["archived_count"] > missing
+
+def show_earlier(state):
+    """Widens the visible window by one page."""
+    state["chat_window"] += PAGE_SIZE
@@ -1,14 +1,16 @@
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from collections import Counter
 
 # Import our existing inventory management functions
-from inventory_utils import (
+from analytics import (
     get_inventory_status,
     check_low_stock_items,
     get_product_details
 )
+from product_matcher import get_product_matcher
+from product_search import search_products
 
 # --- 1. Knowledge Base ---
 # This dictionary defines what our chatbot can understand.
@@ -38,11 +40,15 @@ knowledge_base = {
 
 # --- 2. NLP Processing Core ---
 
-# Combine all patterns into a single list for the vectorizer
+# Combine all patterns into a single list for the vectorizer, remembering
+# which intent each pattern belongs to. Patterns are added intent by intent,
+# so each intent owns one contiguous block of rows.
 all_patterns = []
+pattern_intents = []
 for intent, data in knowledge_base.items():
     if "patterns" in data:
         all_patterns.extend(data["patterns"])
+        pattern_intents.extend([intent] * len(data["patterns"]))
 
 # Initialize and train the TF-IDF Vectorizer
 # TF-IDF stands for Term Frequency-Inverse Document Frequency. It's a way to
@@ -50,54 +56,98 @@ for intent, data in knowledge_base.items():
 # unique to a specific pattern.
 vectorizer = TfidfVectorizer().fit(all_patterns)
 
-def get_intent(user_query):
+# Precompute every pattern vector once into a single sparse matrix. The
+# vectorizer L2-normalises its rows, so a plain dot product with a query
+# vector is the cosine similarity.
+pattern_matrix = vectorizer.transform(all_patterns)
+pattern_labels = np.array(pattern_intents)
+# Row where each intent's block of patterns starts (for the grouped max)
+intent_starts = np.flatnonzero(np.r_[True, pattern_labels[1:] != pattern_labels[:-1]])
+intent_names = pattern_labels[intent_starts].tolist()
+
+CONFIDENCE_THRESHOLD = 0.3
+
+# For single queries, vectorizer.transform() costs far more than the maths
+# itself, so the query is weighted by hand (same counts x idf, L2-normalised
+# as TfidfVectorizer does) against a dense copy of the small pattern matrix.
+_analyzer = vectorizer.build_analyzer()
+_vocabulary = vectorizer.vocabulary_
+_idf = vectorizer.idf_
+_pattern_dense = pattern_matrix.toarray()
+
+def classify_intents(user_queries):
     """
-    This function uses cosine similarity to find the best matching intent
-    for a user's query.
+    Classifies many queries at once. Returns a list of (intent, similarity score).
+
+    One sparse matrix product scores every query against every pattern, then
+    a grouped max per intent block picks the best pattern of each intent.
     """
-    # Convert the user query into a TF-IDF vector
-    query_vector = vectorizer.transform([user_query])
-
-    # Calculate similarity scores between the user query and all known patterns
-    max_similarity = 0
-    best_intent = "unknown"
-
-    for intent, data in knowledge_base.items():
-        if "patterns" in data:
-            # Convert all patterns for this intent into vectors
-            patterns_vector = vectorizer.transform(data["patterns"])
-            # Calculate cosine similarity
-            similarities = cosine_similarity(query_vector, patterns_vector)
-            # Find the highest similarity score for this intent
-            current_max_sim = np.max(similarities)
-            
-            if current_max_sim > max_similarity:
-                max_similarity = current_max_sim
-                best_intent = intent
-    
+    query_matrix = vectorizer.transform(user_queries)
+    similarities = (query_matrix @ pattern_matrix.T).toarray()
+    intent_scores = np.maximum.reduceat(similarities, intent_starts, axis=1)
+    best = intent_scores.argmax(axis=1)
+    best_scores = intent_scores[np.arange(len(user_queries)), best]
+
     # We set a confidence threshold. If the best match is too weak,
     # we classify it as unknown. This prevents weird matches.
-    if max_similarity > 0.3:
-        return best_intent
-    else:
-        return "unknown"
+    return [
+        (intent_names[i] if score > CONFIDENCE_THRESHOLD else "unknown", float(score))
+        for i, score in zip(best, best_scores)
+    ]
+
+def classify_intent(user_query):
+    """
+    This function uses cosine similarity to find the best matching intent
+    for a user's query. Returns (intent, similarity score).
+    """
+    counts = Counter(term for term in _analyzer(user_query) if term in _vocabulary)
+    if not counts:
+        return "unknown", 0.0
+    columns = np.fromiter((_vocabulary[term] for term in counts), dtype=np.intp, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=float, count=len(counts)) * _idf[columns]
+    weights /= np.sqrt(weights @ weights)
+
+    similarities = _pattern_dense[:, columns] @ weights
+    intent_scores = np.maximum.reduceat(similarities, intent_starts)
+    best = int(intent_scores.argmax())
+    score = float(intent_scores[best])
+    return (intent_names[best] if score > CONFIDENCE_THRESHOLD else "unknown"), score
+
+def get_intent(user_query):
+    """Returns the best matching intent for a user's query (or "unknown")."""
+    return classify_intent(user_query)[0]
+
+# Minimum fuzzy-search score for extract_product_names to trust a match
+FUZZY_MATCH_SCORE = 0.75
+
+def extract_products(user_query):
+    """
+    Finds every product mentioned in the user's query (a basic form of
+    Named Entity Recognition). Names, IDs, SKUs and short aliases are matched
+    in one pass by the Aho-Corasick automaton in product_matcher.py, which is
+    only rebuilt when the catalog changes. Returns product dicts (product_id,
+    product_name, ...), one per product ID: a name shared by several IDs
+    yields all of them.
+    """
+    products = get_product_matcher().extract(user_query)
+    if not products:
+        # No exact name in the query: fall back to typo-tolerant search
+        # ("projecter", "desk lamp led") and accept only a confident match
+        products = [product for product, score in search_products(user_query, limit=1) if score >= FUZZY_MATCH_SCORE]
+    return products
+
+def extract_product_names(user_query):
+    """Names of the products mentioned in the query, in order of appearance."""
+    # Several product IDs can share a name, so de-duplicate while keeping order
+    return list(dict.fromkeys(product["product_name"] for product in extract_products(user_query)))
 
 def extract_product_name(user_query):
     """
     A simple function to find a product name within the user's query.
-    This is a basic form of Named Entity Recognition (NER).
+    Returns the correctly cased name of the first product mentioned, or None.
     """
-    inventory_df = get_inventory_status()
-    product_names = inventory_df['ProductName'].str.lower().tolist()
-    
-    for word in user_query.lower().split():
-        # A more robust check for multi-word product names
-        for product in product_names:
-            if product in user_query.lower():
-                # We need to return the correctly cased product name
-                original_case_product = inventory_df[inventory_df['ProductName'].str.lower() == product]['ProductName'].iloc[0]
-                return original_case_product
-    return None
+    product_names = extract_product_names(user_query)
+    return product_names[0] if product_names else None
 
 def get_bot_response(user_query):
     """
@@ -1,32 +1,104 @@
 # chatbot_nlp.py
-import spacy
+import re
+import threading
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("SpaCy model not found. Please run: python -m spacy download en_core_web_sm")
-    nlp = None
+SPACY_MODEL = "en_core_web_sm"
+# Only the POS tags are used, so the dependency parser, NER and lemmatizer
+# are never loaded (they are most of the model's load time and memory)
+SPACY_DISABLED = ["parser", "ner", "lemmatizer"]
 
-def process_user_query(text):
-    if nlp is None:
-        return "error", {}
+_nlp = None
+_nlp_failed = False
+_nlp_lock = threading.Lock()
 
-    doc = nlp(text.lower())
-    intent = "unknown"
-    entities = {}
+def get_nlp():
+    """Loads the spaCy pipeline on first use. Returns None if spaCy or the model is missing."""
+    global _nlp, _nlp_failed
+    if _nlp is not None or _nlp_failed:
+        return _nlp
+    with _nlp_lock:
+        if _nlp is None and not _nlp_failed:
+            try:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL, disable=SPACY_DISABLED)
+            except ImportError:
+                # Keyword rules and the regex fallback still work without spaCy
+                print("SpaCy not installed. Please run: pip install spacy")
+                _nlp_failed = True
+            except OSError:
+                print(f"SpaCy model not found. Please run: python -m spacy download {SPACY_MODEL}")
+                _nlp_failed = True
+    return _nlp
+
+# Keyword rules (regular expressions), checked in order. More specific phrases
+# come first so that e.g. "low stock" is not swallowed by the generic "stock"
+# rule, and word boundaries keep "top" from matching "laptop".
+KEYWORD_RULES = [
+    ("get_low_stock_alerts", [r"\blow (?:on |in )?stock", r"\brunning low\b", r"\brestock", r"\breorder", r"\balert", r"\brunning out"]),
+    # "kitna" alone asks the price; "kitna stock hai" is a stock question
+    ("get_price", [r"\bprice", r"\bcost", r"\bhow much\b", r"^(?!.*\b(?:stock|units|inventory|maal)\b).*\bkitna\b"]),
+    ("get_stock_status", [r"\bstock", r"\binventory\b", r"\bhow many\b", r"\bunits\b"]),
+    ("get_top_sellers", [r"\btop (?:\d+ )?(?:sell|product|item)", r"\bbest ?sell", r"\bmost sold\b"]),
+    ("greet", [r"\bhello\b", r"\bhi\b", r"\bhey\b", r"\bnamaste\b"]),
+]
+_KEYWORD_PATTERNS = [(intent, re.compile("|".join(keywords))) for intent, keywords in KEYWORD_RULES]
+
+def match_keyword_intent(text):
+    """Returns the first keyword-rule intent found in the text (no spaCy needed), or "unknown"."""
+    text = text.lower()
+    for intent, pattern in _KEYWORD_PATTERNS:
+        if pattern.search(text):
+            return intent
+    return "unknown"
 
-    if "stock" in text.lower() or "inventory" in text.lower() or "how many" in text.lower():
-        intent = "get_stock_status"
-    elif "low stock" in text.lower() or "restock" in text.lower() or "reorder" in text.lower() or "alert" in text.lower():
-        intent = "get_low_stock_alerts"
-    elif "top" in text.lower() or "best seller" in text.lower():
-        intent = "get_top_sellers"
-    elif "hello" in text.lower() or "hi" in text.lower():
-        intent = "greet"
+# Words that are never a product name
+NON_PRODUCT_WORDS = {"stock", "inventory", "sales", "demand", "reorder", "products", "items"}
 
+# Used by the regex fallback in place of spaCy's POS tags: a product word is
+# the first word that is not a question/filler word or a keyword above.
+_WORD = re.compile(r"[a-z][a-z0-9\-]+")
+_FILLER_WORDS = {
+    "a", "an", "the", "of", "for", "in", "on", "at", "to", "is", "are", "am", "do", "does", "did",
+    "we", "our", "us", "you", "me", "my", "i", "it", "its", "have", "has", "had", "be", "can",
+    "what", "whats", "which", "who", "how", "many", "much", "show", "tell", "list", "give", "get",
+    "about", "any", "all", "there", "left", "please", "and", "or", "with", "this", "that", "today",
+    "price", "cost", "low", "top", "best", "level", "status", "details", "units", "unit", "hello", "hi",
+} | NON_PRODUCT_WORDS
+
+def _entities_from_doc(doc):
+    entities = {}
     for token in doc:
-        if token.pos_ == "NOUN" and token.text not in ["stock", "inventory", "sales", "demand", "reorder", "products", "items"]:
+        if token.pos_ == "NOUN" and token.text not in NON_PRODUCT_WORDS:
             entities['product_name'] = token.text
             break
-    
-    return intent, entities
\ No newline at end of file
+    return entities
+
+def _entities_from_regex(text):
+    entities = {}
+    for word in _WORD.findall(text):
+        if word not in _FILLER_WORDS:
+            entities['product_name'] = word
+            break
+    return entities
+
+def process_user_query(text, use_spacy=True):
+    """Returns (intent, entities) for a query.
+
+    With use_spacy=False, or when spaCy is unavailable, entities come from a
+    regex tokenizer instead, which skips loading the model entirely.
+    """
+    intent = match_keyword_intent(text)
+    nlp = get_nlp() if use_spacy else None
+    if nlp is None:
+        return intent, _entities_from_regex(text.lower())
+    return intent, _entities_from_doc(nlp(text.lower()))
+
+def process_user_queries(texts, use_spacy=True, batch_size=64):
+    """Batch version of process_user_query, streaming the texts through nlp.pipe."""
+    texts = list(texts)
+    intents = [match_keyword_intent(text) for text in texts]
+    nlp = get_nlp() if use_spacy else None
+    if nlp is None:
+        return [(intent, _entities_from_regex(text.lower())) for intent, text in zip(intents, texts)]
+    docs = nlp.pipe((text.lower() for text in texts), batch_size=batch_size)
+    return [(intent, _entities_from_doc(doc)) for intent, doc in zip(intents, docs)]
@@ -0,0 +1,294 @@
+# context_retrieval.py (Relevance-filtered LLM context)
+import re
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from context_encoder import PRODUCT_FIELDS, PRODUCT_SALES_FIELDS, SALE_FIELDS, encode_table
+from database import get_db_connection
+from analytics import get_catalog_version, get_inventory_context_sections
+
+# Rough size limit for the data part of the prompt. Gemini tokens average
+# about 4 characters of English/number-heavy text.
+DEFAULT_TOKEN_BUDGET = 3000
+CHARS_PER_TOKEN = 4
+
+MAX_MATCHED_PRODUCTS = 15
+MIN_PRODUCT_SCORE = 0.2
+MAX_SALES_ROWS = 20
+
+PRODUCT_COLUMNS = ["product_id", "product_name", "category", "current_stock", "reorder_point", "unit_price"]
+# What the index is built from; stock and price are read live for the matches
+INDEX_COLUMNS = ["product_id", "product_name", "category"]
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting (no API call)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# --- 1. Product index ---
+# Built once per catalog version (bumped only when a product is added,
+# removed, renamed or recategorised, not by stock or price updates, so
+# selling stock never triggers a refit). Every product becomes a small
+# document (id, name, category, SKU) and the query is scored against all of
+# them with a single TF-IDF sparse product, the same approach chatbot_logic.py
+# uses for intents.
+
+class ProductIndex:
+    def __init__(self, products_df):
+        self.products = products_df.reset_index(drop=True)
+        documents = (
+            self.products["product_id"].fillna("") + " "
+            + self.products["product_name"].fillna("") + " "
+            + self.products["category"].fillna("") + " "
+            + self.products.get("sku_code", pd.Series("", index=self.products.index)).fillna("")
+        ).str.lower()
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+        self.matrix = self.vectorizer.fit_transform(documents)
+
+    def search(self, query, limit=MAX_MATCHED_PRODUCTS, min_score=MIN_PRODUCT_SCORE):
+        """Returns the best matching product rows, most relevant first."""
+        query_vector = self.vectorizer.transform([query.lower()])
+        if query_vector.nnz == 0:
+            return self.products.iloc[0:0]
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        scores = (self.matrix @ query_vector.T).toarray().ravel()
+        candidates = scores.nonzero()[0]
+        candidates = candidates[scores[candidates] >= min_score]
+        best = candidates[scores[candidates].argsort()[::-1][:limit]]
+        return self.products.iloc[best]
+
+
+_index_cache = {"version": None, "index": None}
+_customer_cache = {"last_sale_id": None, "customers": []}
+_index_lock = threading.Lock()
+
+def _load_product_index(conn):
+    """Returns the ProductIndex (or None for an empty catalog), refitting it only after catalog changes."""
+    version = get_catalog_version(conn)
+    with _index_lock:
+        if version is not None and _index_cache["version"] == version:
+            return _index_cache["index"]
+
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+    select = INDEX_COLUMNS + (["sku_code"] if "sku_code" in columns else [])
+    products_df = pd.read_sql_query(f"SELECT {', '.join(select)} FROM products", conn)
+    index = ProductIndex(products_df) if not products_df.empty else None
+    with _index_lock:
+        _index_cache.update(version=version, index=index)
+    return index
+
+def _load_customers(conn):
+    """Returns the known customer names, reading only the sales added since the last call."""
+    last_sale_id = conn.execute("SELECT MAX(sale_id) FROM sales_history").fetchone()[0] or 0
+    with _index_lock:
+        cached_id, customers = _customer_cache["last_sale_id"], _customer_cache["customers"]
+    if cached_id == last_sale_id:
+        return customers
+    if cached_id is None or last_sale_id < cached_id:
+        # First call, or sales were deleted: read every name again
+        rows = conn.execute("SELECT DISTINCT customer_name FROM sales_history WHERE customer_name IS NOT NULL")
+        customers = [row[0] for row in rows]
+    else:
+        rows = conn.execute(
+            "SELECT DISTINCT customer_name FROM sales_history WHERE sale_id > ? AND customer_name IS NOT NULL",
+            (cached_id,)
+        )
+        known = set(customers)
+        customers = customers + [row[0] for row in rows if row[0] not in known]
+    with _index_lock:
+        _customer_cache.update(last_sale_id=last_sale_id, customers=customers)
+    return customers
+
+def get_customer_names():
+    """Returns the known customer names (cached; only new sales are read)."""
+    with get_db_connection() as conn:
+        return _load_customers(conn)
+
+def _load_indexes(conn):
+    """Returns (ProductIndex or None, customer names)."""
+    return _load_product_index(conn), _load_customers(conn)
+
+def _live_products(conn, matched):
+    """Current PRODUCT_COLUMNS of the matched products, in the index's relevance order."""
+    product_ids = matched["product_id"].tolist()
+    placeholders = ", ".join("?" for _ in product_ids)
+    live = pd.read_sql_query(
+        f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM products WHERE product_id IN ({placeholders})",
+        conn,
+        params=product_ids,
+    )
+    order = {product_id: position for position, product_id in enumerate(product_ids)}
+    return live.sort_values("product_id", key=lambda ids: ids.map(order)).reset_index(drop=True)
+
+
+# --- 2. Query understanding: customers and time windows ---
+
+CUSTOMER_KEYWORDS = ("customer", "buyer", "client", "who bought", "who spent", "grahak")
+SALES_KEYWORDS = ("sale", "sold", "revenue", "earn", "income", "transaction", "payment", "order", "bikri")
+
+def find_customers(query, customers):
+    """Returns customers whose full name or surname appears in the query."""
+    text = query.lower()
+    matched = []
+    for name in customers:
+        parts = name.lower().split()
+        if name.lower() in text or any(len(p) > 2 and re.search(rf"\b{re.escape(p)}\b", text) for p in parts):
+            matched.append(name)
+    return matched
+
+def find_time_window(query, now=None):
+    """Returns (label, start, end) date strings for a time phrase in the query, or None."""
+    text = query.lower()
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    fmt = "%Y-%m-%d"
+
+    match = re.search(r"(?:last|past)\s+(\d+)\s+(day|week|month)s?", text)
+    if match:
+        count, unit = int(match.group(1)), match.group(2)
+        days = count * {"day": 1, "week": 7, "month": 30}[unit]
+        return f"last {count} {unit}s", (today - timedelta(days=days)).strftime(fmt), (today + timedelta(days=1)).strftime(fmt)
+    if "yesterday" in text:
+        return "yesterday", (today - timedelta(days=1)).strftime(fmt), today.strftime(fmt)
+    if "today" in text or "aaj" in text:
+        return "today", today.strftime(fmt), (today + timedelta(days=1)).strftime(fmt)
+    if "last week" in text:
+        start = today - timedelta(days=today.weekday() + 7)
+        return "last week", start.strftime(fmt), (start + timedelta(days=7)).strftime(fmt)
+    if "this week" in text:
+        start = today - timedelta(days=today.weekday())
+        return "this week", start.strftime(fmt), (today + timedelta(days=1)).strftime(fmt)
+    if "last month" in text:
+        first_of_month = today.replace(day=1)
+        start = (first_of_month - timedelta(days=1)).replace(day=1)
+        return "last month", start.strftime(fmt), first_of_month.strftime(fmt)
+    if "this month" in text:
+        return "this month", today.replace(day=1).strftime(fmt), (today + timedelta(days=1)).strftime(fmt)
+    return None
+
+
+# --- 3. Section renderers ---
+
+def _render_products(products_df, title):
+    return f"=== {title} ===\n" + encode_table(products_df, PRODUCT_FIELDS) + "\n"
+
+def _render_product_sales(conn, product_ids):
+    placeholders = ", ".join("?" for _ in product_ids)
+    sales_df = pd.read_sql_query(
+        f"""
+        SELECT product_id, quantity_sold, total_amount, sale_date, customer_name
+        FROM sales_history
+        WHERE product_id IN ({placeholders})
+        ORDER BY sale_date DESC
+        LIMIT {MAX_SALES_ROWS}
+        """,
+        conn,
+        params=list(product_ids),
+    )
+    if sales_df.empty:
+        return ""
+    return "=== RECENT SALES OF THESE PRODUCTS ===\n" + encode_table(sales_df, SALE_FIELDS) + "\n"
+
+def _render_customers(conn, names):
+    placeholders = ", ".join("?" for _ in names)
+    rows = conn.execute(
+        f"""
+        SELECT customer_name, COUNT(*), SUM(total_amount), MAX(sale_date)
+        FROM sales_history
+        WHERE customer_name IN ({placeholders})
+        GROUP BY customer_name
+        """,
+        list(names),
+    ).fetchall()
+    text = "=== CUSTOMERS MENTIONED ===\n"
+    for name, count, total, last_date in rows:
+        text += f"- {name}: {count} purchases, Total: ₹{total or 0:,.2f}, Last purchase: {last_date}\n"
+    return text + "\n"
+
+def _render_time_window(conn, label, start, end):
+    totals = conn.execute(
+        "SELECT COUNT(*), SUM(quantity_sold), SUM(total_amount) FROM sales_history WHERE sale_date >= ? AND sale_date < ?",
+        (start, end),
+    ).fetchone()
+    by_product = pd.read_sql_query(
+        f"""
+        SELECT p.product_name, SUM(s.quantity_sold) AS units_sold, SUM(s.total_amount) AS revenue
+        FROM sales_history s
+        JOIN products p ON s.product_id = p.product_id
+        WHERE s.sale_date >= ? AND s.sale_date < ?
+        GROUP BY p.product_name
+        ORDER BY revenue DESC
+        LIMIT {MAX_SALES_ROWS}
+        """,
+        conn,
+        params=[start, end],
+    )
+    text = (
+        f"=== SALES {label.upper()} ({start} to {end}, end exclusive) ===\n"
+        f"Transactions: {totals[0]}, Units: {totals[1] or 0}, Revenue: ₹{totals[2] or 0:,.2f}\n"
+    )
+    if not by_product.empty:
+        text += encode_table(by_product, PRODUCT_SALES_FIELDS)
+    return text + "\n"
+
+def _truncate_to_budget(text, budget_tokens):
+    """Cuts a section at a line boundary so it fits in the remaining budget."""
+    max_chars = budget_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars] + "\n[...truncated]\n\n"
+
+
+# --- 4. Prompt assembly ---
+
+def build_relevant_context(user_query, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Returns the inventory/sales context relevant to the question, within token_budget.
+
+    Sections are added in priority order (matched products, customers, time
+    window, overall summary, full catalog if it still fits) and truncated at
+    the budget, so prompt size no longer grows with the catalog.
+    """
+    query = user_query.lower()
+
+    with get_db_connection() as conn:
+        index, customers = _load_indexes(conn)
+        matched_products = index.search(user_query) if index else pd.DataFrame(columns=INDEX_COLUMNS)
+        if not matched_products.empty:
+            matched_products = _live_products(conn, matched_products)
+        matched_customers = find_customers(user_query, customers)
+        window = find_time_window(user_query)
+
+        candidates = []
+        if not matched_products.empty:
+            candidates.append(_render_products(matched_products[PRODUCT_COLUMNS], "MATCHING PRODUCTS"))
+            candidates.append(_render_product_sales(conn, matched_products["product_id"].tolist()))
+        if matched_customers:
+            candidates.append(_render_customers(conn, matched_customers))
+        if window:
+            candidates.append(_render_time_window(conn, *window))
+
+    wanted = ["summary"]
+    if matched_customers or any(keyword in query for keyword in CUSTOMER_KEYWORDS):
+        wanted.append("top_customers")
+    if matched_products.empty:
+        # Nothing specific matched: fall back to the full catalog when it fits
+        wanted.append("products")
+    if any(keyword in query for keyword in SALES_KEYWORDS) and not window:
+        wanted.append("recent_sales")
+    general_sections = dict(get_inventory_context_sections(names=wanted))
+    for name in wanted:
+        candidates.append(general_sections[name].strip("\n") + "\n\n")
+
+    context = ""
+    remaining = token_budget
+    for section in candidates:
+        if not section or remaining <= 0:
+            continue
+        section = _truncate_to_budget(section, remaining)
+        context += section
+        remaining -= estimate_tokens(section)
+    return context.rstrip() + "\n"
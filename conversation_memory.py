@@ -0,0 +1,127 @@
+# conversation_memory.py (Bounded conversation state for follow-up questions)
+"""
+Lets follow-ups like "and its price?" work without sending the whole chat
+history to the LLM.
+
+Per session it keeps:
+
+* the last RECENT_TURNS question/answer pairs, answers clipped to
+  TURN_TOKEN_BUDGET;
+* a rolling summary of older turns, one short line each, with the oldest
+  lines dropped once it passes SUMMARY_TOKEN_BUDGET;
+* the resolved entity: the product last discussed, used to make a
+  follow-up question explicit before it is routed, cached or sent.
+
+render() therefore stays within a fixed token budget however long the
+session runs (see benchmark_conversation_memory.py). Summaries are
+extractive (question plus the answer's first sentence), so keeping them
+costs no extra model calls.
+"""
+import re
+from collections import deque
+
+from context_retrieval import CHARS_PER_TOKEN, estimate_tokens
+from product_matcher import get_product_matcher
+
+RECENT_TURNS = 3
+TURN_TOKEN_BUDGET = 120      # per remembered question + answer
+SUMMARY_TOKEN_BUDGET = 150
+MAX_DISCUSSED_PRODUCTS = 5
+
+# A question that points back at something said earlier
+FOLLOW_UP = re.compile(
+    r"\b(it|its|it's|them|they|those|these|same|(?:this|that) (?:one|product|item)|uska|uski|uske|iska|iski|iske)\b"
+    r"|^\s*(and|also|what about|how about|aur)\b"
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s")
+
+def _clip(text, max_chars):
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+def _first_sentence(text):
+    return _SENTENCE_END.split(text.strip(), 1)[0]
+
+def mentioned_products(text):
+    """Names of the products mentioned in text, in order of appearance."""
+    return list(dict.fromkeys(product["product_name"] for product in get_product_matcher().extract(text)))
+
+
+class ConversationMemory:
+    """Recent turns, a rolling summary and the product under discussion, within a token budget."""
+
+    def __init__(self, recent_turns=RECENT_TURNS, turn_budget=TURN_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.recent_turns = recent_turns
+        self.turn_budget = turn_budget
+        self.summary_budget = summary_budget
+        self.recent = deque()     # (question, clipped answer), oldest first
+        self.summary = deque()    # one line per older turn, oldest first
+        self.omitted = 0          # older turns dropped from the summary
+        self.entity = None        # product name the conversation is about
+        self.discussed = deque(maxlen=MAX_DISCUSSED_PRODUCTS)
+        self.turns = 0
+
+    def resolve(self, question):
+        """Makes a follow-up explicit: "and its price?" -> "and its price? (Keyboard)".
+
+        Questions that name a product themselves, or do not refer back to
+        anything, are returned unchanged.
+        """
+        if self.entity is None or not FOLLOW_UP.search(question.lower()):
+            return question
+        if mentioned_products(question):
+            return question
+        return f"{question} ({self.entity})"
+
+    def add_turn(self, question, answer):
+        """Records a finished turn (question as resolved, so the entity carries over)."""
+        self.turns += 1
+        products = mentioned_products(question)
+        if not products:
+            # "What is low on stock?" -> a one-product answer sets the topic, a list does not
+            answer_products = mentioned_products(answer)
+            products = answer_products if len(answer_products) == 1 else []
+        if products:
+            self.entity = products[-1]
+            for product in products:
+                if product in self.discussed:
+                    self.discussed.remove(product)
+                self.discussed.append(product)
+
+        answer_chars = max(self.turn_budget * CHARS_PER_TOKEN - len(question), 80)
+        self.recent.append((_clip(question, 200), _clip(answer, answer_chars)))
+        while len(self.recent) > self.recent_turns:
+            self._summarize(*self.recent.popleft())
+
+    def _summarize(self, question, answer):
+        self.summary.append(f"- {_clip(question, 80)} -> {_clip(_first_sentence(answer), 120)}")
+        while len(self.summary) > 1 and estimate_tokens("\n".join(self.summary)) > self.summary_budget:
+            self.summary.popleft()
+            self.omitted += 1
+
+    def render(self):
+        """The conversation section of the prompt ("" before the first turn)."""
+        if not self.turns:
+            return ""
+        lines = ["Conversation so far:"]
+        if self.summary:
+            earlier = f" ({self.omitted} older turns omitted)" if self.omitted else ""
+            lines.append(f"Earlier{earlier}:")
+            lines.extend(self.summary)
+        lines.append("Recent turns:")
+        for question, answer in self.recent:
+            lines.append(f"User: {question}")
+            lines.append(f"Assistant: {answer}")
+        if self.entity:
+            lines.append(f"Product being discussed: {self.entity}")
+        if len(self.discussed) > 1:
+            lines.append(f"Products mentioned recently: {', '.join(self.discussed)}")
+        return "\n".join(lines) + "\n\n"
+
+    def prompt_tokens(self):
+        return estimate_tokens(self.render())
+
+    def max_prompt_tokens(self):
+        """Upper bound of prompt_tokens() for this configuration."""
+        fixed = 40 + MAX_DISCUSSED_PRODUCTS * 10
+        return self.summary_budget + self.recent_turns * (self.turn_budget + 10) + fixed
@@ -0,0 +1,81 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from analytics import TOP_SELLERS_QUERY, TOP_SELLERS_ROLLUP_QUERY, RECENT_SALES_QUERY, TOP_CUSTOMERS_QUERY, has_sales_rollup
+
+DB_NAME = 'inventory.db'
+
+# (index name, table, columns). Column order matters: the leading column is
+# what the query filters or sorts on, the rest make the index "covering" so
+# SQLite never has to visit the table rows.
+INDEXES = [
+    # Recent-sales ORDER BY sale_date DESC LIMIT 50 (and date-range filters)
+    ("idx_sales_history_date", "sales_history", "sale_date"),
+    # get_top_sellers walks products and range-scans each product's last 30
+    # days here; quantity_sold is included so the table is never touched.
+    # Also serves per-product lookups (product context, delete_product).
+    ("idx_sales_history_product", "sales_history", "product_id, sale_date, quantity_sold"),
+    # Top-customers GROUP BY customer_name, summing total_amount
+    ("idx_sales_history_customer", "sales_history", "customer_name, total_amount"),
+    # The JOIN back to products (older databases have no primary key on it)
+    ("idx_products_product_id", "products", "product_id"),
+]
+
+# Dashboard queries: (name, SQL, parameters, how the query refers to
+# sales_history, plan phrases that must not appear). Every plan line that
+# reads sales_history has to go through an index; a temp b-tree for the
+# recent-sales sort would mean SQLite sorts the whole table.
+def dashboard_query_plans(conn=None):
+    thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S')
+    plans = [
+        ("top sellers", TOP_SELLERS_QUERY, (thirty_days_ago, 5), "s", []),
+        ("recent sales", RECENT_SALES_QUERY, (), "sales_history", ["USE TEMP B-TREE FOR ORDER BY"]),
+        ("top customers", TOP_CUSTOMERS_QUERY, (), "sales_history", ["USE TEMP B-TREE FOR GROUP BY"]),
+    ]
+    if conn is not None and has_sales_rollup(conn):
+        # The rollup's (sale_day, product_id) primary key serves the date range
+        plans.insert(1, ("top sellers (rollup)", TOP_SELLERS_ROLLUP_QUERY, (thirty_days_ago[:10], 5), "r", []))
+    return plans
+
+def create_indexes(conn):
+    cursor = conn.cursor()
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        print(f"✅ Index '{name}' on {table}({columns})")
+    # Refresh the planner statistics so it actually prefers the new indexes
+    cursor.execute("ANALYZE")
+    conn.commit()
+
+def explain(conn, query, params=()):
+    """Returns the EXPLAIN QUERY PLAN detail lines for a query."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+def check_query_plans(conn, verbose=True):
+    """Asserts that the dashboard queries are index-driven. Returns {name: plan lines}."""
+    plans = {}
+    for name, query, params, sales_ref, forbidden in dashboard_query_plans(conn):
+        plan = explain(conn, query, params)
+        plans[name] = plan
+        if verbose:
+            print(f"\n📋 {name}:")
+            for line in plan:
+                print(f"    {line}")
+
+        sales_reads = [line for line in plan if line.split()[:2] in (["SCAN", sales_ref], ["SEARCH", sales_ref])]
+        assert sales_reads, f"{name}: sales table does not appear in the plan"
+        for line in sales_reads:
+            assert "INDEX" in line or "PRIMARY KEY" in line, f"{name}: full scan of {sales_ref} ({line})"
+        for line in plan:
+            assert not any(phrase in line for phrase in forbidden), f"{name}: {line}"
+    return plans
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        print("🔄 Creating indexes...")
+        create_indexes(conn)
+        print("\n🔍 Checking dashboard query plans...")
+        check_query_plans(conn)
+        print("\n✅ All dashboard queries are index-driven")
+    finally:
+        conn.close()
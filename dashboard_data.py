@@ -0,0 +1,63 @@
+# dashboard_data.py (Sidebar dashboard reads, cached per data version)
+"""
+Streamlit re-runs app.py on every widget interaction. The sidebar's reads
+are cached per data version instead: get_data_version() is one small read
+of the data_versions counters, which the triggers bump on every write
+(from this session, another session or data_generator.py), so a changed
+table is re-read on the very next rerun and an unchanged one never is.
+
+The cache itself is app.py's st.cache_data function; this module only
+decides the key, so it can be exercised without Streamlit.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from analytics import get_data_version, get_low_stock_alerts, get_top_sellers
+from database import get_db_connection
+
+def load_suppliers():
+    with get_db_connection() as conn:
+        return pd.read_sql_query("SELECT supplier_id, supplier_name FROM suppliers", conn)
+
+def load_products():
+    with get_db_connection() as conn:
+        return pd.read_sql_query(
+            "SELECT product_id, product_name, unit_price, current_stock FROM products ORDER BY product_id", conn
+        )
+
+# name -> (tables the result depends on, loader)
+DASHBOARD_LOADERS = {
+    "low_stock": (("products",), get_low_stock_alerts),
+    "top_sellers": (("products", "sales_history"), get_top_sellers),
+    "suppliers": (("suppliers",), load_suppliers),
+    "products": (("products",), load_products),
+}
+
+def load_uncached(name, version=None, day=None):
+    """Runs the dashboard's query. version and day only make up the cache key."""
+    return DASHBOARD_LOADERS[name][1]()
+
+def dashboard_cache_key(name, now=None):
+    """Returns (name, version, day) for a dashboard, or None when it must not be cached.
+
+    The day is part of the key so the 30-day top-sellers window still
+    moves forward on days without any writes.
+    """
+    tables, _ = DASHBOARD_LOADERS[name]
+    version = get_data_version(tables)
+    if version is None:
+        # No change counters (run install_triggers.py): caching would go stale
+        return None
+    return name, version, (now or datetime.now()).strftime('%Y-%m-%d')
+
+def load_dashboard_data(name, cached_load, now=None):
+    """Returns a dashboard DataFrame, re-querying only after its tables have changed.
+
+    cached_load(name, version, day) is the memoized load_uncached (app.py
+    wraps it in st.cache_data).
+    """
+    key = dashboard_cache_key(name, now)
+    if key is None:
+        return load_uncached(name)
+    return cached_load(*key)
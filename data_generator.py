@@ -1,58 +1,102 @@
-# data_generator.py (Updated to be truly dynamic)
-import sqlite3
-import pandas as pd
-import time
+# data_generator.py (Load driver for sales_ingestion.py)
+"""
+Generates random sales and pushes them through sales_ingestion.ingest_sales.
+
+The defaults keep the original demo behaviour, one sale every 5 seconds,
+so the chatbot can be watched reacting to live data:
+
+    python data_generator.py
+
+Raise the rate and batch size to load-test ingestion:
+
+    python data_generator.py --rate 5000 --batch-size 500 --duration 30
+    python data_generator.py --rate 0 --count 100000   # as fast as possible
+"""
+import argparse
 import random
+import time
 from datetime import datetime
-from faker import Faker
-
-
-fake = Faker()
-DB_NAME = 'inventory.db'
-
-def get_db_connection():
-    return sqlite3.connect(DB_NAME)
-
-# NOTE: We no longer get products here
-# products_df = pd.read_sql_query("SELECT product_id, current_stock FROM products", get_db_connection())
-
-def generate_and_add_sale():
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # --- NEW CODE: Get the product list on every transaction ---
-        products_df = pd.read_sql_query("SELECT product_id, current_stock FROM products", conn)
-        
-        if products_df.empty:
-            print("No products found. Exiting generator.")
-            return
-
-        product_to_sell = products_df.sample(n=1)
-        product_id = product_to_sell['product_id'].iloc[0]
-        quantity_sold = random.randint(1, 5)
-
-        new_stock = int(product_to_sell['current_stock'].iloc[0]) - quantity_sold
-        if new_stock >= 0:
-            cursor.execute(
-                "UPDATE products SET current_stock = ? WHERE product_id = ?",
-                (new_stock, product_id)
-            )
-            sale_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            cursor.execute(
-                "INSERT INTO sales_history (product_id, quantity_sold, sale_date) VALUES (?, ?, ?)",
-                (product_id, quantity_sold, sale_date)
-            )
-            conn.commit()
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Sale added for {product_id}. {quantity_sold} units sold. New stock: {new_stock}")
-        else:
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Not enough stock for {product_id}. Skipping sale.")
 
-if __name__ == "__main__":
-    print("Starting dynamic data generator. Open another terminal for the chatbot.")
-    print("Press Ctrl+C to stop.")
+from database import get_db_connection
+from sales_ingestion import ingest_sales, print_stats
+
+PAYMENT_METHODS = ["Cash", "UPI", "Credit Card", "Debit Card", "Bank Transfer", "Cheque"]
+CUSTOMER_POOL_SIZE = 200
+
+def load_customer_names():
+    """A fixed pool of fake customer names (Faker is slow to call per sale)."""
+    try:
+        from faker import Faker
+    except ImportError:
+        return [f"Customer {i:03d}" for i in range(1, CUSTOMER_POOL_SIZE + 1)]
+    fake = Faker()
+    return [fake.name() for _ in range(CUSTOMER_POOL_SIZE)]
+
+def load_product_ids(db_name=None):
+    with get_db_connection(db_name) as conn:
+        return [row[0] for row in conn.execute("SELECT product_id FROM products")]
+
+def generate_sales(product_ids, customers, max_quantity=5):
+    """Endless stream of random sale events."""
+    while True:
+        yield {
+            "product_id": random.choice(product_ids),
+            "quantity_sold": random.randint(1, max_quantity),
+            "customer_name": random.choice(customers),
+            "payment_method": random.choice(PAYMENT_METHODS),
+        }
+
+def run(rate, batch_size, duration=None, count=None, db_name=None, verbose=False):
+    """Pushes batches of random sales at `rate` sales/sec (0 = unthrottled)."""
+    product_ids = load_product_ids(db_name)
+    if not product_ids:
+        print("No products found. Exiting generator.")
+        return None
+    sales = generate_sales(product_ids, load_customer_names())
+
+    totals = {"received": 0, "accepted": 0, "rejected": 0, "invalid": 0, "batches": 0}
+    start = time.perf_counter()
     try:
         while True:
-            generate_and_add_sale()
-            time.sleep(5)
+            elapsed = time.perf_counter() - start
+            if duration is not None and elapsed >= duration:
+                break
+            size = batch_size if count is None else min(batch_size, count - totals["received"])
+            if size <= 0:
+                break
+
+            stats = ingest_sales((next(sales) for _ in range(size)), batch_size=size, db_name=db_name)
+            for key in totals:
+                totals[key] += stats[key]
+            if verbose:
+                for product_id, quantity in stats["rejects"]:
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Not enough stock for {product_id}. Skipping sale.")
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] {stats['accepted']} sale(s) added.")
+
+            if rate > 0:
+                # Sleep until this batch's slot in the schedule
+                delay = start + totals["received"] / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
     except KeyboardInterrupt:
-        print("Data generation stopped.")
\ No newline at end of file
+        print("Data generation stopped.")
+
+    totals["seconds"] = time.perf_counter() - start
+    totals["rows_per_sec"] = totals["accepted"] / totals["seconds"] if totals["seconds"] else 0.0
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate random sales against the inventory database.")
+    parser.add_argument("--rate", type=float, default=0.2, help="target sales per second, 0 for unthrottled (default 0.2)")
+    parser.add_argument("--batch-size", type=int, default=1, help="sales per transaction (default 1)")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--count", type=int, default=None, help="stop after this many sales")
+    parser.add_argument("--db", default=None, help="database file (defaults to inventory.db)")
+    args = parser.parse_args()
+
+    print("Starting dynamic data generator. Open another terminal for the chatbot.")
+    print("Press Ctrl+C to stop.")
+    # Per-sale log lines only at demo rates
+    result = run(args.rate, args.batch_size, args.duration, args.count, args.db, verbose=0 < args.rate <= 1)
+    if result:
+        print_stats(result)
@@ -0,0 +1,178 @@
+# database.py (Shared SQLite access layer)
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_NAME = 'inventory.db'
+# Chat-side state (response cache, archived chat turns) lives in its own file
+# so the app's own bookkeeping never competes with inventory writes
+STATE_DB = 'app_state.db'
+
+# Connections kept open per database file. Streamlit serves each session from
+# its own thread, so a handful of warm connections covers normal usage.
+POOL_SIZE = 5
+ACQUIRE_TIMEOUT = 30  # seconds to wait for a free connection before giving up
+
+# sqlite3 keeps an LRU of compiled statements per connection; the dashboard
+# and chat queries are reused on every rerun, so keep plenty of them around.
+CACHED_STATEMENTS = 256
+
+# Write transactions that still find the database locked once busy_timeout
+# has expired are retried this many times, with jittered exponential backoff
+WRITE_RETRIES = 5
+RETRY_BACKOFF = 0.05  # seconds before the first retry, doubled each time
+
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",        # readers no longer block the writer (and vice versa)
+    "PRAGMA synchronous=NORMAL",      # safe with WAL, avoids an fsync per commit
+    "PRAGMA cache_size=-16000",       # ~16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",     # map up to 256 MB of the file instead of read() calls
+    "PRAGMA temp_store=MEMORY",       # sorts / GROUP BY temp b-trees stay in RAM
+    "PRAGMA busy_timeout=5000",       # wait for a competing writer instead of failing fast
+)
+
+
+class ConnectionPool:
+    """A small thread-safe pool of pre-configured connections to one database file."""
+
+    def __init__(self, db_name, size=POOL_SIZE):
+        self.db_name = db_name
+        self.size = size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # LIFO so the most recently used (warmest) connection is handed out first
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._created = 0
+        self._pid = os.getpid()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_name,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        """Returns an idle connection, opening a new one while under the pool size."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections must not be shared with a forked child process
+                self._reset()
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out waiting for a free connection to {self.db_name}"
+            )
+
+    def release(self, conn):
+        """Returns a connection to the pool, discarding any unfinished transaction."""
+        if self._pid != os.getpid():
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        """Closes every idle connection (used by scripts and benchmarks on exit)."""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._reset()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name=None):
+    """Returns the process-wide pool for a database file (defaults to DB_NAME)."""
+    path = os.path.abspath(db_name or DB_NAME)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+@contextmanager
+def get_db_connection(db_name=None):
+    """Borrows a pooled connection.
+
+    Behaves like ``with sqlite3.connect(...) as conn``: the transaction is
+    committed when the block exits normally and rolled back on an exception.
+    The connection goes back to the pool instead of being closed.
+    """
+    pool = get_pool(db_name)
+    conn = pool.acquire()
+    try:
+        yield conn
+        if conn.in_transaction:
+            conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+
+def is_busy_error(error):
+    """True for SQLite's 'database is locked' / 'busy' errors, which are safe to retry."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+def run_write_transaction(work, db_name=None, retries=WRITE_RETRIES):
+    """Runs work(conn) inside BEGIN IMMEDIATE ... COMMIT and returns its result.
+
+    BEGIN IMMEDIATE takes the write lock before anything is read, so the
+    transaction can never have to upgrade a stale read snapshot to a write
+    (which fails straight away in WAL mode, whatever the busy timeout is).
+    If the lock cannot be had, or the commit fails because the database is
+    busy, the whole transaction is rolled back and work is run again, so
+    work must only touch the database through conn.
+    """
+    for attempt in range(retries + 1):
+        with get_db_connection(db_name) as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                result = work(conn)
+                conn.commit()
+                return result
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                if not is_busy_error(e) or attempt == retries:
+                    raise
+        time.sleep(RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
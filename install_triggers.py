@@ -3,76 +3,217 @@ from datetime import datetime
 
 DB_NAME = 'inventory.db'
 
-def install_triggers():
+# Tables whose writes bump a counter in data_versions
+VERSIONED_TABLES = ('products', 'sales_history', 'suppliers')
+# Product columns that name or identify a product (bump the 'catalog' counter)
+CATALOG_COLUMNS = ('product_id', 'product_name', 'category', 'sku_code')
+
+SALES_ROLLUP_TABLE = """
+CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+    sale_day TEXT NOT NULL,                       -- YYYY-MM-DD
+    product_id TEXT NOT NULL,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue REAL NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    priced_count INTEGER NOT NULL DEFAULT 0,      -- sales with a total_amount (for averages)
+    max_sale REAL,
+    PRIMARY KEY (sale_day, product_id)
+) WITHOUT ROWID
+"""
+
+def _rollup_day(row):
+    return f"COALESCE(date({row}.sale_date), date('now'))"
+
+def _rollup_key(row):
+    return f"sale_day = {_rollup_day(row)} AND product_id = COALESCE({row}.product_id, '')"
+
+def _rollup_add(row):
+    """SQL that adds one sales_history row (NEW) to its rollup bucket."""
+    return f"""
+            INSERT INTO sales_daily_rollup
+                (sale_day, product_id, units_sold, revenue, transaction_count, priced_count, max_sale)
+            VALUES (
+                {_rollup_day(row)}, COALESCE({row}.product_id, ''), COALESCE({row}.quantity_sold, 0),
+                COALESCE({row}.total_amount, 0), 1, {row}.total_amount IS NOT NULL, {row}.total_amount
+            )
+            ON CONFLICT (sale_day, product_id) DO UPDATE SET
+                units_sold = units_sold + excluded.units_sold,
+                revenue = revenue + excluded.revenue,
+                transaction_count = transaction_count + 1,
+                priced_count = priced_count + excluded.priced_count,
+                max_sale = CASE WHEN max_sale IS NULL OR excluded.max_sale > max_sale
+                                THEN COALESCE(excluded.max_sale, max_sale) ELSE max_sale END;"""
+
+def _rollup_remove(row):
+    """SQL that takes one sales_history row (OLD) back out of its rollup bucket.
+
+    The bucket's max_sale is only recomputed (from the indexed raw rows of
+    that product and day) when the removed sale could have been the maximum.
+    """
+    return f"""
+            UPDATE sales_daily_rollup SET
+                units_sold = units_sold - COALESCE({row}.quantity_sold, 0),
+                revenue = revenue - COALESCE({row}.total_amount, 0),
+                transaction_count = transaction_count - 1,
+                priced_count = priced_count - ({row}.total_amount IS NOT NULL),
+                max_sale = CASE WHEN {row}.total_amount IS NULL OR {row}.total_amount < max_sale THEN max_sale
+                           ELSE (SELECT MAX(total_amount) FROM sales_history
+                                 WHERE product_id = {row}.product_id
+                                   AND sale_date >= {_rollup_day(row)}
+                                   AND sale_date < date({_rollup_day(row)}, '+1 day')) END
+            WHERE {_rollup_key(row)};
+            DELETE FROM sales_daily_rollup WHERE {_rollup_key(row)} AND transaction_count <= 0;"""
+
+def backfill_sales_rollup(cursor):
+    """One-shot rebuild of sales_daily_rollup from the raw sales_history rows."""
+    cursor.execute("DELETE FROM sales_daily_rollup")
+    cursor.execute(f"""
+        INSERT INTO sales_daily_rollup
+            (sale_day, product_id, units_sold, revenue, transaction_count, priced_count, max_sale)
+        SELECT {_rollup_day('sales_history')}, COALESCE(product_id, ''), COALESCE(SUM(quantity_sold), 0),
+               TOTAL(total_amount), COUNT(*), COUNT(total_amount), MAX(total_amount)
+        FROM sales_history
+        GROUP BY 1, 2
+    """)
+    cursor.execute("SELECT COUNT(*) FROM sales_daily_rollup")
+    print(f"✓ Backfilled sales_daily_rollup: {cursor.fetchone()[0]} product-day rows")
+
+def install_triggers(db_name=DB_NAME):
     """Install SQLite triggers to keep database attributes updated automatically."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
     
     try:
         # Drop existing triggers (if any) to avoid conflicts
         triggers = [
+            'sync_product_derived_columns',
             'update_product_total_value',
             'update_product_updated_date_on_stock_change',
             'update_product_updated_date_on_price_change',
             'update_sales_history_timestamp'
         ]
+        triggers += [
+            f"bump_{table}_version_on_{event.lower()}"
+            for table in VERSIONED_TABLES
+            for event in ('INSERT', 'UPDATE', 'DELETE')
+        ]
+        triggers += [f"bump_catalog_version_on_{event}" for event in ('insert', 'rename', 'delete')]
+        triggers += ['rollup_sales_on_insert', 'rollup_sales_on_update', 'rollup_sales_on_delete']
         
         for trigger in triggers:
             cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
         
         print("✓ Dropped old triggers")
         
-        # 1. Auto-calculate total_value = unit_price * current_stock when either changes
+        # 1. Keep total_value = unit_price * current_stock and updated_date in
+        #    step with stock/price changes. The app's write paths (restock,
+        #    sales ingestion, price edits) set both in the same UPDATE, so this
+        #    fallback only fires for writers that left total_value stale or
+        #    did not bump updated_date (every stock/price write still sets it
+        #    to now, as before), and then rewrites the row once (by rowid) instead
+        #    of running a nested UPDATE per column.
         cursor.execute("""
-        CREATE TRIGGER update_product_total_value
+        CREATE TRIGGER sync_product_derived_columns
         AFTER UPDATE OF current_stock, unit_price ON products
         FOR EACH ROW
+        WHEN NEW.total_value IS NOT NEW.unit_price * NEW.current_stock
+          OR (NEW.updated_date IS OLD.updated_date AND NEW.updated_date IS NOT datetime('now'))
         BEGIN
             UPDATE products
-            SET total_value = NEW.unit_price * NEW.current_stock
-            WHERE product_id = NEW.product_id;
+            SET total_value = NEW.unit_price * NEW.current_stock,
+                updated_date = datetime('now')
+            WHERE rowid = NEW.rowid;
         END;
         """)
-        print("✓ Created trigger: update_product_total_value")
+        print("✓ Created trigger: sync_product_derived_columns")
         
-        # 2. Auto-update updated_date when stock changes (restock happens)
+        # 2. Set timestamp on sales_history inserts and updates
         cursor.execute("""
-        CREATE TRIGGER update_product_updated_date_on_stock_change
-        AFTER UPDATE OF current_stock ON products
+        CREATE TRIGGER update_sales_history_timestamp
+        AFTER INSERT ON sales_history
         FOR EACH ROW
         BEGIN
-            UPDATE products
-            SET updated_date = datetime('now')
-            WHERE product_id = NEW.product_id;
+            UPDATE sales_history
+            SET sale_date = CASE WHEN NEW.sale_date IS NULL THEN datetime('now') ELSE NEW.sale_date END
+            WHERE sale_id = NEW.sale_id;
         END;
         """)
-        print("✓ Created trigger: update_product_updated_date_on_stock_change")
+        print("✓ Created trigger: update_sales_history_timestamp")
         
-        # 3. Auto-update updated_date when price changes
+        # 3. Change counters: bump a per-table version on every write so readers
+        #    (e.g. the LLM context cache in analytics.py) can tell if data changed
         cursor.execute("""
-        CREATE TRIGGER update_product_updated_date_on_price_change
-        AFTER UPDATE OF unit_price ON products
+        CREATE TABLE IF NOT EXISTS data_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        for table in VERSIONED_TABLES:
+            cursor.execute("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, 0)", (table,))
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                trigger = f"bump_{table}_version_on_{event.lower()}"
+                cursor.execute(f"""
+                CREATE TRIGGER {trigger}
+                AFTER {event} ON {table}
+                FOR EACH ROW
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+                END;
+                """)
+        print(f"✓ Created change-counter triggers for: {', '.join(VERSIONED_TABLES)}")
+        
+        # 4. Catalog counter: only bumped when products are added, removed or
+        #    renamed, so name/SKU search indexes are not rebuilt on every sale
+        cursor.execute("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('catalog', 0)")
+        product_columns = [row[1] for row in cursor.execute("PRAGMA table_info(products)")]
+        catalog_columns = [c for c in CATALOG_COLUMNS if c in product_columns]
+        bump_catalog = "UPDATE data_versions SET version = version + 1 WHERE table_name = 'catalog';"
+        cursor.execute(f"CREATE TRIGGER bump_catalog_version_on_insert AFTER INSERT ON products BEGIN {bump_catalog} END;")
+        cursor.execute(f"CREATE TRIGGER bump_catalog_version_on_delete AFTER DELETE ON products BEGIN {bump_catalog} END;")
+        cursor.execute(f"""
+        CREATE TRIGGER bump_catalog_version_on_rename
+        AFTER UPDATE OF {', '.join(catalog_columns)} ON products
         FOR EACH ROW
         BEGIN
-            UPDATE products
-            SET updated_date = datetime('now')
-            WHERE product_id = NEW.product_id;
+            {bump_catalog}
         END;
         """)
-        print("✓ Created trigger: update_product_updated_date_on_price_change")
+        print(f"✓ Created catalog-counter triggers on: {', '.join(catalog_columns)}")
         
-        # 4. Set timestamp on sales_history inserts and updates
-        cursor.execute("""
-        CREATE TRIGGER update_sales_history_timestamp
+        # 5. Daily sales rollup (product x day), kept in step with sales_history
+        #    so dashboards aggregate O(days x products) rows instead of every sale
+        cursor.execute(SALES_ROLLUP_TABLE)
+        cursor.execute(f"""
+        CREATE TRIGGER rollup_sales_on_insert
         AFTER INSERT ON sales_history
         FOR EACH ROW
         BEGIN
-            UPDATE sales_history
-            SET sale_date = CASE WHEN NEW.sale_date IS NULL THEN datetime('now') ELSE NEW.sale_date END
-            WHERE sale_id = NEW.sale_id;
+            {_rollup_add('NEW')}
         END;
         """)
-        print("✓ Created trigger: update_sales_history_timestamp")
+        cursor.execute(f"""
+        CREATE TRIGGER rollup_sales_on_update
+        AFTER UPDATE OF product_id, quantity_sold, total_amount, sale_date ON sales_history
+        FOR EACH ROW
+        WHEN OLD.product_id IS NOT NEW.product_id
+          OR OLD.quantity_sold IS NOT NEW.quantity_sold
+          OR OLD.total_amount IS NOT NEW.total_amount
+          OR {_rollup_day('OLD')} IS NOT {_rollup_day('NEW')}
+        BEGIN
+            {_rollup_remove('OLD')}
+            {_rollup_add('NEW')}
+        END;
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER rollup_sales_on_delete
+        AFTER DELETE ON sales_history
+        FOR EACH ROW
+        BEGIN
+            {_rollup_remove('OLD')}
+        END;
+        """)
+        print("✓ Created triggers: rollup_sales_on_insert / update / delete")
+        backfill_sales_rollup(cursor)
         
         conn.commit()
         print("\n✅ All triggers installed successfully!")
@@ -0,0 +1,219 @@
+# intent_router.py (Fast path for questions SQL can answer exactly)
+import re
+import threading
+import time
+
+from analytics import get_low_stock_alerts, get_top_sellers, get_product_details_by_id
+
+# Both classifiers are optional: chatbot_nlp needs spaCy installed and
+# chatbot_logic needs scikit-learn. The router uses whatever is available and
+# simply sends everything to the LLM if neither is.
+try:
+    from chatbot_logic import classify_intent, extract_products
+except ImportError:
+    classify_intent = None
+    extract_products = None
+
+try:
+    from chatbot_nlp import match_keyword_intent
+except ImportError:
+    match_keyword_intent = None
+
+# Customer names and time windows (context_retrieval needs scikit-learn too)
+try:
+    from context_retrieval import find_customers, find_time_window, get_customer_names
+except ImportError:
+    find_customers = find_time_window = get_customer_names = None
+
+# Intent names from both classifiers mapped onto what the router can answer
+TFIDF_INTENTS = {
+    "check_low_stock": "low_stock",
+    "get_product_details": "product_stock",
+    "greet": "greet",
+}
+KEYWORD_INTENTS = {
+    "get_low_stock_alerts": "low_stock",
+    "get_price": "product_price",
+    "get_stock_status": "product_stock",
+    "get_top_sellers": "top_sellers",
+    "greet": "greet",
+}
+
+# TF-IDF similarity at which the router trusts that classifier on its own
+TFIDF_CONFIDENT = 0.6
+PRICE_NOT_SET_NOTE = "\n\n📝 **Note:** Price not yet set. Ask owner to update in Owner Tools > Edit Product Prices."
+MAX_LOCAL_WORDS = 12
+MAX_LIST_ITEMS = 10
+
+# Phrases that signal an open-ended question the LLM should handle
+OPEN_ENDED = re.compile(
+    r"\b(why|should|explain|compare|suggest|recommend|predict|forecast|analy[sz]e|trend|insight|plan|strategy|what if)\b"
+)
+# Questions about sales, buyers and orders ("how many keyboards were sold")
+# mention a product and "how many" but are not stock questions. Top sellers
+# are answered from sales, so they are exempt.
+SALES_WORDS = re.compile(
+    r"\b(sales?|sold|sell(?:s|ing)?|buy(?:s|ing)?|bought|purchas\w*|revenue|orders?|customers?|buyers?|clients?)\b"
+)
+# Restock dates and costs, which the stock and low-stock answers do not give
+RESTOCK_DETAILS = re.compile(
+    r"\brestock\w*\s+(?:date|time|day|cost|history)|\bwhen\b.*\brestock|\blast restock"
+    r"|\b(?:cost|price|spend|budget)\b.*\brestock"
+)
+
+
+# --- Hit-rate metrics (process-wide, shared by all sessions) ---
+
+_stats_lock = threading.Lock()
+_stats = {"queries": 0, "local_answers": 0, "classify_seconds": 0.0, "max_classify_seconds": 0.0, "by_intent": {}}
+
+def _record(intent, answered_locally, classify_seconds):
+    with _stats_lock:
+        _stats["queries"] += 1
+        _stats["classify_seconds"] += classify_seconds
+        _stats["max_classify_seconds"] = max(_stats["max_classify_seconds"], classify_seconds)
+        if answered_locally:
+            _stats["local_answers"] += 1
+            _stats["by_intent"][intent] = _stats["by_intent"].get(intent, 0) + 1
+
+def get_router_stats():
+    """Returns the router's hit-rate and classification latency metrics."""
+    with _stats_lock:
+        queries = _stats["queries"]
+        return {
+            "queries": queries,
+            "local_answers": _stats["local_answers"],
+            "llm_fallthroughs": queries - _stats["local_answers"],
+            "hit_rate": _stats["local_answers"] / queries if queries else 0.0,
+            "avg_classify_ms": 1000 * _stats["classify_seconds"] / queries if queries else 0.0,
+            "max_classify_ms": 1000 * _stats["max_classify_seconds"],
+            "by_intent": dict(_stats["by_intent"]),
+        }
+
+def reset_router_stats():
+    with _stats_lock:
+        _stats.update(queries=0, local_answers=0, classify_seconds=0.0, max_classify_seconds=0.0, by_intent={})
+
+
+# --- Classification ---
+
+def _mentions_customer_or_period(text):
+    """True for questions about a time window ("this month") or a known customer ("raj")."""
+    if find_time_window is None:
+        return False
+    return find_time_window(text) is not None or bool(find_customers(text, get_customer_names()))
+
+def classify_query(user_query):
+    """Returns (router_intent, confidence) or (None, 0.0) for questions meant for the LLM."""
+    text = user_query.lower().strip()
+    if not text or OPEN_ENDED.search(text) or len(text.split()) > MAX_LOCAL_WORDS:
+        return None, 0.0
+    if RESTOCK_DETAILS.search(text) or _mentions_customer_or_period(text):
+        return None, 0.0
+
+    keyword_intent = KEYWORD_INTENTS.get(match_keyword_intent(text)) if match_keyword_intent else None
+    tfidf_intent, score = None, 0.0
+    if classify_intent:
+        intent, score = classify_intent(text)
+        tfidf_intent = TFIDF_INTENTS.get(intent)
+
+    if SALES_WORDS.search(text) and keyword_intent != "top_sellers":
+        return None, 0.0
+
+    if keyword_intent and tfidf_intent:
+        if keyword_intent == tfidf_intent:
+            return keyword_intent, max(score, 0.9)
+        # Price and low-stock questions look like product-detail questions
+        # to the TF-IDF model ("what is low on stock")
+        if keyword_intent in ("product_price", "low_stock") and tfidf_intent == "product_stock":
+            return keyword_intent, max(score, 0.8)
+    if tfidf_intent and score >= TFIDF_CONFIDENT:
+        # A confident TF-IDF match that the keyword rules contradict is ambiguous
+        return (tfidf_intent, score) if not keyword_intent else (None, 0.0)
+    if keyword_intent:
+        # Keyword rules win over a weak TF-IDF match. They are trusted for
+        # product lookups (a product must still be found below), list
+        # questions and short greetings
+        if keyword_intent != "greet" or len(text.split()) <= 3:
+            return keyword_intent, 0.7
+    return None, 0.0
+
+
+# --- Answers straight from SQL ---
+
+def _answer_low_stock(user_query):
+    if extract_products is not None and extract_products(user_query):
+        # "is the keyboard low on stock?" is about that product, not the list
+        return _answer_product_stock(user_query)
+    low_stock_df = get_low_stock_alerts()
+    if low_stock_df.empty:
+        return "All products are well-stocked right now."
+    items = [
+        f"{row.product_name} ({row.current_stock}/{row.reorder_point})"
+        for row in low_stock_df.head(MAX_LIST_ITEMS).itertuples()
+    ]
+    more = len(low_stock_df) - len(items)
+    text = f"{len(low_stock_df)} items are below reorder point: " + ", ".join(items)
+    return text + (f", and {more} more." if more > 0 else ".")
+
+def _answer_top_sellers(user_query):
+    top_sellers_df = get_top_sellers()
+    if top_sellers_df.empty:
+        # No recent sales: the LLM can still answer from the full history
+        return None
+    items = [f"{row.product_name} ({int(row.total_sales)} units)" for row in top_sellers_df.itertuples()]
+    return "Top sellers in the last 30 days: " + ", ".join(items) + "."
+
+def _product_details(user_query):
+    """Details of the one product the question names, or None.
+
+    Several matches (two products asked about, or one name shared by
+    several product IDs at different prices) go to the LLM instead of
+    being answered for an arbitrary one of them.
+    """
+    if extract_products is None:
+        return None
+    products = extract_products(user_query)
+    return get_product_details_by_id(products[0]["product_id"]) if len(products) == 1 else None
+
+def _price_note(details):
+    return PRICE_NOT_SET_NOTE if not details['Price'] else ""
+
+def _answer_product_stock(user_query):
+    details = _product_details(user_query)
+    if details is None:
+        return None
+    text = f"{details['ProductName']}: {details['StockLevel']} units in stock at Rs. {details['Price']:,.2f} each."
+    if details['StockLevel'] < details['ReorderLevel']:
+        text += f" That is below the reorder point of {details['ReorderLevel']}."
+    return text + _price_note(details)
+
+def _answer_product_price(user_query):
+    details = _product_details(user_query)
+    if details is None:
+        return None
+    return f"{details['ProductName']} costs Rs. {details['Price']:,.2f} per unit." + _price_note(details)
+
+def _answer_greet(user_query):
+    return "Hello! How can I help you with your inventory today?"
+
+ANSWERS = {
+    "low_stock": _answer_low_stock,
+    "top_sellers": _answer_top_sellers,
+    "product_stock": _answer_product_stock,
+    "product_price": _answer_product_price,
+    "greet": _answer_greet,
+}
+
+def answer_locally(user_query):
+    """Answers deterministic questions straight from the database.
+
+    Returns the answer text, or None when the question should go to the LLM.
+    """
+    start = time.perf_counter()
+    intent, confidence = classify_query(user_query)
+    classify_seconds = time.perf_counter() - start
+
+    answer = ANSWERS[intent](user_query) if intent else None
+    _record(intent, answer is not None, classify_seconds)
+    return answer
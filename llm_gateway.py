@@ -0,0 +1,437 @@
+# llm_gateway.py (Shared, deadline-bound access to the LLM)
+"""
+Runs LLM calls on a small thread pool shared by every Streamlit session.
+
+* Deadlines: every request has an overall deadline; callers get
+  LLMTimeoutError instead of a rerun that hangs on a slow API call.
+* Retries: rate-limit, overload and network errors are retried with
+  jittered exponential backoff while the deadline allows.
+* Coalescing: identical prompts that are already in flight share one call,
+  so two users asking the same question cost one request.
+* Streaming: stream() yields the response in chunks as the model produces
+  them, so the UI can show the first words long before the last. Streams
+  are coalesced too: a caller joining an in-flight stream gets the chunks
+  produced so far, then the rest as they arrive.
+
+Models are small adapters with generate(prompt, timeout) -> text and
+optionally stream(prompt, timeout) -> iterator of text chunks:
+GeminiModel wraps google-generativeai, StubModel simulates latency and
+failures in-process, and HTTPModel talks to the stub server for offline
+latency / concurrency measurements:
+
+    python llm_gateway.py --serve-stub --port 8765 --latency 0.8
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 30.0     # seconds for the whole request, retries included
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.5        # seconds before the first retry, doubled each time
+
+# google.api_core exception names (not imported, so the gateway and its
+# stubs work without the Gemini SDK installed) that are worth retrying
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "DeadlineExceeded", "RetryableLLMError",
+}
+
+
+class LLMTimeoutError(TimeoutError):
+    """The request did not finish before its deadline."""
+
+
+class RetryableLLMError(Exception):
+    """A transient model failure (rate limit, overload, dropped connection)."""
+
+
+def is_retryable(error):
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+# --- Model adapters ---
+
+class GeminiModel:
+    """Adapter for a google.generativeai GenerativeModel."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def generate(self, prompt, timeout):
+        try:
+            response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        except TypeError:
+            # Older SDKs have no per-request options; the gateway deadline still applies
+            response = self.model.generate_content(prompt)
+        return response.text
+
+    def stream(self, prompt, timeout):
+        try:
+            response = self.model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+        except TypeError:
+            response = self.model.generate_content(prompt, stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # A chunk without text parts (e.g. only safety ratings)
+                continue
+            if text:
+                yield text
+
+
+class StubModel:
+    """In-process fake model: fixed latency plus jitter, optional random failures.
+
+    When streaming, the first chunk arrives after first_chunk_latency and the
+    remaining words are spread over the rest of the latency, like a real
+    model that takes as long overall but starts answering early.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.0, failure_rate=0.0, respond=None, first_chunk_latency=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.respond = respond or (lambda prompt: f"Stub answer to: {prompt[-80:]}")
+        self.first_chunk_latency = latency * 0.2 if first_chunk_latency is None else first_chunk_latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout):
+        with self._lock:
+            self.calls += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"stub model timed out after {timeout:.2f}s")
+        time.sleep(delay)
+        if random.random() < self.failure_rate:
+            raise RetryableLLMError("stub model overloaded")
+        return self.respond(prompt)
+
+    def stream(self, prompt, timeout):
+        with self._lock:
+            self.calls += 1
+        deadline = time.monotonic() + timeout
+        time.sleep(min(self.first_chunk_latency, timeout))
+        if random.random() < self.failure_rate:
+            raise RetryableLLMError("stub model overloaded")
+        words = self.respond(prompt).split(" ")
+        gap = max(self.latency + random.uniform(0, self.jitter) - self.first_chunk_latency, 0) / max(len(words) - 1, 1)
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(gap)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"stub model timed out after {timeout:.2f}s")
+            yield word if index == 0 else " " + word
+
+
+class HTTPModel:
+    """Client for the stub server.
+
+    POST {"prompt": ...} -> {"text": ...}; with "stream": true the server
+    answers with one JSON line {"text": chunk} per chunk instead.
+    """
+
+    def __init__(self, url):
+        self.url = url
+
+    def _open(self, payload, timeout):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise RetryableLLMError(f"HTTP {e.code}") from e
+            raise
+        except urllib.error.URLError as e:
+            raise RetryableLLMError(str(e.reason)) from e
+
+    def generate(self, prompt, timeout):
+        with self._open({"prompt": prompt}, timeout) as response:
+            return json.loads(response.read())["text"]
+
+    def stream(self, prompt, timeout):
+        with self._open({"prompt": prompt, "stream": True}, timeout) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)["text"]
+
+
+# --- Gateway ---
+
+class _SharedStream:
+    """The chunks of one in-flight streamed call, readable by any number of callers."""
+
+    def __init__(self):
+        self.chunks = []
+        self.finished = False
+        self.error = None
+        self.readers = 0
+        self.cancelled = threading.Event()
+        self._changed = threading.Condition()
+
+    def put(self, chunk):
+        with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    def close(self, error=None):
+        with self._changed:
+            self.finished = True
+            self.error = error
+            self._changed.notify_all()
+
+    def read(self, deadline, timeout):
+        """Yields every chunk from the first; raises LLMTimeoutError if the deadline passes while waiting."""
+        index = 0
+        while True:
+            with self._changed:
+                while index >= len(self.chunks) and not self.finished:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise LLMTimeoutError(f"No response from the model within {timeout:.0f}s")
+                    self._changed.wait(remaining)
+                if index < len(self.chunks):
+                    chunk = self.chunks[index]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            index += 1
+            yield chunk
+
+
+class LLMGateway:
+    """Thread-pool executor for model calls with deadlines, retries and coalescing."""
+
+    def __init__(self, model, max_workers=MAX_WORKERS, timeout=DEFAULT_TIMEOUT,
+                 retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+        self.model = model
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="llm")
+        self._inflight = {}   # prompt -> Future of the call serving it
+        self._streams = {}    # prompt -> _SharedStream of the streamed call serving it
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "model_calls": 0, "coalesced": 0, "retries": 0,
+                       "timeouts": 0, "errors": 0, "call_seconds": 0.0,
+                       "streams": 0, "first_chunk_seconds": 0.0}
+
+    def submit(self, prompt, timeout=None):
+        """Starts (or joins) the call for a prompt and returns its Future."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self._lock:
+            self._stats["requests"] += 1
+            future = self._inflight.get(prompt)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future
+            future = self._executor.submit(self._call, prompt, deadline)
+            self._inflight[prompt] = future
+        future.add_done_callback(lambda done: self._forget(prompt, done))
+        return future
+
+    def generate(self, prompt, timeout=None):
+        """Blocking call: returns the response text or raises LLMTimeoutError."""
+        timeout = timeout or self.timeout
+        try:
+            return self.submit(prompt, timeout).result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            self._count("timeouts")
+            raise LLMTimeoutError(f"No response from the model within {timeout:.0f}s")
+
+    async def agenerate(self, prompt, timeout=None):
+        """asyncio version of generate()."""
+        timeout = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.submit(prompt, timeout)), timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise LLMTimeoutError(f"No response from the model within {timeout:.0f}s")
+
+    def stream(self, prompt, timeout=None):
+        """Yields the response text in chunks as the model produces them.
+
+        Identical prompts already streaming share that call; each caller
+        gets every chunk from the first. A transient failure is only
+        retried before the first chunk, so no text is ever repeated.
+        Raises LLMTimeoutError if the deadline passes while waiting for the
+        next chunk.
+        """
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._stats["requests"] += 1
+            shared = self._streams.get(prompt)
+            if shared is not None and not shared.cancelled.is_set():
+                self._stats["coalesced"] += 1
+            else:
+                shared = self._streams[prompt] = _SharedStream()
+                self._executor.submit(self._produce_stream, prompt, deadline, shared)
+            shared.readers += 1
+        try:
+            yield from shared.read(deadline, timeout)
+        except LLMTimeoutError:
+            self._count("timeouts")
+            raise
+        finally:
+            with self._lock:
+                shared.readers -= 1
+                if not shared.readers and not shared.finished:
+                    # Every caller gave up early: tell the worker to stop
+                    shared.cancelled.set()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._inflight) + len(self._streams)
+        stats["avg_call_ms"] = 1000 * stats["call_seconds"] / stats["model_calls"] if stats["model_calls"] else 0.0
+        stats["avg_first_chunk_ms"] = 1000 * stats["first_chunk_seconds"] / stats["streams"] if stats["streams"] else 0.0
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, prompt, future):
+        with self._lock:
+            if self._inflight.get(prompt) is future:
+                del self._inflight[prompt]
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _call(self, prompt, deadline):
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError("Deadline passed before the model could be called")
+            self._count("model_calls")
+            start = time.monotonic()
+            try:
+                return self.model.generate(prompt, timeout=remaining)
+            except Exception as e:
+                backoff = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                if not is_retryable(e) or attempt == self.retries or time.monotonic() + backoff >= deadline:
+                    self._count("errors")
+                    raise
+                self._count("retries")
+                time.sleep(backoff)
+            finally:
+                self._count("call_seconds", time.monotonic() - start)
+
+    def _produce_stream(self, prompt, deadline, shared):
+        try:
+            shared.close(self._run_stream(prompt, deadline, shared))
+        except Exception as e:
+            shared.close(e)
+        finally:
+            with self._lock:
+                if self._streams.get(prompt) is shared:
+                    del self._streams[prompt]
+
+    def _run_stream(self, prompt, deadline, shared):
+        """Feeds the model's chunks into shared; returns the error to end the stream with, if any."""
+        model_stream = getattr(self.model, "stream", None)
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if shared.cancelled.is_set():
+                return None
+            if remaining <= 0:
+                return LLMTimeoutError("Deadline passed before the model could be called")
+            self._count("model_calls")
+            start = time.monotonic()
+            started = False
+            try:
+                pieces = model_stream(prompt, timeout=remaining) if model_stream else [self.model.generate(prompt, timeout=remaining)]
+                for piece in pieces:
+                    if not started:
+                        started = True
+                        self._count("streams")
+                        self._count("first_chunk_seconds", time.monotonic() - start)
+                    shared.put(piece)
+                    if shared.cancelled.is_set():
+                        return None
+                return None
+            except Exception as e:
+                backoff = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                if started or not is_retryable(e) or attempt == self.retries or time.monotonic() + backoff >= deadline:
+                    self._count("errors")
+                    return e
+                self._count("retries")
+                time.sleep(backoff)
+            finally:
+                self._count("call_seconds", time.monotonic() - start)
+        return None
+
+
+# --- Stub model server ---
+
+def serve_stub(port=8765, latency=0.5, jitter=0.0, failure_rate=0.0, first_chunk_latency=None, respond=None):
+    """Runs a local HTTP server that answers like a (slow, flaky) LLM."""
+    model = StubModel(latency, jitter, respond=respond, first_chunk_latency=first_chunk_latency)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if random.random() < failure_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if body.get("stream"):
+                # One JSON line per chunk, flushed as soon as it is produced
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for chunk in model.stream(body.get("prompt", ""), timeout=float("inf")):
+                    self.wfile.write(json.dumps({"text": chunk}).encode() + b"\n")
+                    self.wfile.flush()
+                return
+            text = model.generate(body.get("prompt", ""), timeout=float("inf"))
+            payload = json.dumps({"text": text}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM gateway utilities.")
+    parser.add_argument("--serve-stub", action="store_true", help="run the stub model server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--first-chunk-latency", type=float, default=None,
+                        help="seconds before the first streamed chunk (default 20%% of --latency)")
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        server = serve_stub(args.port, args.latency, args.jitter, args.failure_rate, args.first_chunk_latency)
+        print(f"🧪 Stub model listening on http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        parser.print_help()
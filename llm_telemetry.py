@@ -0,0 +1,290 @@
+# llm_telemetry.py (Prompt-size and latency metrics for chat turns)
+"""
+Records what every chat turn cost: prompt size per section, response size,
+latency and whether the LLM was needed at all.
+
+app.py opens an LLMCallRecord per question, hands it the prompt sections
+(system prompt, products, sales, customers, conversation, question) and
+finishes it with the route the answer took:
+
+    local    answered from SQL by intent_router.py, no LLM call
+    cache    served from response_cache.py, no LLM call
+    llm      streamed from Gemini
+    timeout / error
+
+Sizes are in characters and estimated tokens (context_retrieval's
+chars/4 estimate, no API call). Records go to the llm_calls table in
+app_state.db, or to a JSONL file when LLM_TELEMETRY is set to a path
+ending in .jsonl (LLM_TELEMETRY=off disables them).
+
+Report:
+    python llm_telemetry.py
+    python llm_telemetry.py --source metrics.jsonl --days 7 --input-price 0.075 --output-price 0.3
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from context_retrieval import CHARS_PER_TOKEN, estimate_tokens
+from database import STATE_DB, get_db_connection
+
+METRICS_TABLE = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    session_id TEXT,
+    route TEXT NOT NULL,
+    question_chars INTEGER,
+    prompt_chars INTEGER,
+    prompt_tokens INTEGER,
+    response_chars INTEGER,
+    response_tokens INTEGER,
+    latency_ms REAL,
+    first_chunk_ms REAL,
+    sections TEXT,
+    error TEXT
+)
+"""
+RECORD_FIELDS = ("created_at", "session_id", "route", "question_chars", "prompt_chars", "prompt_tokens",
+                 "response_chars", "response_tokens", "latency_ms", "first_chunk_ms", "sections", "error")
+
+_SECTION_HEADER = re.compile(r"^=== (.+?) ===$", re.MULTILINE)
+
+def section_category(title):
+    """Maps a context section title ("RECENT SALES ...") to a report category."""
+    title = title.upper()
+    if "CUSTOMER" in title:
+        return "customers"
+    if "SALES" in title or "REVENUE" in title or "PAYMENT" in title:
+        return "sales"
+    if "PRODUCT" in title or "INVENTORY" in title:
+        return "products"
+    return "other_data"
+
+def split_sections(context, default="other_data"):
+    """Splits an inventory context on its "=== TITLE ===" headers into [(category, text)].
+
+    Text before the first header (or a context without headers, like the
+    low-stock table) is attributed to `default`.
+    """
+    sections = []
+    headers = list(_SECTION_HEADER.finditer(context))
+    lead = context[:headers[0].start()] if headers else context
+    if lead.strip():
+        sections.append((default, lead))
+    for index, header in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(context)
+        sections.append((section_category(header.group(1)), context[header.start():end]))
+    return sections
+
+
+# --- Sinks ---
+
+class SQLiteSink:
+    """Appends records to the llm_calls table."""
+
+    def __init__(self, db_name=STATE_DB):
+        self.db_name = db_name
+        with get_db_connection(self.db_name) as conn:
+            conn.execute(METRICS_TABLE)
+
+    def write(self, record):
+        row = dict(record, sections=json.dumps(record["sections"]))
+        with get_db_connection(self.db_name) as conn:
+            conn.execute(
+                f"INSERT INTO llm_calls ({', '.join(RECORD_FIELDS)}) VALUES ({', '.join('?' for _ in RECORD_FIELDS)})",
+                [row[field] for field in RECORD_FIELDS]
+            )
+
+    def read(self, since=0.0):
+        with get_db_connection(self.db_name) as conn:
+            conn.execute(METRICS_TABLE)
+            rows = conn.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)} FROM llm_calls WHERE created_at >= ? ORDER BY created_at", (since,)
+            ).fetchall()
+        records = [dict(zip(RECORD_FIELDS, row)) for row in rows]
+        for record in records:
+            record["sections"] = json.loads(record["sections"] or "{}")
+        return records
+
+
+class JSONLSink:
+    """Appends one JSON object per record to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def read(self, since=0.0):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [record for record in records if record["created_at"] >= since]
+
+
+def open_sink(target):
+    """SQLiteSink for a .db path, JSONLSink for a .jsonl path."""
+    return JSONLSink(target) if target.endswith(".jsonl") else SQLiteSink(target)
+
+_sink = None
+_sink_lock = threading.Lock()
+
+def get_telemetry_sink():
+    """Returns the process-wide sink chosen by LLM_TELEMETRY (None when turned off)."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            target = os.environ.get("LLM_TELEMETRY", STATE_DB)
+            _sink = False if target == "off" else open_sink(target)
+        return _sink or None
+
+
+# --- Recording ---
+
+class LLMCallRecord:
+    """Measurements for one chat turn, written to the sink by finish()."""
+
+    def __init__(self, question, session_id=None, sink=None):
+        self.sink = sink if sink is not None else get_telemetry_sink()
+        self.start = time.perf_counter()
+        self.first_chunk_ms = None
+        self.finished = False
+        self.record = {
+            "created_at": time.time(), "session_id": session_id, "route": None,
+            "question_chars": len(question), "prompt_chars": 0, "prompt_tokens": 0,
+            "response_chars": 0, "response_tokens": 0, "latency_ms": None,
+            "first_chunk_ms": None, "sections": {}, "error": None,
+        }
+
+    def set_prompt(self, sections, full_prompt):
+        """sections: [(name, text)] making up full_prompt; the rest is counted as "template"."""
+        sizes = defaultdict(int)
+        for name, text in sections:
+            sizes[name] += len(text)
+        sizes["template"] = max(len(full_prompt) - sum(sizes.values()), 0)
+        # Tokens are split at the sections' character offsets, so they add up to prompt_tokens
+        # instead of rounding up once per section
+        def tokens_up_to(chars):
+            return chars // CHARS_PER_TOKEN + 1 if chars else 0
+        self.record["sections"] = {}
+        offset = 0
+        for name, chars in sizes.items():
+            self.record["sections"][name] = {
+                "chars": chars, "tokens": tokens_up_to(offset + chars) - tokens_up_to(offset),
+            }
+            offset += chars
+        self.record["prompt_chars"] = len(full_prompt)
+        self.record["prompt_tokens"] = estimate_tokens(full_prompt)
+
+    def mark_first_chunk(self):
+        if self.first_chunk_ms is None:
+            self.first_chunk_ms = (time.perf_counter() - self.start) * 1000
+
+    def finish(self, route, response="", error=None):
+        """Completes the record; only the first call counts."""
+        if self.finished:
+            return
+        self.finished = True
+        self.record.update(
+            route=route,
+            response_chars=len(response or ""),
+            response_tokens=estimate_tokens(response) if response else 0,
+            latency_ms=(time.perf_counter() - self.start) * 1000,
+            first_chunk_ms=self.first_chunk_ms,
+            error=str(error) if error else None,
+        )
+        if self.sink is None:
+            return
+        try:
+            self.sink.write(self.record)
+        except Exception as e:
+            # Metrics must never break the chat
+            print(f"⚠️ Could not record LLM telemetry: {e}")
+
+
+# --- Report ---
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+def build_report(records, input_price=None, output_price=None):
+    """Aggregates records into the text report printed by the CLI."""
+    if not records:
+        return "No LLM telemetry recorded yet."
+    lines = []
+    by_route = defaultdict(list)
+    for record in records:
+        by_route[record["route"]].append(record)
+
+    lines.append(f"Chat turns: {len(records)}")
+    for route in ("local", "cache", "llm", "timeout", "error"):
+        if by_route.get(route):
+            latencies = [r["latency_ms"] for r in by_route[route] if r["latency_ms"] is not None]
+            lines.append(f"  {route:<8} {len(by_route[route]):>6} ({len(by_route[route]) / len(records):6.1%})  "
+                         f"latency p50 {_percentile(latencies, 0.5):8.0f} ms, p95 {_percentile(latencies, 0.95):8.0f} ms")
+    llm_bound = len(by_route["cache"]) + len(by_route["llm"]) + len(by_route["timeout"]) + len(by_route["error"])
+    if llm_bound:
+        lines.append(f"Response cache hit rate (LLM-bound questions): {len(by_route['cache']) / llm_bound:.1%}")
+
+    prompts = [r for r in records if r["prompt_chars"]]
+    if prompts:
+        prompt_tokens = [r["prompt_tokens"] for r in prompts]
+        response_tokens = [r["response_tokens"] for r in by_route["llm"]]
+        first_chunks = [r["first_chunk_ms"] for r in by_route["llm"] if r["first_chunk_ms"] is not None]
+        lines.append("")
+        lines.append(f"Prompts sent: {len(prompts)}, tokens avg {statistics.mean(prompt_tokens):,.0f}, "
+                     f"p95 {_percentile(prompt_tokens, 0.95):,}, max {max(prompt_tokens):,}")
+        if response_tokens:
+            lines.append(f"Response tokens avg {statistics.mean(response_tokens):,.0f}, total {sum(response_tokens):,}")
+        if first_chunks:
+            lines.append(f"First chunk after avg {statistics.mean(first_chunks):,.0f} ms")
+
+        totals = defaultdict(lambda: [0, 0])
+        for record in prompts:
+            for name, size in record["sections"].items():
+                totals[name][0] += size["chars"]
+                totals[name][1] += size["tokens"]
+        all_tokens = sum(tokens for _, tokens in totals.values()) or 1
+        lines.append("")
+        lines.append("Prompt tokens by section (avg per prompt):")
+        for name, (chars, tokens) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {name:<14} {chars / len(prompts):>9,.0f} chars {tokens / len(prompts):>8,.0f} tokens "
+                         f"{tokens / all_tokens:6.1%}")
+
+        if input_price is not None or output_price is not None:
+            cost = (sum(prompt_tokens) * (input_price or 0) + sum(response_tokens) * (output_price or 0)) / 1_000_000
+            lines.append("")
+            lines.append(f"Estimated cost: {cost:,.4f} (per chat turn {cost / len(records):,.6f})")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Report prompt sizes, latency and cache hits of chat turns.")
+    default_source = os.environ.get("LLM_TELEMETRY", STATE_DB)
+    parser.add_argument("--source", default=STATE_DB if default_source == "off" else default_source,
+                        help="app_state.db (default) or a .jsonl telemetry file")
+    parser.add_argument("--days", type=float, help="only the last N days")
+    parser.add_argument("--input-price", type=float, help="price per 1M prompt tokens")
+    parser.add_argument("--output-price", type=float, help="price per 1M response tokens")
+    args = parser.parse_args()
+
+    since = time.time() - args.days * 86400 if args.days else 0.0
+    records = open_sink(args.source).read(since)
+    print("=" * 60)
+    print(f"LLM TELEMETRY REPORT ({args.source})")
+    print("=" * 60)
+    print(build_report(records, args.input_price, args.output_price))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# product_matcher.py (Product-name entity extraction)
+import re
+import threading
+from collections import deque
+
+from database import get_db_connection
+from analytics import get_catalog_version
+
+# The matcher works on word tokens rather than characters: product names are
+# short word sequences, so a word-level automaton is ~10x smaller than a
+# character-level one and word boundaries come for free ("pen" never
+# matches inside "open").
+_TOKEN = re.compile(r"[0-9a-zऀ-ॿ]+")
+
+def normalize_token(token):
+    """Folds simple English plurals so 'keyboards' matches 'Keyboard'."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("es") and token[-3] in "sxz" or token.endswith(("ches", "shes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text):
+    return [normalize_token(token) for token in _TOKEN.findall(text.lower())]
+
+def product_aliases(product_name):
+    """Extra phrases that refer to a product: the name without its (qualifier)."""
+    short_name = re.sub(r"\s*\(.*?\)", "", product_name).strip()
+    return [short_name] if short_name and short_name.lower() != product_name.lower() else []
+
+
+class ProductMatcher:
+    """Aho-Corasick automaton over product names, SKUs, IDs and aliases.
+
+    Built once per catalog version; find() makes a single left-to-right pass
+    over the query's tokens and reports every product mentioned, preferring
+    the longest phrase where matches overlap.
+    """
+
+    def __init__(self, products):
+        # products: iterable of dicts with product_id, product_name and optional sku_code
+        self.products = list(products)
+        self._goto = [{}]     # state -> {token: next state}
+        self._fail = [0]      # state -> failure state
+        self._output = [[]]   # state -> [(phrase length, product index)]
+
+        for index, product in enumerate(self.products):
+            phrases = [product["product_name"], product["product_id"], product.get("sku_code")]
+            phrases += product_aliases(product["product_name"] or "")
+            for phrase in phrases:
+                if phrase:
+                    self._add(tokenize(phrase), index)
+        self._build_failure_links()
+
+    def _add(self, tokens, product_index):
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        entry = (len(tokens), product_index)
+        if entry not in self._output[state]:
+            self._output[state].append(entry)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Phrases ending at the fallback state also end here
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """Returns [(start_token, end_token, product)] for non-overlapping matches, longest first."""
+        matches = []
+        state = 0
+        for position, token in enumerate(tokenize(text)):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length, product_index in self._output[state]:
+                matches.append((position - length + 1, position + 1, product_index))
+
+        # Leftmost-longest: keep the longest phrase starting at each position
+        # and drop anything overlapping an already chosen phrase
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        chosen = []
+        taken_until = 0
+        chosen_span = None
+        for start, end, product_index in matches:
+            if (start, end) == chosen_span:
+                # Same phrase shared by several products (e.g. an alias)
+                chosen.append((start, end, self.products[product_index]))
+            elif start >= taken_until:
+                chosen.append((start, end, self.products[product_index]))
+                taken_until = end
+                chosen_span = (start, end)
+        return chosen
+
+    def extract(self, text):
+        """Returns the distinct products mentioned in the text, in order of appearance."""
+        seen = set()
+        products = []
+        for _, _, product in self.find(text):
+            if product["product_id"] not in seen:
+                seen.add(product["product_id"])
+                products.append(product)
+        return products
+
+
+_matcher_cache = {"version": None, "matcher": None}
+_matcher_lock = threading.Lock()
+
+def load_products(conn):
+    """Reads the fields the matcher indexes (sku_code only exists on newer schemas)."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+    select = ["product_id", "product_name"] + (["sku_code"] if "sku_code" in columns else [])
+    cursor = conn.execute(f"SELECT {', '.join(select)} FROM products")
+    return [dict(zip(select, row)) for row in cursor.fetchall()]
+
+def get_product_matcher():
+    """Returns the matcher for the current catalog, rebuilding it only after catalog changes."""
+    with get_db_connection() as conn:
+        version = get_catalog_version(conn)
+        with _matcher_lock:
+            if version is not None and _matcher_cache["version"] == version:
+                return _matcher_cache["matcher"]
+        matcher = ProductMatcher(load_products(conn))
+    with _matcher_lock:
+        _matcher_cache.update(version=version, matcher=matcher)
+    return matcher
@@ -0,0 +1,200 @@
+# product_search.py (Typo-tolerant product search)
+import threading
+import time
+from collections import Counter
+
+from database import get_db_connection
+from analytics import get_catalog_version, register_catalog_listener
+from product_matcher import load_products, product_aliases, tokenize
+
+DEFAULT_LIMIT = 5
+DEFAULT_TIME_BUDGET_MS = 20
+MIN_SCORE = 0.5
+
+def max_typos(token):
+    """Edit distance tolerated for a query word: none for short words, up to 2 for long ones."""
+    if len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 5 else 2
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def bigrams(word):
+    padded = f"^{word}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class ProductSearchIndex:
+    """In-memory fuzzy index over product names, IDs and SKU codes.
+
+    Product words go into an inverted index (word -> products) and a bigram
+    index (bigram -> words). A misspelt query word ("projecter") only has to
+    be compared with the few words that share enough bigrams with it
+    ("projector"), never the whole vocabulary. Products can be added and
+    removed incrementally; removed words stay in the bigram index but no
+    longer point at any product.
+    """
+
+    def __init__(self, products=()):
+        self.products = {}      # product_id -> product dict
+        self.words = {}         # product_id -> every indexed word
+        self.name_words = {}    # product_id -> words of the name without its (qualifier)
+        self.id_words = {}      # product_id -> words of the ID / SKU code
+        self.postings = {}      # word -> set of product_ids
+        self.gram_postings = {} # bigram -> set of words
+        for product in products:
+            self.add_product(product)
+
+    def add_product(self, product):
+        product_id = product["product_id"]
+        self.remove_product(product_id)
+        name = product.get("product_name") or ""
+        name_words = set(tokenize((product_aliases(name) or [name])[0]))
+        id_words = set(tokenize(product_id)) | set(tokenize(product.get("sku_code") or ""))
+        words = set(tokenize(name)) | name_words | id_words
+
+        self.products[product_id] = product
+        self.words[product_id] = words
+        self.name_words[product_id] = name_words
+        self.id_words[product_id] = id_words
+        for word in words:
+            if word not in self.postings:
+                for gram in bigrams(word):
+                    self.gram_postings.setdefault(gram, set()).add(word)
+            self.postings.setdefault(word, set()).add(product_id)
+
+    def remove_product(self, product_id):
+        for word in self.words.pop(product_id, ()):
+            self.postings.get(word, set()).discard(product_id)
+        self.products.pop(product_id, None)
+        self.name_words.pop(product_id, None)
+        self.id_words.pop(product_id, None)
+
+    def similar_words(self, word, deadline=None):
+        """Returns [(indexed word, edit distance)] within max_typos(word)."""
+        if self.postings.get(word):
+            return [(word, 0)]
+        limit = max_typos(word)
+        if limit == 0:
+            return []
+        # Each edit changes at most two bigrams, so a word within `limit`
+        # edits shares at least this many of the query word's bigrams
+        grams = bigrams(word)
+        required = len(grams) - 2 * limit
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.gram_postings.get(gram, ()))
+
+        found = []
+        for candidate, count in shared.most_common():
+            if count < required or (deadline is not None and time.perf_counter() > deadline):
+                break
+            if not self.postings.get(candidate):
+                continue
+            distance = edit_distance(word, candidate, limit)
+            if distance <= limit:
+                found.append((candidate, distance))
+        return found
+
+    def search(self, query, limit=DEFAULT_LIMIT, time_budget_ms=DEFAULT_TIME_BUDGET_MS, min_score=MIN_SCORE):
+        """Returns [(product, score)] ranked best first, score in 0..1.
+
+        A product scores mostly by how much of its name (ignoring any
+        qualifier in brackets) appears in the query and partly by how much of
+        the query it explains, discounted for typos. A matching ID or SKU code
+        scores 1. Results are ranked by how many query words they match
+        first and by score second, so "projecter screen" ranks "Smart
+        Projector Screen" above the shorter "Projector (Meeting Room)".
+        Typo candidates stop being verified once the time budget runs out,
+        returning the best results found so far.
+        """
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        query_words = list(dict.fromkeys(tokenize(query)))
+        if not query_words:
+            return []
+
+        # product_id -> {indexed word: best similarity to some query word}
+        matched = {}
+        # product_id -> query words that matched one of its words
+        matched_query_words = {}
+        for word in query_words:
+            for neighbour, distance in self.similar_words(word, deadline):
+                similarity = 1 - distance / max(len(word), len(neighbour))
+                for product_id in self.postings.get(neighbour, ()):
+                    best = matched.setdefault(product_id, {})
+                    best[neighbour] = max(best.get(neighbour, 0), similarity)
+                    matched_query_words.setdefault(product_id, set()).add(word)
+
+        results = []
+        for product_id, similarities in matched.items():
+            if any(similarities.get(word) == 1 for word in self.id_words[product_id]):
+                score = 1.0
+            else:
+                name_words = self.name_words[product_id]
+                name_coverage = sum(similarities.get(word, 0) for word in name_words) / max(len(name_words), 1)
+                query_coverage = min(sum(similarities.values()) / len(query_words), 1.0)
+                score = 0.75 * name_coverage + 0.25 * query_coverage
+            if score >= min_score:
+                results.append((len(matched_query_words[product_id]), score, self.products[product_id]))
+        results.sort(key=lambda result: result[:2], reverse=True)
+        return [(product, score) for _, score, product in results[:limit]]
+
+
+_index_cache = {"version": None, "index": None}
+_index_lock = threading.Lock()
+
+def get_search_index():
+    """Returns the fuzzy index for the current catalog, rebuilding it only after catalog changes."""
+    with get_db_connection() as conn:
+        version = get_catalog_version(conn)
+        with _index_lock:
+            if version is not None and _index_cache["version"] == version:
+                return _index_cache["index"]
+        index = ProductSearchIndex(load_products(conn))
+    with _index_lock:
+        _index_cache.update(version=version, index=index)
+    return index
+
+def search_products(query, limit=DEFAULT_LIMIT, time_budget_ms=DEFAULT_TIME_BUDGET_MS):
+    """Ranked fuzzy search over the catalog: [(product, score)]."""
+    index = get_search_index()
+    # Held so an incremental add/delete cannot mutate the index mid-search
+    with _index_lock:
+        return index.search(query, limit=limit, time_budget_ms=time_budget_ms)
+
+def _on_catalog_change(event, product, conn):
+    """Applies add/delete from analytics.py to the cached index instead of rebuilding it.
+
+    The change bumped the catalog version by exactly one. If it moved
+    further, another process changed the catalog too, and the index is
+    dropped so the next search rebuilds it from the table.
+    """
+    version = get_catalog_version(conn)
+    with _index_lock:
+        index = _index_cache["index"]
+        if index is None:
+            return
+        cached_version = _index_cache["version"]
+        if version is None or cached_version is None or version != cached_version + 1:
+            _index_cache.update(version=None, index=None)
+            return
+        if event == "added":
+            index.add_product(product)
+        elif event == "deleted":
+            index.remove_product(product["product_id"])
+        _index_cache["version"] = version
+
+register_catalog_listener(_on_catalog_change)
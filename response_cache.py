@@ -0,0 +1,251 @@
+# response_cache.py (Reuse LLM answers to repeated questions)
+"""
+Caches LLM answers per question and inventory data version.
+
+A question is normalised (case, punctuation, spacing) and compared with the
+cached questions for the same data version: an exact match, or a TF-IDF
+cosine similarity of at least SIMILARITY_THRESHOLD using the chatbot_logic
+vectorizer's tokenizer and idf weights ("what's low on stock" ~ "what is
+low on stock?"). A similar question only counts if it names the same
+products and the same numbers, so "price of desk lamp" never returns the
+answer for "price of keyboard", and the same ranking words (most, least,
+top, ...) and words the vectorizer does not know, so "which products sold
+the least" never returns the answer for "sold the most".
+
+Answers to questions asked mid-conversation also depend on what was said
+before (the prompt carries conversation_memory.render()), so they are
+cached under a digest of that context as well: "why?" after one
+conversation is never replayed in another. Opening questions have no
+context and are shared across sessions.
+
+Entries live in memory (LRU, with a TTL) and in app_state.db, so they
+survive restarts. Any write to products, sales or suppliers bumps the data
+version (see install_triggers.py), which retires every older answer.
+"""
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from database import STATE_DB, get_db_connection
+
+try:
+    from chatbot_logic import vectorizer, extract_product_names
+    _analyzer = vectorizer.build_analyzer()
+    _idf = dict(zip(vectorizer.get_feature_names_out(), vectorizer.idf_))
+    _unknown_idf = max(_idf.values())
+except ImportError:
+    # scikit-learn missing: same default tokenizer, every word weighted equally
+    from product_matcher import get_product_matcher
+    _token = re.compile(r"(?u)\b\w\w+\b")
+    _analyzer = lambda text: _token.findall(text.lower())
+    _idf = {}
+    _unknown_idf = 1.0
+    extract_product_names = lambda question: [p["product_name"] for p in get_product_matcher().extract(question)]
+
+MAX_ENTRIES = 500
+TTL_SECONDS = 6 * 60 * 60
+SIMILARITY_THRESHOLD = 0.85
+RANKING_WORDS = {
+    "most", "least", "top", "bottom", "highest", "lowest", "more", "less", "best", "worst",
+    "fewest", "max", "min", "maximum", "minimum",
+}
+
+_CONTRACTIONS = (
+    (re.compile(r"\b(what|where|how|who|it|that|there|here)'s\b"), r"\1 is"),
+    (re.compile(r"n't\b"), " not"),
+    (re.compile(r"'re\b"), " are"),
+    (re.compile(r"'m\b"), " am"),
+    (re.compile(r"'ll\b"), " will"),
+)
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    question_key TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    question TEXT,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (question_key, data_version)
+)
+"""
+
+def normalize_question(question):
+    """Lower-cases, expands contractions, drops punctuation: "What's low?" -> "what is low"."""
+    text = question.lower().replace("’", "'")
+    for pattern, replacement in _CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    text = _NON_WORD.sub("", text)
+    return _SPACES.sub(" ", text).strip()
+
+def cache_key(normalized, context=""):
+    """Stored key: the normalised question, prefixed with a digest of the conversation context if any."""
+    if not context:
+        return normalized
+    return hashlib.sha1(context.encode("utf-8")).hexdigest()[:16] + "|" + normalized
+
+def split_key(key):
+    """(context digest or "", normalised question) of a stored key."""
+    digest, _, normalized = key.rpartition("|")
+    return digest, normalized
+
+def question_vector(normalized):
+    """L2-normalised TF-IDF weights {term: weight}; words unknown to the vectorizer count as rare."""
+    counts = Counter(_analyzer(normalized))
+    weights = {term: count * _idf.get(term, _unknown_idf) for term, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {term: w / norm for term, w in weights.items()} if norm else {}
+
+def _signature(question, normalized):
+    """What must match exactly for two questions to share an answer.
+
+    Besides products and numbers: ranking words, which flip the meaning
+    ("sold the most" / "sold the least"), and words the vectorizer does not
+    know, whose shared neighbours would otherwise outweigh them.
+    """
+    words = set(_analyzer(normalized))
+    ranking = words & RANKING_WORDS
+    unknown = {word for word in words if word not in _idf} if _idf else set()
+    return (
+        tuple(sorted(extract_product_names(question))), tuple(_NUMBER.findall(normalized)),
+        tuple(sorted(ranking)), tuple(sorted(unknown - ranking)),
+    )
+
+
+class ResponseCache:
+    """LRU + TTL cache of answers, keyed on (normalised question, data version), backed by SQLite."""
+
+    def __init__(self, db_name=STATE_DB, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS,
+                 threshold=SIMILARITY_THRESHOLD):
+        self.db_name = db_name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()   # normalized question -> entry dict, least recently used first
+        self._version = None            # data version the in-memory entries belong to
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "similar_hits": 0, "misses": 0, "stores": 0}
+        with get_db_connection(self.db_name) as conn:
+            conn.execute(CACHE_TABLE)
+
+    def _load(self, version):
+        """Switches the in-memory cache to a data version, loading that version's answers from disk."""
+        now = time.time()
+        with get_db_connection(self.db_name) as conn:
+            # Answers for older data can never be served again
+            conn.execute("DELETE FROM response_cache WHERE data_version != ? OR created_at < ?", (version, now - self.ttl))
+            rows = conn.execute(
+                "SELECT question_key, question, response, created_at FROM response_cache "
+                "WHERE data_version = ? ORDER BY last_used DESC LIMIT ?",
+                (version, self.max_entries)
+            ).fetchall()
+        self._entries = OrderedDict()
+        for key, question, response, created_at in reversed(rows):
+            self._entries[key] = self._entry(question, key, response, created_at)
+        self._version = version
+
+    def _entry(self, question, key, response, created_at):
+        context, normalized = split_key(key)
+        return {
+            "question": question, "response": response, "created_at": created_at, "context": context,
+            "vector": question_vector(normalized), "signature": _signature(question, normalized),
+        }
+
+    def get(self, question, data_version, context=""):
+        """Returns the cached answer for this question, conversation context and data, or None."""
+        if data_version is None:
+            return None
+        version = json.dumps(data_version)
+        normalized = normalize_question(question)
+        key = cache_key(normalized, context)
+        context_digest = split_key(key)[0]
+        now = time.time()
+        with self._lock:
+            if version != self._version:
+                self._load(version)
+
+            match = self._entries.get(key)
+            similar = False
+            if match is None:
+                vector = question_vector(normalized)
+                signature = None
+                best_score = self.threshold
+                for candidate_key, entry in self._entries.items():
+                    if entry["context"] != context_digest:
+                        continue
+                    score = sum(weight * entry["vector"].get(term, 0.0) for term, weight in vector.items())
+                    if score >= best_score:
+                        signature = signature or _signature(question, normalized)
+                        if entry["signature"] == signature:
+                            match, key, best_score, similar = entry, candidate_key, score, True
+
+            if match is not None and now - match["created_at"] > self.ttl:
+                del self._entries[key]
+                match = None
+            if match is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["similar_hits" if similar else "hits"] += 1
+        with get_db_connection(self.db_name) as conn:
+            conn.execute(
+                "UPDATE response_cache SET last_used = ?, hits = hits + 1 WHERE question_key = ? AND data_version = ?",
+                (now, key, version)
+            )
+        return match["response"]
+
+    def put(self, question, response, data_version, context=""):
+        """Stores an answer produced from the data at data_version (and the conversation context, if any)."""
+        if data_version is None or not response:
+            return
+        version = json.dumps(data_version)
+        key = cache_key(normalize_question(question), context)
+        now = time.time()
+        with self._lock:
+            if version != self._version:
+                # The data changed while the answer was being generated
+                return
+            self._entries[key] = self._entry(question, key, response, now)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            self._stats["stores"] += 1
+        with get_db_connection(self.db_name) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache "
+                "(question_key, data_version, question, response, created_at, last_used, hits) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, version, question, response, now, now)
+            )
+            conn.executemany(
+                "DELETE FROM response_cache WHERE question_key = ? AND data_version = ?",
+                [(evicted_key, version) for evicted_key in evicted]
+            )
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries))
+        lookups = stats["hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """Returns the process-wide response cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,232 @@
+# sales_ingestion.py (Batched sales ingestion)
+"""
+Applies batches of sale events to the database.
+
+Events are dicts with product_id and quantity_sold, plus optional
+unit_price, total_amount, sale_date, sale_time, customer_name,
+payment_method and notes. They can come from any Python iterator or from a
+CSV / JSONL file:
+
+    python sales_ingestion.py sales.csv --batch-size 1000
+
+Each batch is one transaction and one executemany into a temporary view.
+An INSTEAD OF trigger on the view does the stock check in SQL: it
+decrements stock only if enough is left and records the sale only if the
+decrement happened. Concurrent writers can therefore never drive stock
+negative, and there is no Python round trip per event. Single sales (e.g.
+from a POS) go through sell_product(), which does the same in one
+immediate transaction.
+"""
+import argparse
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+
+from database import run_write_transaction
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REJECTS_KEPT = 100
+
+INGEST_COLUMNS = (
+    "product_id", "quantity_sold", "unit_price", "total_amount", "sale_date",
+    "sale_time", "customer_name", "payment_method", "notes",
+)
+
+# Per-connection (TEMP) objects, so installing them never touches the schema
+# of inventory.db and needs no migration. Separate statements so they can be
+# (re)created inside an open write transaction.
+_INGEST_SCHEMA = (
+    "CREATE TEMP TABLE IF NOT EXISTS sale_ingest_rejects (product_id TEXT, quantity_sold INTEGER)",
+
+    f"""
+    CREATE TEMP VIEW IF NOT EXISTS sale_ingest ({', '.join(INGEST_COLUMNS)})
+    AS SELECT {', '.join('NULL' for _ in INGEST_COLUMNS)}
+    """,
+
+    """
+    CREATE TEMP TRIGGER IF NOT EXISTS sale_ingest_apply
+    INSTEAD OF INSERT ON sale_ingest
+    FOR EACH ROW
+    BEGIN
+        UPDATE products
+        SET current_stock = current_stock - NEW.quantity_sold,
+            total_value = unit_price * (current_stock - NEW.quantity_sold),
+            updated_date = datetime('now')
+        WHERE product_id = NEW.product_id AND current_stock >= NEW.quantity_sold;
+
+        -- changes() is the UPDATE above: only record sales that took stock
+        INSERT INTO sales_history
+            (product_id, quantity_sold, unit_price, total_amount, sale_date, sale_time,
+             customer_name, payment_method, notes)
+        SELECT NEW.product_id, NEW.quantity_sold,
+               COALESCE(NEW.unit_price, p.unit_price),
+               COALESCE(NEW.total_amount, NEW.quantity_sold * COALESCE(NEW.unit_price, p.unit_price)),
+               NEW.sale_date, NEW.sale_time, NEW.customer_name, NEW.payment_method, NEW.notes
+        FROM (SELECT unit_price FROM products WHERE product_id = NEW.product_id LIMIT 1) p
+        WHERE changes() > 0;
+
+        -- ... and changes() is now that INSERT: nothing inserted means rejected
+        INSERT INTO sale_ingest_rejects (product_id, quantity_sold)
+        SELECT NEW.product_id, NEW.quantity_sold
+        WHERE changes() = 0;
+    END
+    """,
+)
+
+_INSERT_EVENT = f"INSERT INTO sale_ingest ({', '.join(INGEST_COLUMNS)}) VALUES ({', '.join('?' * len(INGEST_COLUMNS))})"
+
+# Single-sale path: the stock check and the decrement are one statement, so
+# two sellers can never both pass the check on the same units
+SELL_UPDATE = """
+    UPDATE products
+    SET current_stock = current_stock - :quantity,
+        total_value = unit_price * (current_stock - :quantity),
+        updated_date = datetime('now')
+    WHERE product_id = :product_id AND current_stock >= :quantity
+"""
+RECORD_SALE = f"""
+    INSERT INTO sales_history ({', '.join(INGEST_COLUMNS)})
+    SELECT ?, ?, COALESCE(?, unit_price), COALESCE(?, ? * COALESCE(?, unit_price)), ?, ?, ?, ?, ?
+    FROM products WHERE product_id = ? LIMIT 1
+"""
+
+
+# --- Event sources ---
+
+def read_csv_events(path):
+    """Yields sale events from a CSV file with a header row."""
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def read_jsonl_events(path):
+    """Yields sale events from a file with one JSON object per line."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_events(path):
+    """Picks the reader from the file extension (.csv, otherwise JSONL)."""
+    return read_csv_events(path) if path.lower().endswith('.csv') else read_jsonl_events(path)
+
+
+# --- Ingestion ---
+
+def _optional_float(value):
+    return float(value) if value not in (None, '') else None
+
+def to_row(event, now=None):
+    """Validates one event and returns its parameter tuple, or None if it is malformed.
+
+    Missing sale dates and times default to now; a missing price or total
+    is filled in from the product's unit_price by the ingest trigger.
+    """
+    try:
+        product_id = str(event["product_id"]).strip()
+        quantity = int(event["quantity_sold"])
+        unit_price = _optional_float(event.get("unit_price"))
+        total_amount = _optional_float(event.get("total_amount"))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not product_id or quantity <= 0:
+        return None
+
+    now = now or datetime.now()
+    sale_date = event.get("sale_date") or now.strftime('%Y-%m-%d %H:%M:%S')
+    sale_time = event.get("sale_time") or sale_date[11:19] or None
+    return (
+        product_id, quantity, unit_price, total_amount, sale_date, sale_time,
+        event.get("customer_name") or None, event.get("payment_method") or None, event.get("notes") or None,
+    )
+
+def sell_product(product_id, quantity, db_name=None, **details):
+    """Atomically sells quantity units of a product and records the sale.
+
+    details are the optional event fields (customer_name, unit_price, ...).
+    Returns True if the sale went through and False if the product is
+    unknown or has too little stock; raises ValueError for a malformed sale.
+    Runs in an immediate transaction that is retried if the database stays
+    locked past the busy timeout.
+    """
+    row = to_row(dict(details, product_id=product_id, quantity_sold=quantity))
+    if row is None:
+        raise ValueError(f"Invalid sale: {product_id!r} x {quantity!r}")
+    product_id, quantity, unit_price, total_amount = row[:4]
+
+    def sell(conn):
+        if conn.execute(SELL_UPDATE, {"quantity": quantity, "product_id": product_id}).rowcount == 0:
+            return False
+        conn.execute(RECORD_SALE, (product_id, quantity, unit_price, total_amount, quantity, unit_price) + row[4:] + (product_id,))
+        return True
+
+    return run_write_transaction(sell, db_name)
+
+def ingest_sales(events, batch_size=DEFAULT_BATCH_SIZE, db_name=None, on_batch=None):
+    """Applies sale events in transactions of batch_size and returns ingestion stats.
+
+    Events that fail validation are counted as invalid; events for unknown
+    products or with too little stock left are rejected by the database
+    (the first MAX_REJECTS_KEPT are returned). on_batch, if given, is called
+    with the running stats after every committed batch.
+    """
+    stats = {"received": 0, "accepted": 0, "rejected": 0, "invalid": 0, "batches": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    rejects = []
+    events = iter(events)
+    start = time.perf_counter()
+
+    def apply_batch(conn, rows):
+        for statement in _INGEST_SCHEMA:
+            conn.execute(statement)
+        conn.execute("DELETE FROM sale_ingest_rejects")
+        conn.executemany(_INSERT_EVENT, rows)
+        return conn.execute("SELECT product_id, quantity_sold FROM sale_ingest_rejects").fetchall()
+
+    while True:
+        batch = list(islice(events, batch_size))
+        if not batch:
+            break
+        now = datetime.now()
+        rows = [to_row(event, now) for event in batch]
+        valid_rows = [row for row in rows if row is not None]
+
+        # Immediate transaction: takes the write lock up front and is retried
+        # as a whole if another writer holds it past the busy timeout
+        batch_rejects = run_write_transaction(lambda conn: apply_batch(conn, valid_rows), db_name)
+
+        stats["received"] += len(batch)
+        stats["invalid"] += len(batch) - len(valid_rows)
+        stats["rejected"] += len(batch_rejects)
+        stats["accepted"] += len(valid_rows) - len(batch_rejects)
+        stats["batches"] += 1
+        rejects.extend(batch_rejects[:MAX_REJECTS_KEPT - len(rejects)])
+
+        stats["seconds"] = time.perf_counter() - start
+        stats["rows_per_sec"] = stats["accepted"] / stats["seconds"] if stats["seconds"] else 0.0
+        if on_batch:
+            on_batch(stats)
+
+    stats["rejects"] = rejects
+    return stats
+
+def print_stats(stats):
+    print(
+        f"📦 {stats['received']:,} events in {stats['batches']:,} batches: "
+        f"{stats['accepted']:,} accepted, {stats['rejected']:,} rejected (stock / unknown product), "
+        f"{stats['invalid']:,} invalid"
+    )
+    print(f"⚡ {stats['rows_per_sec']:,.0f} sales/sec sustained over {stats['seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest sale events from a CSV or JSONL file.")
+    parser.add_argument("path", help="CSV (with header) or JSONL file of sale events")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="events per transaction")
+    parser.add_argument("--db", default=None, help="database file (defaults to inventory.db)")
+    args = parser.parse_args()
+
+    result = ingest_sales(read_events(args.path), batch_size=args.batch_size, db_name=args.db)
+    print_stats(result)
+    for product_id, quantity in result["rejects"][:10]:
+        print(f"  ⚠️ Rejected: {product_id} x {quantity}")
@@ -0,0 +1,250 @@
+# speech_to_text.py (Local, chunked speech-to-text)
+"""
+Turns uploaded or recorded audio into text, offline when possible.
+
+Pipeline (each stage is timed):
+
+1. decode    WAV with the wave module; MP3/M4A/OGG through pydub (needs
+             ffmpeg). The old upload path passed the raw file bytes,
+             headers and MP3 frames included, to the recognizer as
+             16 kHz PCM.
+2. resample  to 16-bit mono STT_SAMPLE_RATE PCM with audioop.
+3. recognize the PCM is fed to the engine in CHUNK_SECONDS chunks, and
+             the engine yields text segments as soon as it finalises
+             them.
+
+Engines implement transcribe_chunks(chunks, lang, sample_rate) -> iterator
+of text segments: VoskEngine (offline Kaldi models, no network round-trip),
+GoogleEngine (the previous recognize_google call, buffered) and StubEngine
+(for benchmarks and offline checks). STT_ENGINE picks one; by default Vosk
+is used for each language whose model is installed, Google otherwise.
+
+Vosk models: https://alphacephei.com/vosk/models, unpacked to the paths in
+VOSK_MODELS (or set VOSK_MODEL_EN / VOSK_MODEL_HI).
+"""
+import io
+import json
+import os
+import threading
+import time
+import warnings
+import wave
+
+STT_SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.5
+VOSK_MODELS = {
+    "en": os.environ.get("VOSK_MODEL_EN", "models/vosk-model-small-en-us-0.15"),
+    "hi": os.environ.get("VOSK_MODEL_HI", "models/vosk-model-small-hi-0.22"),
+}
+GOOGLE_LANGUAGES = {"en": "en-US", "hi": "hi-IN"}
+
+
+class AudioDecodeError(ValueError):
+    """The audio could not be decoded into PCM."""
+
+
+# --- Decode / resample ---
+
+def _audioop():
+    """The audioop module, imported on first use so the app starts without it.
+
+    audioop was removed from the standard library in Python 3.13, where the
+    audioop-lts package provides it.
+    """
+    try:
+        with warnings.catch_warnings():
+            # Deprecated since 3.11
+            warnings.simplefilter("ignore", DeprecationWarning)
+            import audioop
+    except ImportError:
+        raise AudioDecodeError("Resampling audio needs audioop (pip install audioop-lts on Python 3.13+)")
+    return audioop
+
+def decode_audio(data, filename=None):
+    """Returns (pcm, sample_rate, sample_width, channels) for a WAV/MP3/M4A file's bytes."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                return (wav.readframes(wav.getnframes()), wav.getframerate(),
+                        wav.getsampwidth(), wav.getnchannels())
+        except (wave.Error, EOFError, RuntimeError) as e:   # RuntimeError: chunk sizes past the end
+            raise AudioDecodeError(f"Unreadable WAV file: {e}") from e
+
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        raise AudioDecodeError("MP3/M4A audio needs pydub and ffmpeg (pip install pydub); upload a WAV file instead")
+    extension = os.path.splitext(filename or "")[1].lstrip(".").lower() or None
+    try:
+        segment = AudioSegment.from_file(io.BytesIO(data), format=extension)
+    except Exception as e:
+        raise AudioDecodeError(f"Could not decode {filename or 'audio'}: {e}") from e
+    return segment.raw_data, segment.frame_rate, segment.sample_width, segment.channels
+
+def to_pcm16_mono(pcm, sample_rate, sample_width, channels, target_rate=STT_SAMPLE_RATE):
+    """Converts PCM to 16-bit mono at target_rate."""
+    if sample_width == 2 and channels == 1 and sample_rate == target_rate:
+        return pcm
+    audioop = _audioop()
+    if sample_width == 1:
+        # 8-bit WAV is unsigned, audioop expects signed samples
+        pcm = audioop.bias(pcm, 1, -128)
+    if sample_width != 2:
+        pcm = audioop.lin2lin(pcm, sample_width, 2)
+    if channels == 2:
+        pcm = audioop.tomono(pcm, 2, 0.5, 0.5)
+    elif channels != 1:
+        raise AudioDecodeError(f"Unsupported channel count: {channels}")
+    if sample_rate != target_rate:
+        pcm, _ = audioop.ratecv(pcm, 2, 1, sample_rate, target_rate, None)
+    return pcm
+
+def iter_chunks(pcm, sample_rate=STT_SAMPLE_RATE, seconds=CHUNK_SECONDS):
+    """Yields 16-bit mono PCM in chunks of the given length."""
+    step = int(sample_rate * seconds) * 2
+    for start in range(0, len(pcm), step):
+        yield pcm[start:start + step]
+
+
+# --- Engines ---
+
+class VoskEngine:
+    """Offline recognition with Vosk (Kaldi) models, streamed chunk by chunk."""
+    name = "vosk"
+
+    def __init__(self, model_paths=None):
+        self.model_paths = model_paths or VOSK_MODELS
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def is_available(self, lang="en"):
+        try:
+            import vosk  # noqa: F401
+        except ImportError:
+            return False
+        return os.path.isdir(self.model_paths.get(lang, ""))
+
+    def _model(self, lang):
+        # Loading a model takes seconds, so each is loaded once per process
+        with self._lock:
+            if lang not in self._models:
+                import vosk
+                vosk.SetLogLevel(-1)
+                self._models[lang] = vosk.Model(self.model_paths[lang])
+            return self._models[lang]
+
+    def transcribe_chunks(self, chunks, lang, sample_rate):
+        import vosk
+        recognizer = vosk.KaldiRecognizer(self._model(lang), sample_rate)
+        for chunk in chunks:
+            if recognizer.AcceptWaveform(chunk):
+                text = json.loads(recognizer.Result()).get("text")
+                if text:
+                    yield text
+        text = json.loads(recognizer.FinalResult()).get("text")
+        if text:
+            yield text
+
+
+class GoogleEngine:
+    """speech_recognition's recognize_google: one network request for the whole utterance."""
+    name = "google"
+
+    def transcribe_chunks(self, chunks, lang, sample_rate):
+        import speech_recognition as sr
+        audio = sr.AudioData(b"".join(chunks), sample_rate=sample_rate, sample_width=2)
+        try:
+            yield sr.Recognizer().recognize_google(audio, language=GOOGLE_LANGUAGES.get(lang, lang))
+        except sr.UnknownValueError:
+            return
+
+
+class StubEngine:
+    """Fake engine: spreads a fixed transcript over the chunks, taking latency seconds per chunk."""
+    name = "stub"
+
+    def __init__(self, transcript="how many keyboards are in stock", latency=0.0, words_per_segment=2):
+        self.transcript = transcript
+        self.latency = latency
+        self.words_per_segment = words_per_segment
+
+    def transcribe_chunks(self, chunks, lang, sample_rate):
+        words = self.transcript.split()
+        for chunk in chunks:
+            time.sleep(self.latency)
+            if words:
+                segment, words = words[:self.words_per_segment], words[self.words_per_segment:]
+                yield " ".join(segment)
+        if words:
+            yield " ".join(words)
+
+
+ENGINES = {
+    "vosk": VoskEngine,
+    "google": GoogleEngine,
+    "stub": StubEngine,
+}
+
+_engines = {}
+_engine_lock = threading.Lock()
+
+def get_stt_engine(lang="en"):
+    """Returns the process-wide engine for a language.
+
+    STT_ENGINE if set, else Vosk. Vosk falls back to Google for a language
+    whose model is not installed (an en model does not make hi work).
+    """
+    name = os.environ.get("STT_ENGINE", "vosk")
+    with _engine_lock:
+        if name not in _engines:
+            _engines[name] = ENGINES[name]()
+        engine = _engines[name]
+        if name == "vosk" and not engine.is_available(lang):
+            engine = _engines.setdefault("google", GoogleEngine())
+        return engine
+
+
+# --- Pipeline ---
+
+def transcribe_pcm(pcm, sample_rate, sample_width=2, channels=1, lang="en", engine=None,
+                   on_segment=None, timings=None):
+    """Transcribes raw PCM (e.g. speech_recognition's AudioData.get_raw_data()).
+
+    Returns {"text", "segments", "audio_seconds", "engine", "timings"};
+    on_segment(text_so_far) is called as each segment is recognised.
+    """
+    timings = timings if timings is not None else {}
+    start = time.perf_counter()
+    pcm = to_pcm16_mono(pcm, sample_rate, sample_width, channels)
+    timings["resample_ms"] = (time.perf_counter() - start) * 1000
+
+    engine = engine or get_stt_engine(lang)
+    segments = []
+    start = time.perf_counter()
+    for segment in engine.transcribe_chunks(iter_chunks(pcm), lang, STT_SAMPLE_RATE):
+        if not segments:
+            timings["first_segment_ms"] = (time.perf_counter() - start) * 1000
+        segments.append(segment)
+        if on_segment:
+            on_segment(" ".join(segments))
+    timings["recognize_ms"] = (time.perf_counter() - start) * 1000
+    return {
+        "text": " ".join(segments),
+        "segments": segments,
+        "audio_seconds": len(pcm) / 2 / STT_SAMPLE_RATE,
+        "engine": engine.name,
+        "timings": timings,
+    }
+
+def transcribe(data, filename=None, lang="en", engine=None, on_segment=None):
+    """Decodes an audio file's bytes and transcribes it (see transcribe_pcm)."""
+    start = time.perf_counter()
+    pcm, sample_rate, sample_width, channels = decode_audio(data, filename)
+    timings = {"decode_ms": (time.perf_counter() - start) * 1000}
+    return transcribe_pcm(pcm, sample_rate, sample_width, channels, lang, engine, on_segment, timings)
+
+def format_timings(result):
+    """One-line summary of a transcription's stage timings for the UI."""
+    timings = result["timings"]
+    stages = [f"{stage[:-3]} {timings[stage]:.0f} ms" for stage in ("decode_ms", "resample_ms", "recognize_ms") if stage in timings]
+    return f"{result['engine']}: {result['audio_seconds']:.1f}s audio, " + ", ".join(stages)
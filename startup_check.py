@@ -110,6 +110,28 @@ def verify_database():
     finally:
         conn.close()
 
+def verify_query_plans():
+    """Verify the dashboard queries on sales_history still go through indexes."""
+    print("\n" + "="*60)
+    print("CHECKING DASHBOARD QUERY PLANS")
+    print("="*60)
+    try:
+        from create_indexes import check_query_plans
+        conn = sqlite3.connect(DB_NAME)
+        try:
+            check_query_plans(conn, verbose=False)
+        finally:
+            conn.close()
+    except AssertionError as e:
+        print(f"✗ {e}")
+        print("Run: python create_indexes.py")
+        return False
+    except Exception as e:
+        print(f"✗ Could not check query plans: {e}")
+        return False
+    print("✓ Dashboard queries are index-driven")
+    return True
+
 def check_requirements():
     """Check if required Python packages are installed."""
     print("\n" + "="*60)
@@ -155,6 +177,7 @@ def startup_checklist():
         ("analytics.py exists", os.path.exists('analytics.py')),
         ("app.py exists", os.path.exists('app.py')),
         ("install_triggers.py exists", os.path.exists('install_triggers.py')),
+        ("create_indexes.py exists", os.path.exists('create_indexes.py')),
         ("populate_all_data.py exists", os.path.exists('populate_all_data.py')),
     ]
     
@@ -168,7 +191,7 @@ def startup_checklist():
     return all_good
 
 if __name__ == "__main__":
-    db_ok = verify_database()
+    db_ok = verify_database() and verify_query_plans()
     pkg_ok = check_requirements()
     setup_ok = startup_checklist()
     
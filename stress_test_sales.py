@@ -0,0 +1,149 @@
+# stress_test_sales.py
+"""
+Multi-process stress test for concurrent stock decrements.
+
+Several processes sell the same few "hot" products at once until they run
+out: half call sell_product() one sale at a time (a POS), half push batches
+through ingest_sales() (an import / the data generator). Afterwards, for
+every hot product:
+
+  * stock never went negative,
+  * initial stock - final stock == units the workers were told they sold
+    == units recorded in sales_history (no lost or phantom updates).
+
+For comparison the same contention is first run against the old
+read-modify-write sale (read current_stock, compute the new value in
+Python, write it back), which loses updates.
+
+Runs on a copy of inventory.db; the real database is never modified.
+Run: python stress_test_sales.py [--workers 8] [--stock 500]
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from database import DB_NAME, get_db_connection
+from install_triggers import install_triggers
+from sales_ingestion import ingest_sales, sell_product
+
+HOT_PRODUCTS = ("PROD003", "PROD004", "PROD005")
+BATCH_SIZE = 20
+
+def legacy_sell(product_id, quantity, db_name):
+    """The old data_generator logic: the stock check happens in Python."""
+    with get_db_connection(db_name) as conn:
+        row = conn.execute("SELECT current_stock FROM products WHERE product_id = ?", (product_id,)).fetchone()
+        new_stock = row[0] - quantity
+        if new_stock < 0:
+            return False
+        time.sleep(0.0005)  # the window between read and write in a real POS
+        conn.execute("UPDATE products SET current_stock = ? WHERE product_id = ?", (new_stock, product_id))
+        conn.execute(
+            "INSERT INTO sales_history (product_id, quantity_sold, sale_date) VALUES (?, ?, datetime('now'))",
+            (product_id, quantity)
+        )
+        return True
+
+def worker(args):
+    """Sells random quantities of the hot products until every one is sold out."""
+    mode, worker_id, db_name, seed = args
+    rng = random.Random(seed)
+    sold = dict.fromkeys(HOT_PRODUCTS, 0)
+    sold_out = set()
+    while len(sold_out) < len(HOT_PRODUCTS):
+        if mode == "atomic" and worker_id % 2:
+            # Batch importer
+            events = [
+                {"product_id": rng.choice(HOT_PRODUCTS), "quantity_sold": rng.randint(1, 3)}
+                for _ in range(BATCH_SIZE)
+            ]
+            stats = ingest_sales(events, batch_size=BATCH_SIZE, db_name=db_name)
+            rejected = {}
+            for product_id, quantity in stats["rejects"]:
+                rejected[product_id] = rejected.get(product_id, 0) + quantity
+            for product_id in HOT_PRODUCTS:
+                requested = sum(e["quantity_sold"] for e in events if e["product_id"] == product_id)
+                sold[product_id] += requested - rejected.get(product_id, 0)
+            sold_out.update(product_id for product_id, quantity in stats["rejects"] if quantity == 1)
+        else:
+            product_id = rng.choice(HOT_PRODUCTS)
+            quantity = rng.randint(1, 3)
+            sell = sell_product if mode == "atomic" else legacy_sell
+            if sell(product_id, quantity, db_name=db_name):
+                sold[product_id] += quantity
+            elif quantity == 1:
+                sold_out.add(product_id)
+    return sold
+
+def prepare_database(path, initial_stock):
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_NAME), path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        install_triggers(path)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"UPDATE products SET current_stock = ? WHERE product_id IN ({', '.join('?' * len(HOT_PRODUCTS))})",
+        (initial_stock,) + HOT_PRODUCTS
+    )
+    last_sale_id = conn.execute("SELECT COALESCE(MAX(sale_id), 0) FROM sales_history").fetchone()[0]
+    conn.commit()
+    conn.close()
+    return last_sale_id
+
+def run(mode, workers, initial_stock, workdir):
+    """Returns {product_id: (final stock, units reported sold, units in sales_history)}."""
+    db_name = os.path.join(workdir, f"{mode}.db")
+    last_sale_id = prepare_database(db_name, initial_stock)
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(worker, [(mode, i, db_name, i) for i in range(workers)])
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(db_name)
+    report = {}
+    for product_id in HOT_PRODUCTS:
+        final_stock = conn.execute("SELECT current_stock FROM products WHERE product_id = ?", (product_id,)).fetchone()[0]
+        recorded = conn.execute(
+            "SELECT COALESCE(SUM(quantity_sold), 0) FROM sales_history WHERE product_id = ? AND sale_id > ?",
+            (product_id, last_sale_id)
+        ).fetchone()[0]
+        report[product_id] = (final_stock, sum(result[product_id] for result in results), recorded)
+    conn.close()
+    return report, elapsed
+
+def print_report(title, report, initial_stock, elapsed):
+    print(f"\n{title} ({elapsed:.2f} s)")
+    for product_id, (final_stock, reported, recorded) in report.items():
+        lost = reported - (initial_stock - final_stock)
+        print(f"  {product_id}: final stock {final_stock:>4}, sold {reported:>4} (recorded {recorded:>4}), lost updates: {lost} units")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent sell stress test.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--stock", type=int, default=500, help="initial stock of each hot product")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"CONCURRENT SELL STRESS TEST ({args.workers} processes, {len(HOT_PRODUCTS)} hot products)")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as workdir:
+        report, elapsed = run("legacy", args.workers, args.stock, workdir)
+        print_report("❌ Read-modify-write (before)", report, args.stock, elapsed)
+
+        report, elapsed = run("atomic", args.workers, args.stock, workdir)
+        print_report("✅ Conditional UPDATE in BEGIN IMMEDIATE (after)", report, args.stock, elapsed)
+
+    for product_id, (final_stock, reported, recorded) in report.items():
+        assert final_stock >= 0, f"{product_id}: negative stock"
+        assert reported == recorded == args.stock - final_stock, f"{product_id}: lost or phantom updates"
+    print("\n✅ No lost updates and no negative stock under contention")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# tests/conftest.py (Shared fixtures: a seeded inventory database per test)
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# (product_id, product_name, category, current_stock, reorder_point, unit_price)
+PRODUCTS = [
+    ("PROD001", "Keyboard", "Electronics", 45, 20, 1499.00),
+    ("PROD002", "Wireless Mouse", "Electronics", 8, 25, 799.50),
+    ("PROD003", "Wireless Mouse", "Electronics", 60, 25, 1199.99),
+    ("PROD004", "Office Chair", "Furniture", 12, 10, 8999.00),
+    ("PROD005", "Desk Lamp", "Furniture", 3, 15, 1250.75),
+    ("PROD006", "Webcam", "Electronics", 30, 10, 2599.00),
+    ("PROD007", "Printer Paper", "Office Supplies", 150, 100, 349.00),
+    ("PROD008", "Stapler", "Office Supplies", 5, 10, 199.00),
+]
+CUSTOMERS = ["Raj Patel", "Anita Shah", "Vikram Rao", "Meera Iyer", "Walk-in"]
+PAYMENT_METHODS = ["Cash", "UPI", "Card"]
+NUM_SALES = 3_000
+SALES_DAYS = 90
+
+def seed_database(conn, num_sales=NUM_SALES, seed=0):
+    """Fills the setup_database.py schema with PRODUCTS and num_sales sales over the last SALES_DAYS days."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    conn.executemany(
+        """
+        INSERT INTO products (product_id, product_name, category, current_stock, reorder_point,
+                              supplier_id, unit_price, total_value, sku_code, warehouse_location)
+        VALUES (?, ?, ?, ?, ?, 'SUP001', ?, ?, ?, 'Mumbai-A')
+        """,
+        [(pid, name, category, stock, reorder, price, stock * price, f"SKU-{pid}")
+         for pid, name, category, stock, reorder, price in PRODUCTS]
+    )
+    conn.execute("INSERT INTO suppliers (supplier_id, supplier_name, city) VALUES ('SUP001', 'Acme Traders', 'Mumbai')")
+    sales = []
+    for _ in range(num_sales):
+        pid, _, _, _, _, price = rng.choice(PRODUCTS)
+        quantity = rng.randint(1, 5)
+        sold_at = now - timedelta(days=rng.uniform(0, SALES_DAYS))
+        sales.append((pid, quantity, price, quantity * price, sold_at.strftime('%Y-%m-%d %H:%M:%S'),
+                      sold_at.strftime('%H:%M:%S'), rng.choice(CUSTOMERS), rng.choice(PAYMENT_METHODS)))
+    conn.executemany(
+        """
+        INSERT INTO sales_history (product_id, quantity_sold, unit_price, total_amount, sale_date,
+                                   sale_time, customer_name, payment_method)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        sales
+    )
+    conn.commit()
+
+def reset_caches():
+    """Drops the module-level caches so one test's database never serves another's."""
+    import analytics, context_retrieval, product_matcher, product_search
+    analytics._context_cache.clear()
+    context_retrieval._index_cache.update(version=None, index=None)
+    context_retrieval._customer_cache.update(last_sale_id=None, customers=[])
+    product_matcher._matcher_cache.update(version=None, matcher=None)
+    product_search._index_cache.update(version=None, index=None)
+
+@pytest.fixture
+def plain_db(tmp_path, monkeypatch):
+    """Path of a seeded inventory.db in the working directory, without triggers or indexes."""
+    monkeypatch.chdir(tmp_path)
+    from setup_database import setup_db
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_db()
+    conn = sqlite3.connect("inventory.db")
+    seed_database(conn)
+    conn.close()
+    return str(tmp_path / "inventory.db")
+
+@pytest.fixture
+def inventory_db(plain_db):
+    """plain_db with the production indexes and triggers installed; caches reset around the test."""
+    from create_indexes import create_indexes
+    from database import get_pool
+    from install_triggers import install_triggers
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn = sqlite3.connect(plain_db)
+        create_indexes(conn)
+        conn.close()
+        install_triggers(plain_db)
+    reset_caches()
+    yield plain_db
+    get_pool(plain_db).close_all()
+    reset_caches()
+
+@pytest.fixture
+def conn(inventory_db):
+    """A plain sqlite3 connection to inventory_db, outside the app's pool."""
+    conn = sqlite3.connect(inventory_db)
+    yield conn
+    conn.close()
@@ -0,0 +1,47 @@
+# tests/test_analytics.py (Restocking: stock, value, metadata and the data version)
+import sqlite3
+
+import pytest
+
+from analytics import get_data_version, restock_products
+from conftest import PRODUCTS
+
+PRICE = {product_id: price for product_id, _, _, _, _, price in PRODUCTS}
+STOCK = {product_id: stock for product_id, _, _, stock, _, _ in PRODUCTS}
+
+def product(conn, product_id):
+    conn.row_factory = sqlite3.Row
+    return dict(conn.execute("SELECT * FROM products WHERE product_id = ?", (product_id,)).fetchone())
+
+def test_restock_updates_stock_value_and_metadata(conn):
+    before = product(conn, "PROD005")
+    version = get_data_version()
+    assert restock_products({"PROD005": 20, "PROD008": 7}) == {"PROD005": STOCK["PROD005"] + 20, "PROD008": STOCK["PROD008"] + 7}
+
+    after = product(conn, "PROD005")
+    assert after["current_stock"] == STOCK["PROD005"] + 20
+    assert after["total_value"] == pytest.approx(PRICE["PROD005"] * (STOCK["PROD005"] + 20))
+    assert after["last_restock_quantity"] == 20
+    assert after["total_restocks"] == (before["total_restocks"] or 0) + 1
+    assert after["restock_date"] and after["restock_time"]
+    assert product(conn, "PROD008")["total_value"] == pytest.approx(PRICE["PROD008"] * (STOCK["PROD008"] + 7))
+    # Cached answers and dashboards keyed on the version are invalidated
+    assert get_data_version() != version
+
+def test_unknown_products_are_reported_as_none(conn):
+    assert restock_products({"PROD001": 5, "PROD999": 5}) == {"PROD001": STOCK["PROD001"] + 5, "PROD999": None}
+
+def test_failed_restock_is_rolled_back(conn, capsys):
+    conn.execute("""
+        CREATE TRIGGER block_chair_restock BEFORE UPDATE OF current_stock ON products
+        WHEN NEW.product_id = 'PROD004'
+        BEGIN SELECT RAISE(ABORT, 'restock blocked'); END
+    """)
+    conn.commit()
+    version = get_data_version()
+    # PROD001 is applied first; the failure on PROD004 must undo it
+    assert restock_products({"PROD001": 10, "PROD004": 3}) == {}
+    assert "restock blocked" in capsys.readouterr().out
+    assert product(conn, "PROD001")["current_stock"] == STOCK["PROD001"]
+    assert product(conn, "PROD004")["current_stock"] == STOCK["PROD004"]
+    assert get_data_version() == version
@@ -0,0 +1,102 @@
+# tests/test_chat_history.py (Session bound, archive and the visible window)
+import pytest
+
+from chat_history import (
+    CHAT_WINDOW, MAX_SESSION_MESSAGES, PAGE_SIZE,
+    archive_overflow, init_chat_state, load_archived, show_earlier, visible_messages,
+)
+from database import get_pool
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "state.db")
+    yield path
+    get_pool(path).close_all()
+
+def chat(db, turns, state=None):
+    """A session after `turns` messages, archiving as app.py does after each one."""
+    state = state if state is not None else {}
+    init_chat_state(state, "m0")
+    for n in range(len(state["messages"]) + state["archived_count"], turns + 1):
+        state["messages"].append({"role": "user" if n % 2 else "assistant", "content": f"m{n}"})
+        archive_overflow(state, db)
+    return state
+
+def contents(messages):
+    return [message["content"] for message in messages]
+
+def transcript(last):
+    return [f"m{n}" for n in range(last + 1)]
+
+def test_new_session_shows_the_greeting(db):
+    state = {}
+    init_chat_state(state, "Hello!")
+    assert visible_messages(state, db) == ([{"role": "assistant", "content": "Hello!"}], False)
+
+def test_session_is_bounded_and_archived_a_page_at_a_time(db):
+    state = {}
+    init_chat_state(state, "m0")
+    archived = []
+    for n in range(1, 150):
+        state["messages"].append({"role": "user", "content": f"m{n}"})
+        archived.append(archive_overflow(state, db))
+        assert len(state["messages"]) <= MAX_SESSION_MESSAGES
+    # Nothing moves until the limit is passed, then a page (plus the overflow) at once
+    writes = [count for count in archived if count]
+    # archived[i] was returned with the greeting plus i + 1 messages in the session
+    assert archived.index(writes[0]) + 2 == MAX_SESSION_MESSAGES + 1
+    assert writes == [PAGE_SIZE + 1] * len(writes)
+    assert state["archived_count"] + len(state["messages"]) == 150
+
+def test_archived_turns_are_still_reachable(db):
+    state = chat(db, 149)
+    everything = load_archived(state, state["archived_count"], db) + state["messages"]
+    assert contents(everything) == transcript(149)
+    assert [message["role"] for message in everything[1:3]] == ["user", "assistant"]
+    # Asking for more than was archived returns what there is
+    assert len(load_archived(state, 10_000, db)) == state["archived_count"]
+    assert load_archived(state, 0, db) == []
+
+def test_default_window_is_the_newest_messages(db):
+    state = chat(db, 149)
+    messages, has_more = visible_messages(state, db)
+    assert contents(messages) == transcript(149)[-CHAT_WINDOW:]
+    assert has_more
+
+def test_show_earlier_pages_back_through_the_archive(db):
+    state = chat(db, 149)
+    seen = CHAT_WINDOW
+    while True:
+        show_earlier(state)
+        seen = min(seen + PAGE_SIZE, 150)
+        messages, has_more = visible_messages(state, db)
+        assert contents(messages) == transcript(149)[-seen:]
+        if not has_more:
+            break
+    assert seen == 150
+    assert contents(messages) == transcript(149)
+
+@pytest.mark.parametrize("extra, has_more", [(0, True), (1, True), (9, True), (10, False), (25, False)])
+def test_window_boundary_at_the_archive(db, extra, has_more):
+    state = chat(db, 49)
+    archive_overflow(state, db, limit=30)     # 50 messages: 40 archived, 10 in the session
+    assert (state["archived_count"], len(state["messages"])) == (40, 10)
+    state["chat_window"] = 40 + extra
+    messages, more = visible_messages(state, db)
+    assert contents(messages) == transcript(49)[-min(40 + extra, 50):]
+    assert more is has_more
+
+def test_window_within_the_session(db):
+    state = chat(db, 29)
+    state["chat_window"] = 30
+    assert visible_messages(state, db) == (state["messages"], False)
+    state["chat_window"] = 29
+    messages, has_more = visible_messages(state, db)
+    assert contents(messages) == transcript(29)[1:]
+    assert has_more
+
+def test_sessions_do_not_share_the_archive(db):
+    first, second = chat(db, 99), chat(db, 79)
+    assert first["chat_session_id"] != second["chat_session_id"]
+    assert contents(load_archived(first, 1000, db)) == transcript(99)[:first["archived_count"]]
+    assert contents(load_archived(second, 1000, db)) == transcript(79)[:second["archived_count"]]
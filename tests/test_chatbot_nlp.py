@@ -0,0 +1,86 @@
+# tests/test_chatbot_nlp.py (Keyword rules, regex fallback and the lazy spaCy load)
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import chatbot_nlp
+from chatbot_nlp import match_keyword_intent, process_user_queries, process_user_query
+
+@pytest.fixture
+def no_spacy(monkeypatch):
+    """spaCy not installed: importing it raises ImportError."""
+    monkeypatch.setitem(sys.modules, "spacy", None)
+    monkeypatch.setattr(chatbot_nlp, "_nlp", None)
+    monkeypatch.setattr(chatbot_nlp, "_nlp_failed", False)
+
+class FakeToken:
+    def __init__(self, text):
+        self.text = text
+        self.pos_ = "NOUN" if text not in chatbot_nlp._FILLER_WORDS else "OTHER"
+
+class FakeNLP:
+    def __call__(self, text):
+        return [FakeToken(word) for word in text.split()]
+
+    def pipe(self, texts, batch_size):
+        return (self(text) for text in texts)
+
+@pytest.fixture
+def fake_spacy(monkeypatch):
+    """A stand-in spaCy module that counts model loads."""
+    loads = []
+    def load(name, disable):
+        loads.append((name, disable))
+        return FakeNLP()
+    monkeypatch.setitem(sys.modules, "spacy", types.SimpleNamespace(load=load))
+    monkeypatch.setattr(chatbot_nlp, "_nlp", None)
+    monkeypatch.setattr(chatbot_nlp, "_nlp_failed", False)
+    return loads
+
+@pytest.mark.parametrize("text, intent", [
+    ("what is low on stock", "get_low_stock_alerts"),
+    ("which items are running low", "get_low_stock_alerts"),
+    ("what needs restocking", "get_low_stock_alerts"),
+    ("price of the keyboard", "get_price"),
+    ("keyboard kitna hai", "get_price"),
+    ("keyboard kitna stock hai", "get_stock_status"),
+    ("how many keyboards in stock", "get_stock_status"),
+    ("top 5 selling products", "get_top_sellers"),
+    ("laptop stand", "unknown"),           # "top" only as a whole word
+    ("Namaste", "greet"),
+    ("", "unknown"),
+])
+def test_keyword_rules(text, intent):
+    assert match_keyword_intent(text) == intent
+
+def test_regex_fallback_without_spacy(no_spacy, capsys):
+    assert chatbot_nlp.get_nlp() is None
+    assert "SpaCy not installed" in capsys.readouterr().out
+    assert process_user_query("How many keyboards do we have?") == ("get_stock_status", {"product_name": "keyboards"})
+    assert process_user_query("what is low on stock") == ("get_low_stock_alerts", {})
+    assert process_user_queries(["price of the webcam", "hello"]) == [
+        ("get_price", {"product_name": "webcam"}), ("greet", {}),
+    ]
+
+def test_missing_spacy_is_only_tried_once(no_spacy, monkeypatch, capsys):
+    chatbot_nlp.get_nlp()
+    capsys.readouterr()
+    monkeypatch.setitem(sys.modules, "spacy", types.SimpleNamespace(load=lambda *a, **k: pytest.fail("retried")))
+    assert chatbot_nlp.get_nlp() is None
+    assert capsys.readouterr().out == ""
+
+def test_use_spacy_false_never_loads_the_model(fake_spacy):
+    assert process_user_query("price of the webcam", use_spacy=False) == ("get_price", {"product_name": "webcam"})
+    assert fake_spacy == []
+
+def test_model_loads_once(fake_spacy):
+    with ThreadPoolExecutor(8) as pool:
+        models = list(pool.map(lambda _: chatbot_nlp.get_nlp(), range(32)))
+    assert len(fake_spacy) == 1
+    assert fake_spacy[0] == (chatbot_nlp.SPACY_MODEL, chatbot_nlp.SPACY_DISABLED)
+    assert all(model is models[0] for model in models)
+    assert process_user_query("price of the webcam") == ("get_price", {"product_name": "webcam"})
+    assert process_user_queries(["stock of the keyboard"]) == [("get_stock_status", {"product_name": "keyboard"})]
+    assert len(fake_spacy) == 1
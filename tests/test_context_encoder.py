@@ -0,0 +1,87 @@
+# tests/test_context_encoder.py (Compact tables for the LLM context)
+import math
+import sqlite3
+
+import pandas as pd
+
+from context_encoder import (
+    CUSTOMER_FIELDS, PRODUCT_FIELDS, SALE_FIELDS, day, encode_rows, encode_table, integer, money, text,
+)
+
+def test_formatters():
+    assert text("Desk | Lamp\nLED") == "Desk / Lamp LED"
+    assert text(None) == ""
+    assert integer(44.6) == "45"
+    assert integer(math.nan) == ""
+    assert money(17662.81) == "17662.81"
+    assert money(12.5) == "12.50"
+    assert money(1499) == "1499.00"
+    assert money(None) == ""
+    assert day("2025-11-06 14:03:22") == "2025-11-06"
+    assert day(None) == ""
+
+def test_encode_rows():
+    columns = ["customer_name", "transaction_count", "customer_total"]
+    rows = [("Raj Patel", 12, 95000.4), ("Anita Shah", 3, None)]
+    assert encode_rows(columns, rows, CUSTOMER_FIELDS) == (
+        "customer|purchases|total\n"
+        "Raj Patel|12|95000\n"
+        "Anita Shah|3|\n"
+    )
+
+def test_encode_rows_grouped_and_missing_columns():
+    columns = ["product_id", "product_name", "category", "unit_price"]
+    rows = [
+        ("PROD001", "Keyboard", "Electronics", 1499.0),
+        ("PROD006", "Webcam", "Electronics", 2599.0),
+        ("PROD004", "Office Chair", None, 8999.5),
+    ]
+    # Fields the rows do not have (stock, supplier, ...) are left out of the header
+    assert encode_rows(columns, rows, PRODUCT_FIELDS, group_by="category") == (
+        "id|name|price\n"
+        "## Electronics\n"
+        "PROD001|Keyboard|1499.00\n"
+        "PROD006|Webcam|2599.00\n"
+        "## (none)\n"
+        "PROD004|Office Chair|8999.50\n"
+    )
+
+def test_encode_table_treats_nan_as_missing():
+    df = pd.DataFrame({
+        "product_id": ["PROD001", "PROD002"],
+        "quantity_sold": [2, 1],
+        "unit_price": [1499.0, None],
+        "total_amount": [2998.0, None],
+        "sale_date": ["2025-11-06 10:00:00", "2025-11-07"],
+        "customer_name": ["Raj Patel", None],
+        "payment_method": ["UPI", "Cash"],
+    })
+    assert encode_table(df, SALE_FIELDS) == (
+        "id|qty|price|total|date|customer|pay\n"
+        "PROD001|2|1499.00|2998.00|2025-11-06|Raj Patel|UPI\n"
+        "PROD002|1|||2025-11-07||Cash\n"
+    )
+
+def test_products_section_decodes_to_the_database(inventory_db):
+    from analytics import get_inventory_context_sections
+    (_, section), = get_inventory_context_sections(["products"])
+    lines = section.strip().split("\n")
+    assert lines[0] == "=== PRODUCTS INVENTORY (grouped by category) ==="
+    headers = lines[1].split("|")
+    columns = [column for column, header, _ in PRODUCT_FIELDS if header in headers]
+
+    decoded, category = {}, None
+    for line in lines[2:]:
+        if line.startswith("## "):
+            category = line[3:]
+        else:
+            values = dict(zip(columns, line.split("|")), category=category)
+            decoded[values["product_id"]] = values
+
+    with sqlite3.connect(inventory_db) as conn:
+        rows = conn.execute(f"SELECT {', '.join(column for column, _, _ in PRODUCT_FIELDS)} FROM products").fetchall()
+    assert len(decoded) == len(rows)
+    assert decoded["PROD005"]["unit_price"] == "1250.75"
+    for row in rows:
+        for (column, _, format_value), expected in zip(PRODUCT_FIELDS, row):
+            assert decoded[row[0]][column] == (format_value(expected) if column != "category" else expected)
@@ -0,0 +1,69 @@
+# tests/test_conversation_memory.py (Follow-up resolution and the bounded turn history)
+import pytest
+
+from conversation_memory import MAX_DISCUSSED_PRODUCTS, RECENT_TURNS, ConversationMemory
+
+@pytest.fixture
+def memory(inventory_db):
+    return ConversationMemory()
+
+def test_nothing_to_resolve_before_a_product_is_discussed(memory):
+    assert memory.resolve("and its price?") == "and its price?"
+    assert memory.render() == ""
+
+@pytest.mark.parametrize("follow_up", [
+    "and its price?", "how many of them are left", "what about the same one next week",
+    "is that product selling", "uska price kya hai", "aur stock?",
+])
+def test_follow_up_points_at_the_last_product(memory, follow_up):
+    memory.add_turn("How many keyboards do we have?", "We have 45 units of Keyboard in stock.")
+    assert memory.entity == "Keyboard"
+    assert memory.resolve(follow_up) == f"{follow_up} (Keyboard)"
+
+@pytest.mark.parametrize("question", [
+    "what is low on stock",            # does not refer back
+    "and the webcam?",                 # names its own product
+    "what about the stapler",
+])
+def test_other_questions_are_unchanged(memory, question):
+    memory.add_turn("price of the keyboard", "Keyboard costs Rs. 1,499.00.")
+    assert memory.resolve(question) == question
+
+def test_latest_product_wins(memory):
+    memory.add_turn("price of the keyboard", "Keyboard costs Rs. 1,499.00.")
+    memory.add_turn("compare webcam and stapler stock", "Webcam: 30 units. Stapler: 5 units.")
+    assert memory.resolve("and its price?") == "and its price? (Stapler)"
+    # A resolved follow-up keeps the topic for the next one
+    memory.add_turn(memory.resolve("and its price?"), "Rs. 199.00.")
+    assert memory.entity == "Stapler"
+
+def test_answer_sets_the_topic_only_when_it_names_one_product(memory):
+    memory.add_turn("what is low on stock", "Only Desk Lamp is below its reorder point.")
+    assert memory.entity == "Desk Lamp"
+    memory.add_turn("what else is low", "Stapler and Wireless Mouse are low.")
+    assert memory.entity == "Desk Lamp"
+
+def test_recent_turns_and_summary_are_bounded(memory):
+    long_answer = "Keyboard sold well this week. " + "Details follow. " * 200
+    for n in range(40):
+        memory.add_turn(f"question {n} about the keyboard", long_answer)
+        assert len(memory.recent) == min(n + 1, RECENT_TURNS)
+        assert memory.prompt_tokens() <= memory.max_prompt_tokens()
+    assert [question for question, _ in memory.recent] == [f"question {n} about the keyboard" for n in (37, 38, 39)]
+    # Every older turn is either summarised or counted as omitted
+    assert len(memory.summary) + memory.omitted == 40 - RECENT_TURNS
+    assert memory.omitted > 0
+    assert memory.summary[-1] == "- question 36 about the keyboard -> Keyboard sold well this week."
+    assert f"({memory.omitted} older turns omitted)" in memory.render()
+
+def test_recent_answers_are_clipped(memory):
+    memory.add_turn("keyboard stock?", "Keyboard: " + "x" * 5000)
+    _, answer = memory.recent[0]
+    assert answer.endswith("…") and len(answer) < 1000
+
+def test_discussed_products_are_capped_and_most_recent_last(memory):
+    for product in ["Keyboard", "Webcam", "Stapler", "Desk Lamp", "Office Chair", "Printer Paper", "Keyboard"]:
+        memory.add_turn(f"price of {product}", "Noted.")
+    assert len(memory.discussed) == MAX_DISCUSSED_PRODUCTS
+    assert list(memory.discussed) == ["Stapler", "Desk Lamp", "Office Chair", "Printer Paper", "Keyboard"]
+    assert "Products mentioned recently: Stapler, Desk Lamp, Office Chair, Printer Paper, Keyboard" in memory.render()
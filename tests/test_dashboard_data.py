@@ -0,0 +1,74 @@
+# tests/test_dashboard_data.py (Dashboard reads re-run only after their tables change)
+import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import pytest
+
+from dashboard_data import DASHBOARD_LOADERS, dashboard_cache_key, load_dashboard_data, load_uncached
+
+TODAY = datetime(2026, 10, 18, 9, 30)
+
+@pytest.fixture
+def queries(inventory_db, monkeypatch):
+    """Counts the real queries run per dashboard."""
+    counts = Counter()
+    for name, (tables, loader) in DASHBOARD_LOADERS.items():
+        def counted(name=name, loader=loader):
+            counts[name] += 1
+            return loader()
+        monkeypatch.setitem(DASHBOARD_LOADERS, name, (tables, counted))
+    return counts
+
+@pytest.fixture
+def cached_load():
+    """Stands in for app.py's st.cache_data wrapper: memoized on its arguments."""
+    return lru_cache(maxsize=None)(load_uncached)
+
+def load_all(cached_load, now=TODAY):
+    return {name: load_dashboard_data(name, cached_load, now) for name in DASHBOARD_LOADERS}
+
+def write(db, sql, *params):
+    with sqlite3.connect(db) as conn:
+        conn.execute(sql, params)
+
+def test_unchanged_tables_stay_cached(queries, cached_load):
+    first = load_all(cached_load)
+    second = load_all(cached_load)
+    assert queries == Counter(dict.fromkeys(DASHBOARD_LOADERS, 1))
+    assert all(second[name] is first[name] for name in DASHBOARD_LOADERS)
+    assert list(first["products"]["product_id"])[:2] == ["PROD001", "PROD002"]
+
+def test_only_dashboards_on_a_changed_table_recompute(inventory_db, queries, cached_load):
+    load_all(cached_load)
+    write(inventory_db, "UPDATE products SET current_stock = 2 WHERE product_id = 'PROD001'")
+    frames = load_all(cached_load)
+    assert queries == Counter(low_stock=2, top_sellers=2, products=2, suppliers=1)
+    assert "Keyboard" in set(frames["low_stock"]["product_name"])
+
+    write(inventory_db, "UPDATE suppliers SET supplier_name = 'Acme Traders' WHERE supplier_id = 'SUP001'")
+    frames = load_all(cached_load)
+    assert queries == Counter(low_stock=2, top_sellers=2, products=2, suppliers=2)
+    assert "Acme Traders" in set(frames["suppliers"]["supplier_name"])
+
+def test_new_day_recomputes(queries, cached_load):
+    load_all(cached_load)
+    load_all(cached_load, TODAY + timedelta(hours=15))     # past midnight
+    assert queries == Counter(dict.fromkeys(DASHBOARD_LOADERS, 2))
+
+def test_cache_key(inventory_db):
+    name, version, day = dashboard_cache_key("top_sellers", TODAY)
+    assert (name, day) == ("top_sellers", "2026-10-18")
+    suppliers_key = dashboard_cache_key("suppliers", TODAY)
+    write(inventory_db, "UPDATE suppliers SET supplier_name = 'Acme Traders' WHERE supplier_id = 'SUP001'")
+    assert dashboard_cache_key("top_sellers", TODAY) == (name, version, day)     # suppliers not in its tables
+    assert dashboard_cache_key("suppliers", TODAY) != suppliers_key
+
+def test_no_change_counters_means_no_caching(inventory_db, queries, cached_load):
+    write(inventory_db, "DROP TABLE data_versions")
+    assert dashboard_cache_key("products") is None
+    load_all(cached_load)
+    load_all(cached_load)
+    assert queries == Counter(dict.fromkeys(DASHBOARD_LOADERS, 2))
+    assert cached_load.cache_info().currsize == 0
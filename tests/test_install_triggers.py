@@ -0,0 +1,101 @@
+# tests/test_install_triggers.py (What the SQLite triggers keep in step)
+import contextlib
+import io
+
+import pytest
+
+from analytics import SALES_SUMMARY_QUERY, SALES_SUMMARY_ROLLUP_QUERY, TOP_SELLERS_QUERY, TOP_SELLERS_ROLLUP_QUERY
+from install_triggers import install_triggers
+
+ROLLUP_FROM_SALES = """
+SELECT COALESCE(date(sale_date), date('now')), COALESCE(product_id, ''), COALESCE(SUM(quantity_sold), 0),
+       ROUND(TOTAL(total_amount), 2), COUNT(*), COUNT(total_amount), MAX(total_amount)
+FROM sales_history GROUP BY 1, 2 ORDER BY 1, 2
+"""
+ROLLUP = """
+SELECT sale_day, product_id, units_sold, ROUND(revenue, 2), transaction_count, priced_count, max_sale
+FROM sales_daily_rollup ORDER BY 1, 2
+"""
+
+def assert_rollup_matches_sales(conn):
+    assert conn.execute(ROLLUP).fetchall() == conn.execute(ROLLUP_FROM_SALES).fetchall()
+
+def test_rollup_is_backfilled(conn):
+    assert_rollup_matches_sales(conn)
+
+def test_rollup_follows_inserts(conn):
+    conn.executemany(
+        "INSERT INTO sales_history (product_id, quantity_sold, unit_price, total_amount, sale_date) VALUES (?, ?, ?, ?, ?)",
+        [("PROD001", 2, 1499.0, 2998.0, None),                      # sale_date filled in by trigger
+         ("PROD009", 1, 10.0, 10.0, "2020-01-01 09:00:00"),         # a product-day not seen before
+         (None, 3, None, None, "2020-01-01 10:00:00")]              # no product, no price
+    )
+    conn.commit()
+    assert_rollup_matches_sales(conn)
+
+def test_rollup_follows_updates(conn):
+    conn.execute("UPDATE sales_history SET quantity_sold = quantity_sold + 1, total_amount = NULL WHERE sale_id % 7 = 0")
+    conn.execute("UPDATE sales_history SET product_id = 'PROD002' WHERE sale_id % 11 = 0")
+    conn.execute("UPDATE sales_history SET sale_date = datetime(sale_date, '-3 days') WHERE sale_id % 13 = 0")
+    conn.commit()
+    assert_rollup_matches_sales(conn)
+
+def test_rollup_follows_deletes(conn):
+    conn.execute("DELETE FROM sales_history WHERE sale_id % 5 = 0")
+    conn.execute("DELETE FROM sales_history WHERE product_id = 'PROD008'")
+    conn.commit()
+    assert_rollup_matches_sales(conn)
+    # Buckets whose last sale is gone are dropped, not left at zero
+    assert conn.execute("SELECT COUNT(*) FROM sales_daily_rollup WHERE product_id = 'PROD008'").fetchone() == (0,)
+
+def test_reinstall_rebuilds_rollup(conn, inventory_db):
+    conn.execute("DELETE FROM sales_daily_rollup")
+    conn.commit()
+    with contextlib.redirect_stdout(io.StringIO()):
+        install_triggers(inventory_db)
+    assert_rollup_matches_sales(conn)
+
+def test_rollup_queries_match_raw_queries(conn):
+    conn.execute("DELETE FROM sales_history WHERE sale_id % 3 = 0")
+    conn.commit()
+    raw, rollup = conn.execute(SALES_SUMMARY_QUERY).fetchone(), conn.execute(SALES_SUMMARY_ROLLUP_QUERY).fetchone()
+    assert raw[0] == rollup[0]
+    assert raw[1:] == pytest.approx(rollup[1:])
+    # Whole days on both sides, so the raw query's timestamp cut-off matches the rollup's day
+    since = conn.execute("SELECT date('now', '-30 days')").fetchone()[0]
+    assert conn.execute(TOP_SELLERS_QUERY, (since, 5)).fetchall() == conn.execute(TOP_SELLERS_ROLLUP_QUERY, (since, 5)).fetchall()
+
+
+# --- Derived product columns ---
+
+def product(conn, product_id):
+    return conn.execute(
+        "SELECT current_stock, total_value, updated_date FROM products WHERE product_id = ?", (product_id,)
+    ).fetchone()
+
+def test_stock_write_sets_total_value_and_updated_date(conn):
+    conn.execute("UPDATE products SET updated_date = '2020-01-01 00:00:00' WHERE product_id = 'PROD001'")
+    conn.execute("UPDATE products SET current_stock = 40 WHERE product_id = 'PROD001'")
+    now = conn.execute("SELECT datetime('now')").fetchone()[0]
+    stock, total_value, updated_date = product(conn, "PROD001")
+    assert (stock, total_value) == (40, 40 * 1499.0)
+    assert updated_date >= now[:16]
+
+def test_price_write_sets_total_value(conn):
+    conn.execute("UPDATE products SET unit_price = 1000 WHERE product_id = 'PROD001'")
+    assert product(conn, "PROD001")[1] == 45 * 1000.0
+
+def test_updated_date_bumped_even_when_total_value_is_consistent(conn):
+    # A writer that keeps total_value right but forgets updated_date
+    conn.execute("UPDATE products SET updated_date = '2020-01-01 00:00:00' WHERE product_id = 'PROD001'")
+    conn.execute("UPDATE products SET current_stock = 44, total_value = 44 * unit_price WHERE product_id = 'PROD001'")
+    assert product(conn, "PROD001")[2] > "2020-01-01 00:00:00"
+
+def test_complete_write_is_not_rewritten(conn):
+    before = conn.total_changes
+    conn.execute(
+        "UPDATE products SET current_stock = 44, total_value = 44 * unit_price, updated_date = datetime('now') "
+        "WHERE product_id = 'PROD001'"
+    )
+    # The row itself plus the products change counter; no second write from the trigger
+    assert conn.total_changes - before == 2
@@ -0,0 +1,90 @@
+# tests/test_intent_router.py (Which questions are answered from SQL, and how)
+import sqlite3
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from intent_router import PRICE_NOT_SET_NOTE, answer_locally, classify_query
+
+@pytest.mark.parametrize("question, intent", [
+    ("what is low on stock", "low_stock"),
+    ("which items are running low", "low_stock"),
+    ("is keyboard low on stock", "low_stock"),
+    ("how many keyboards do we have", "product_stock"),
+    ("price of keyboard", "product_price"),
+    ("how much does the webcam cost", "product_price"),
+    ("top sellers", "top_sellers"),
+    ("show me the best selling products", "top_sellers"),
+    ("hello", "greet"),
+    ("why are keyboard sales down", None),
+    ("suggest what to reorder next month", None),
+])
+def test_classify_query(inventory_db, question, intent):
+    assert classify_query(question)[0] == intent
+
+@pytest.mark.parametrize("question", [
+    "how many keyboards did we sell this month",
+    "how many keyboards were sold",
+    "how many units of stapler sold last week",
+    "how many keyboards did raj buy",
+    "what did anita shah get",
+    "keyboard stock after yesterday's sales",
+    "how many webcams today",
+    "keyboard restock date",
+    "when was the keyboard last restocked",
+    "cost of restocking everything",
+    "price of keyboard orders",
+    "top sellers this month",
+])
+def test_sales_customer_and_period_questions_go_to_llm(inventory_db, question):
+    assert classify_query(question) == (None, 0.0)
+    assert answer_locally(question) is None
+
+@pytest.mark.parametrize("question", ["keyboard kitna stock hai", "kitna stock hai keyboard ka"])
+def test_kitna_stock_is_a_stock_question(inventory_db, question):
+    assert classify_query(question)[0] == "product_stock"
+    assert answer_locally(question) == "Keyboard: 45 units in stock at Rs. 1,499.00 each."
+
+def test_kitna_alone_asks_the_price(inventory_db):
+    assert classify_query("keyboard kitna hai")[0] == "product_price"
+
+def test_price_note_only_for_unpriced_products(inventory_db):
+    assert PRICE_NOT_SET_NOTE not in answer_locally("price of keyboard")
+    with sqlite3.connect(inventory_db) as conn:
+        conn.execute("UPDATE products SET unit_price = 0 WHERE product_id = 'PROD001'")
+    assert answer_locally("price of keyboard") == "Keyboard costs Rs. 0.00 per unit." + PRICE_NOT_SET_NOTE
+
+def test_low_stock_list(inventory_db):
+    assert answer_locally("what is low on stock") == (
+        "3 items are below reorder point: Wireless Mouse (8/25), Desk Lamp (3/15), Stapler (5/10)."
+    )
+
+def test_low_stock_question_about_one_product(inventory_db):
+    assert answer_locally("is keyboard low on stock") == "Keyboard: 45 units in stock at Rs. 1,499.00 each."
+    assert answer_locally("is the desk lamp low on stock") == (
+        "Desk Lamp: 3 units in stock at Rs. 1,250.75 each. That is below the reorder point of 15."
+    )
+
+def test_product_price(inventory_db):
+    assert answer_locally("price of keyboard") == "Keyboard costs Rs. 1,499.00 per unit."
+
+def test_name_shared_by_two_products_goes_to_llm(inventory_db):
+    # PROD002 and PROD003 are both "Wireless Mouse", at different prices
+    assert classify_query("how many wireless mouse in stock")[0] == "product_stock"
+    assert answer_locally("how many wireless mouse in stock") is None
+    assert answer_locally("price of wireless mouse") is None
+
+def test_two_products_go_to_llm(inventory_db):
+    assert classify_query("price of the office chair and desk lamp")[0] == "product_price"
+    assert answer_locally("price of the office chair and desk lamp") is None
+
+def test_top_sellers(inventory_db):
+    answer = answer_locally("top sellers")
+    assert answer.startswith("Top sellers in the last 30 days: ")
+    assert answer.count("units)") == 5
+
+def test_top_sellers_without_sales_go_to_llm(inventory_db):
+    with sqlite3.connect(inventory_db) as conn:
+        conn.execute("DELETE FROM sales_history")
+    assert answer_locally("top sellers") is None
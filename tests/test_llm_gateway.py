@@ -0,0 +1,78 @@
+# tests/test_llm_gateway.py (Coalescing, deadlines and retries against the in-process stub model)
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_gateway import LLMGateway, LLMTimeoutError, RetryableLLMError, StubModel
+
+USERS = 10
+
+@pytest.fixture
+def gateway():
+    gateways = []
+    def make(model, **options):
+        gateways.append(LLMGateway(model, **options))
+        return gateways[-1]
+    yield make
+    for gateway in gateways:
+        gateway.shutdown()
+
+def fan_out(function, prompts):
+    with ThreadPoolExecutor(len(prompts)) as users:
+        return list(users.map(function, prompts))
+
+def test_identical_requests_share_one_call(gateway):
+    model = StubModel(latency=0.2)
+    llm = gateway(model)
+    results = fan_out(llm.generate, ["What needs restocking?"] * USERS)
+    assert results == [model.respond("What needs restocking?")] * USERS
+    assert model.calls == 1
+    assert llm.get_stats()["coalesced"] == USERS - 1
+
+def test_identical_streams_share_one_call(gateway):
+    model = StubModel(latency=0.2)
+    llm = gateway(model)
+    results = fan_out(lambda prompt: "".join(llm.stream(prompt)), ["What needs restocking?"] * USERS)
+    assert results == [model.respond("What needs restocking?")] * USERS
+    assert model.calls == 1
+
+def test_late_stream_reader_gets_every_chunk(gateway):
+    model = StubModel(latency=0.6, first_chunk_latency=0.01, respond=lambda prompt: "one two three four five six")
+    llm = gateway(model)
+    first = llm.stream("q")
+    assert next(first) == "one"
+    time.sleep(0.1)
+    assert "".join(llm.stream("q")) == "one two three four five six"
+    assert "".join(first) == " two three four five six"
+    assert model.calls == 1
+
+def test_abandoned_stream_is_not_joined(gateway):
+    model = StubModel(latency=0.5, first_chunk_latency=0.01, respond=lambda prompt: "a b c d e f g h")
+    llm = gateway(model)
+    stream = llm.stream("q")
+    next(stream)
+    stream.close()   # the only reader gave up: the worker is told to stop
+    assert "".join(llm.stream("q")) == "a b c d e f g h"
+    assert model.calls == 2
+
+def test_deadline(gateway):
+    llm = gateway(StubModel(latency=3.0), timeout=0.3)
+    start = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        llm.generate("slow question")
+    assert time.monotonic() - start < 1.0
+
+def test_transient_failures_are_retried(gateway):
+    class Flaky(StubModel):
+        failures = 2
+        def generate(self, prompt, timeout):
+            if self.failures:
+                self.failures -= 1
+                raise RetryableLLMError("overloaded")
+            return super().generate(prompt, timeout)
+
+    model = Flaky(latency=0.01)
+    llm = gateway(model, retries=3, backoff=0.01)
+    assert llm.generate("q") == model.respond("q")
+    assert llm.get_stats()["retries"] == 2
@@ -0,0 +1,73 @@
+# tests/test_llm_telemetry.py (Prompt sections and the report's token attribution)
+import re
+
+import pytest
+
+from llm_telemetry import LLMCallRecord, build_report, split_sections
+
+SYSTEM_PROMPT = "You are an inventory assistant. Answer from the data below.\n" * 3
+CONTEXT = (
+    "Low stock items:\nDesk Lamp 3/15\n"
+    "=== PRODUCT CATALOG ===\nKeyboard | 45 | 1499.00\nWebcam | 30 | 2599.00\n"
+    "=== RECENT SALES (last 7 days) ===\n2026-10-01 Keyboard x2\n2026-10-02 Webcam x1\n"
+    "=== TOP CUSTOMERS ===\nRaj Patel 12 orders\n"
+    "=== NOTES ===\nPrices in INR.\n"
+)
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+def record_turn(sink, question, context, conversation=""):
+    """One LLM turn, with the prompt assembled and split the way app.py does."""
+    prompt = f"{SYSTEM_PROMPT}\n\nInventory & Sales Data:\n{context}\n\n{conversation}User Question: {question}"
+    call = LLMCallRecord(question, sink=sink)
+    call.set_prompt(
+        [("system_prompt", SYSTEM_PROMPT)] + split_sections(context, default="products")
+        + [("conversation", conversation), ("question", question)],
+        prompt
+    )
+    call.finish("llm", "Keyboard is fine.")
+    return sink.records[-1]
+
+def test_split_sections():
+    sections = split_sections(CONTEXT)
+    assert [name for name, _ in sections] == ["other_data", "products", "sales", "customers", "other_data"]
+    assert "".join(text for _, text in sections) == CONTEXT
+    assert split_sections("no headers here", default="products") == [("products", "no headers here")]
+    assert split_sections("") == []
+
+@pytest.mark.parametrize("context, conversation", [
+    (CONTEXT, ""),
+    (CONTEXT, "Conversation so far:\nUser: price of keyboard\nAssistant: Rs. 1,499.00\n\n"),
+    ("Desk Lamp 3/15\n", ""),
+    ("=== SALES ===\n" + "x" * 1001 + "\n=== CUSTOMERS ===\n" + "y" * 7, "z"),
+], ids=["sections", "with-conversation", "no-headers", "odd-sizes"])
+def test_section_tokens_add_up_to_the_prompt(context, conversation):
+    record = record_turn(ListSink(), "how are keyboards selling?", context, conversation)
+    sections = record["sections"].values()
+    assert sum(size["chars"] for size in sections) == record["prompt_chars"]
+    assert sum(size["tokens"] for size in sections) == record["prompt_tokens"]
+    if not conversation:
+        assert record["sections"]["conversation"] == {"chars": 0, "tokens": 0}
+
+def test_report_sections_add_up_to_the_average_prompt():
+    sink = ListSink()
+    record_turn(sink, "how are keyboards selling?", CONTEXT)
+    record_turn(sink, "and webcams?", CONTEXT, "Conversation so far:\nUser: how are keyboards selling?\n\n")
+    record_turn(sink, "what is low?", "Desk Lamp 3/15\n")
+    report = build_report(sink.records)
+
+    average = re.search(r"tokens avg ([\d,]+)", report).group(1)
+    assert int(average.replace(",", "")) == round(sum(r["prompt_tokens"] for r in sink.records) / 3)
+    section_lines = report.split("Prompt tokens by section (avg per prompt):\n")[1].splitlines()
+    tokens = [float(line.split("chars")[1].split()[0].replace(",", "")) for line in section_lines]
+    shares = [float(line.rsplit(None, 1)[1].rstrip("%")) for line in section_lines]
+    assert sum(tokens) == pytest.approx(sum(r["prompt_tokens"] for r in sink.records) / 3, abs=len(tokens))
+    assert sum(shares) == pytest.approx(100, abs=0.1 * len(shares))
+    assert {line.split()[0] for line in section_lines} == {
+        "system_prompt", "products", "sales", "customers", "other_data", "conversation", "question", "template",
+    }
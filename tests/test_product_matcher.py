@@ -0,0 +1,84 @@
+# tests/test_product_matcher.py (Word-level Aho-Corasick product extraction)
+import sqlite3
+
+import pytest
+
+import product_matcher
+from product_matcher import ProductMatcher, get_product_matcher, normalize_token, tokenize
+
+CATALOG = [
+    {"product_id": "PROD001", "product_name": "Keyboard", "sku_code": "SKU-KB-100"},
+    {"product_id": "PROD002", "product_name": "Wireless Keyboard"},
+    {"product_id": "PROD003", "product_name": "Desk Lamp (LED)"},
+    {"product_id": "PROD004", "product_name": "Lamp Shade"},
+    {"product_id": "PROD005", "product_name": "Pen"},
+    {"product_id": "PROD006", "product_name": "USB-C Cable"},
+    {"product_id": "PROD007", "product_name": "Battery"},
+    {"product_id": "PROD008", "product_name": "Pen"},
+]
+
+@pytest.fixture
+def matcher():
+    return ProductMatcher(CATALOG)
+
+def ids(products):
+    return [product["product_id"] for product in products]
+
+@pytest.mark.parametrize("token, normalized", [
+    ("keyboards", "keyboard"), ("batteries", "battery"), ("boxes", "box"), ("switches", "switch"),
+    ("glass", "glass"), ("status", "status"), ("pens", "pen"), ("bus", "bus"),
+])
+def test_normalize_token(token, normalized):
+    assert normalize_token(token) == normalized
+
+def test_tokenize_folds_case_and_punctuation():
+    assert tokenize("USB-C Cable, KEYBOARDS!") == ["usb", "c", "cable", "keyboard"]
+
+def test_longest_match_wins(matcher):
+    assert ids(matcher.extract("do we have a wireless keyboard")) == ["PROD002"]
+    assert ids(matcher.extract("do we have a keyboard")) == ["PROD001"]
+
+def test_overlapping_names_keep_the_leftmost(matcher):
+    # "desk lamp" and "lamp shade" share "lamp"; the phrase starting first is kept
+    found = matcher.find("price of desk lamp shade")
+    assert [(start, end, product["product_id"]) for start, end, product in found] == [(2, 4, "PROD003")]
+
+def test_alias_full_name_id_and_sku(matcher):
+    assert ids(matcher.extract("desk lamp")) == ["PROD003"]
+    assert ids(matcher.extract("Desk Lamp (LED) stock")) == ["PROD003"]
+    assert ids(matcher.extract("what about prod004")) == ["PROD004"]
+    assert ids(matcher.extract("sku-kb-100 price")) == ["PROD001"]
+
+def test_punctuation_case_and_plurals(matcher):
+    assert ids(matcher.extract("How many KEYBOARDS?")) == ["PROD001"]
+    assert ids(matcher.extract("usb-c cable!!")) == ["PROD006"]
+    assert ids(matcher.extract("any batteries left")) == ["PROD007"]
+
+def test_word_boundaries(matcher):
+    assert matcher.extract("open the door") == []
+    assert matcher.extract("penalty") == []
+
+def test_multiple_products_in_order(matcher):
+    assert ids(matcher.extract("lamp shade, keyboard and usb c cable")) == ["PROD004", "PROD001", "PROD006"]
+    # Mentioned twice, reported once
+    assert ids(matcher.extract("keyboard or keyboard")) == ["PROD001"]
+
+def test_shared_name_returns_every_product(matcher):
+    assert ids(matcher.extract("how many pens")) == ["PROD005", "PROD008"]
+
+def test_empty_catalog():
+    assert ProductMatcher([]).extract("keyboard") == []
+
+
+# --- The cached matcher follows the catalog ---
+
+def test_matcher_rebuilt_only_after_catalog_changes(inventory_db):
+    matcher = get_product_matcher()
+    with sqlite3.connect(inventory_db) as conn:
+        conn.execute("UPDATE products SET current_stock = 1 WHERE product_id = 'PROD001'")
+    assert get_product_matcher() is matcher
+    with sqlite3.connect(inventory_db) as conn:
+        conn.execute("UPDATE products SET product_name = 'Mechanical Keyboard' WHERE product_id = 'PROD001'")
+    assert get_product_matcher() is not matcher
+    assert ids(get_product_matcher().extract("mechanical keyboard")) == ["PROD001"]
+    assert product_matcher._matcher_cache["matcher"] is get_product_matcher()
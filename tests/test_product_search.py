@@ -0,0 +1,92 @@
+# tests/test_product_search.py (Typo-tolerant search: ranking and incremental updates)
+import sqlite3
+
+import pytest
+
+import product_search
+from analytics import add_new_product, delete_product
+from product_search import ProductSearchIndex, edit_distance, search_products
+
+CATALOG = [
+    {"product_id": "PROD010", "product_name": "Projector (Meeting Room)", "sku_code": "SKU-PRJ-01"},
+    {"product_id": "PROD011", "product_name": "Smart Projector Screen"},
+    {"product_id": "PROD012", "product_name": "Keyboard"},
+    {"product_id": "PROD013", "product_name": "Wireless Keyboard"},
+    {"product_id": "PROD014", "product_name": "Desk Lamp (LED)"},
+]
+
+def names(results):
+    return [product["product_name"] for product, _ in results]
+
+@pytest.fixture
+def index():
+    return ProductSearchIndex(CATALOG)
+
+def test_edit_distance():
+    assert edit_distance("projecter", "projector", 2) == 1
+    assert edit_distance("keybord", "keyboard", 2) == 1
+    assert edit_distance("lamp", "keyboard", 1) == 2   # gave up past the limit
+
+def test_more_matched_query_words_rank_first(index):
+    results = index.search("projecter screen")
+    assert names(results)[:2] == ["Smart Projector Screen", "Projector (Meeting Room)"]
+
+def test_ties_on_matched_words_go_to_the_closer_name(index):
+    assert names(index.search("keyboard"))[:2] == ["Keyboard", "Wireless Keyboard"]
+    assert names(index.search("wireles keybord"))[0] == "Wireless Keyboard"
+
+def test_qualifier_is_optional(index):
+    (product, score), = index.search("desk lamp", limit=1)
+    assert (product["product_id"], score) == ("PROD014", 1.0)
+
+def test_id_and_sku_match_scores_one(index):
+    assert index.search("PROD012")[0] == (CATALOG[2], 1.0)
+    assert index.search("sku prj 01")[0] == (CATALOG[0], 1.0)
+
+def test_short_words_need_an_exact_match(index):
+    assert index.search("lam") == []
+
+def test_add_and_remove(index):
+    index.add_product({"product_id": "PROD015", "product_name": "Document Scanner"})
+    assert names(index.search("scaner")) == ["Document Scanner"]
+    index.remove_product("PROD015")
+    assert index.search("scaner") == []
+    # Re-adding under the same ID replaces the old words
+    index.add_product({"product_id": "PROD012", "product_name": "Mechanical Keyboard"})
+    assert "PROD012" in {product["product_id"] for product, _ in index.search("mechanical")}
+
+
+# --- The cached index follows catalog changes ---
+
+def cached_index():
+    return product_search._index_cache["index"]
+
+def test_added_product_is_applied_incrementally(inventory_db):
+    index = product_search.get_search_index()
+    assert add_new_product("PROD020", "Document Scanner", "Office Supplies", 4, 2, "SUP001")
+    assert cached_index() is index
+    assert names(search_products("document scaner")) == ["Document Scanner"]
+    assert product_search.get_search_index() is index   # version in step: no rebuild
+
+def test_deleted_product_is_applied_incrementally(inventory_db):
+    index = product_search.get_search_index()
+    assert delete_product("PROD006")
+    assert cached_index() is index
+    assert search_products("webcam") == []
+
+def test_rename_rebuilds_the_index(inventory_db):
+    index = product_search.get_search_index()
+    with sqlite3.connect(inventory_db) as conn:
+        conn.execute("UPDATE products SET product_name = 'HD Webcam Pro' WHERE product_id = 'PROD006'")
+    assert names(search_products("webcam pro")) == ["HD Webcam Pro"]
+    assert product_search.get_search_index() is not index
+
+def test_missed_change_drops_the_index(inventory_db):
+    product_search.get_search_index()
+    with sqlite3.connect(inventory_db) as conn:
+        # Another writer renames a product; the next add moves the version by two
+        conn.execute("UPDATE products SET product_name = 'Desk Lamp Pro' WHERE product_id = 'PROD005'")
+    assert add_new_product("PROD020", "Document Scanner", "Office Supplies", 4, 2, "SUP001")
+    assert cached_index() is None
+    assert names(search_products("desk lamp pro"))[0] == "Desk Lamp Pro"
+    assert names(search_products("document scanner")) == ["Document Scanner"]
@@ -0,0 +1,63 @@
+# tests/test_query_plans.py (Dashboard queries stay index-driven)
+import contextlib
+import io
+import os
+import sqlite3
+
+import pytest
+
+from create_indexes import INDEXES, check_query_plans, create_indexes, dashboard_query_plans, explain
+
+EXPECTED_PLANS = os.path.join(os.path.dirname(__file__), "expected_query_plans.txt")
+
+# Index each hot query has to use
+EXPECTED_INDEX = {
+    "top sellers": "idx_sales_history_product",
+    "top sellers (rollup)": "USING PRIMARY KEY",
+    "recent sales": "idx_sales_history_date",
+    "top customers": "idx_sales_history_customer",
+}
+
+def load_expected_plans(path=EXPECTED_PLANS):
+    """{query name: plan lines} from the recorded plan file."""
+    plans, name = {}, None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                name = line[1:-1]
+                plans[name] = []
+            else:
+                plans[name].append(line)
+    return plans
+
+def test_plans_match_recorded(conn):
+    expected = load_expected_plans()
+    plans = {name: explain(conn, query, params) for name, query, params, _, _ in dashboard_query_plans(conn)}
+    assert plans == expected
+
+def test_hot_queries_use_their_index(conn):
+    plans = check_query_plans(conn, verbose=False)
+    assert set(plans) == set(EXPECTED_INDEX)
+    for name, plan in plans.items():
+        assert any(EXPECTED_INDEX[name] in line for line in plan), (name, plan)
+        for line in plan:
+            if line.split()[:2] in (["SCAN", "s"], ["SCAN", "sales_history"]):
+                assert "INDEX" in line, (name, line)
+
+def test_every_index_is_created(conn):
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {name for name, _, _ in INDEXES} <= names
+
+def test_check_fails_without_indexes(plain_db):
+    conn = sqlite3.connect(plain_db)
+    try:
+        with pytest.raises(AssertionError, match="full scan"):
+            check_query_plans(conn, verbose=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_indexes(conn)
+        check_query_plans(conn, verbose=False)
+    finally:
+        conn.close()
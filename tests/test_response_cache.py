@@ -0,0 +1,77 @@
+# tests/test_response_cache.py (When a cached answer may be reused)
+import sqlite3
+
+import pytest
+
+from analytics import get_data_version
+from database import get_pool
+from response_cache import ResponseCache, normalize_question
+
+QUESTION = "What's the price of the keyboard?"
+
+@pytest.fixture
+def cache(inventory_db):
+    cache = ResponseCache(db_name="state.db")
+    version = get_data_version()
+    cache.get(QUESTION, version)  # loads the data version, as app.py does before put()
+    cache.put(QUESTION, "Keyboard costs Rs. 1,499.00.", version)
+    yield cache
+    get_pool("state.db").close_all()
+
+def test_normalize_question():
+    assert normalize_question("  What's LOW on stock?? ") == "what is low on stock"
+    assert normalize_question("Isn’t the mouse in stock") == "is not the mouse in stock"
+
+def test_exact_and_normalised_match(cache):
+    version = get_data_version()
+    assert cache.get(QUESTION, version) == "Keyboard costs Rs. 1,499.00."
+    assert cache.get("what is the price of the keyboard", version) == "Keyboard costs Rs. 1,499.00."
+    assert cache.get_stats()["hits"] == 2
+
+def test_similar_question_with_same_signature(cache):
+    assert cache.get("what is the price of keyboard", get_data_version()) == "Keyboard costs Rs. 1,499.00."
+    assert cache.get_stats()["similar_hits"] == 1
+
+@pytest.mark.parametrize("question", [
+    "What's the price of the webcam?",        # another product
+    "What's the price of 2 keyboards?",       # a number the cached question did not have
+    "price of keyboard and webcam",           # an extra product
+    "what is the price of the keyboard today",  # a word the vectorizer does not know
+])
+def test_different_signature_misses(cache, question):
+    assert cache.get(question, get_data_version()) is None
+
+@pytest.mark.parametrize("cached, asked", [
+    ("which products sold the most this month", "which products sold the least this month"),
+    ("which items have the highest stock", "which items have the lowest stock"),
+    ("show the top products", "show the bottom products"),
+])
+def test_opposite_ranking_misses(cache, cached, asked):
+    version = get_data_version()
+    cache.put(cached, "answer", version)
+    assert cache.get(asked, version) is None
+    assert cache.get(cached, version) == "answer"
+
+def test_data_change_retires_answers(cache, inventory_db):
+    with sqlite3.connect(inventory_db) as conn:
+        conn.execute("UPDATE products SET unit_price = 1599 WHERE product_id = 'PROD001'")
+    assert cache.get(QUESTION, get_data_version()) is None
+
+def test_answers_survive_a_restart(cache):
+    assert ResponseCache(db_name="state.db").get(QUESTION, get_data_version()) == "Keyboard costs Rs. 1,499.00."
+
+def test_put_for_stale_version_is_dropped(cache):
+    cache.put("how many webcams", "30", (-1, -1, -1))
+    assert cache.get("how many webcams", get_data_version()) is None
+
+def test_answers_are_keyed_on_the_conversation(cache):
+    version = get_data_version()
+    cache.put("why?", "Because it sold out.", version, context="user: is the webcam low on stock")
+    assert cache.get("why?", version, context="user: is the webcam low on stock") == "Because it sold out."
+    assert cache.get("why?", version, context="user: what did raj buy") is None
+    assert cache.get("why?", version) is None
+
+def test_opening_questions_are_not_matched_mid_conversation(cache):
+    version = get_data_version()
+    assert cache.get(QUESTION, version, context="user: what is low on stock") is None
+    assert cache.get("what is the price of keyboard", version, context="user: hello") is None
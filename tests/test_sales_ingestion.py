@@ -0,0 +1,82 @@
+# tests/test_sales_ingestion.py (Sales never take stock below zero)
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import PRODUCTS
+from sales_ingestion import ingest_sales, sell_product, to_row
+
+STOCK = {product_id: stock for product_id, _, _, stock, _, _ in PRODUCTS}
+
+def stock_levels(conn):
+    return dict(conn.execute("SELECT product_id, current_stock FROM products"))
+
+def sold_since(conn, sale_id):
+    return dict(conn.execute(
+        "SELECT product_id, SUM(quantity_sold) FROM sales_history WHERE sale_id > ? GROUP BY product_id", (sale_id,)
+    ))
+
+def test_to_row():
+    assert to_row({"product_id": " PROD001 ", "quantity_sold": "2", "sale_date": "2025-11-06 10:00:00"}) == (
+        "PROD001", 2, None, None, "2025-11-06 10:00:00", "10:00:00", None, None, None
+    )
+    assert to_row({"product_id": "PROD001", "quantity_sold": 0}) is None
+    assert to_row({"product_id": "PROD001", "quantity_sold": "two"}) is None
+    assert to_row({"quantity_sold": 1}) is None
+
+def test_stock_never_goes_negative(conn):
+    rng = random.Random(1)
+    events = [{"product_id": rng.choice(list(STOCK)), "quantity_sold": rng.randint(1, 6)} for _ in range(400)]
+    events += [{"product_id": "NOPE", "quantity_sold": 1}, {"product_id": "PROD001", "quantity_sold": -1}]
+    last_sale_id = conn.execute("SELECT MAX(sale_id) FROM sales_history").fetchone()[0]
+
+    stats = ingest_sales(events, batch_size=64)
+
+    levels = stock_levels(conn)
+    assert min(levels.values()) >= 0
+    sold = sold_since(conn, last_sale_id)
+    for product_id, stock in STOCK.items():
+        # Every unit taken off the shelf is in sales_history, and nothing else is
+        assert levels[product_id] == stock - sold.get(product_id, 0)
+    assert stats["received"] == len(events)
+    assert stats["invalid"] == 1
+    assert stats["accepted"] + stats["rejected"] + stats["invalid"] == len(events)
+    assert stats["accepted"] == conn.execute("SELECT COUNT(*) FROM sales_history WHERE sale_id > ?", (last_sale_id,)).fetchone()[0]
+
+def test_overdraws_and_unknown_products_are_rejected(conn):
+    stats = ingest_sales([
+        {"product_id": "PROD005", "quantity_sold": 2},   # 3 in stock
+        {"product_id": "PROD005", "quantity_sold": 2},   # only 1 left
+        {"product_id": "NOPE", "quantity_sold": 1},
+        {"product_id": "PROD005", "quantity_sold": 1},
+    ])
+    assert (stats["accepted"], stats["rejected"]) == (2, 2)
+    assert stats["rejects"] == [("PROD005", 2), ("NOPE", 1)]
+    assert stock_levels(conn)["PROD005"] == 0
+
+def test_missing_price_filled_from_product(conn):
+    ingest_sales([{"product_id": "PROD001", "quantity_sold": 2, "customer_name": "Raj Patel"}])
+    assert conn.execute(
+        "SELECT unit_price, total_amount, customer_name FROM sales_history ORDER BY sale_id DESC LIMIT 1"
+    ).fetchone() == (1499.0, 2998.0, "Raj Patel")
+
+
+# --- Single sales under concurrent writers ---
+
+def test_sell_product(conn):
+    assert sell_product("PROD005", 2, customer_name="Raj Patel") is True
+    assert sell_product("PROD005", 2) is False   # 1 left
+    assert sell_product("NOPE", 1) is False
+    with pytest.raises(ValueError):
+        sell_product("PROD005", 0)
+    assert stock_levels(conn)["PROD005"] == 1
+
+def test_concurrent_sells_stop_at_zero(conn):
+    # Stapler: 5 in stock, 40 buyers on 8 threads
+    last_sale_id = conn.execute("SELECT MAX(sale_id) FROM sales_history").fetchone()[0]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: sell_product("PROD008", 1), range(40)))
+    assert results.count(True) == 5
+    assert stock_levels(conn)["PROD008"] == 0
+    assert sold_since(conn, last_sale_id) == {"PROD008": 5}
@@ -0,0 +1,114 @@
+# tests/test_speech_to_text.py (WAV decoding, resampling and engine choice)
+import io
+import math
+import struct
+import wave
+
+import pytest
+
+import speech_to_text
+from speech_to_text import (
+    STT_SAMPLE_RATE, AudioDecodeError, GoogleEngine, StubEngine, VoskEngine,
+    decode_audio, get_stt_engine, iter_chunks, to_pcm16_mono, transcribe,
+)
+
+def tone(sample_rate, seconds, sample_width=2, channels=1, pitch=440):
+    """Raw PCM of a sine tone in the given format (8-bit WAV samples are unsigned)."""
+    frames = []
+    for i in range(int(sample_rate * seconds)):
+        value = math.sin(2 * math.pi * pitch * i / sample_rate)
+        if sample_width == 1:
+            sample = struct.pack("<B", int(128 + 100 * value))
+        else:
+            sample = struct.pack("<h", int(10000 * value))
+        frames.append(sample * channels)
+    return b"".join(frames)
+
+def wav_bytes(pcm, sample_rate, sample_width, channels):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+def peak(pcm):
+    return max(abs(sample) for sample in struct.unpack(f"<{len(pcm) // 2}h", pcm))
+
+@pytest.mark.parametrize("sample_rate, sample_width, channels", [
+    (16000, 2, 1), (44100, 2, 2), (8000, 1, 1), (22050, 1, 2),
+])
+def test_decode_wav(sample_rate, sample_width, channels):
+    pcm = tone(sample_rate, 0.25, sample_width, channels)
+    assert decode_audio(wav_bytes(pcm, sample_rate, sample_width, channels)) == (pcm, sample_rate, sample_width, channels)
+
+def test_unreadable_wav():
+    data = wav_bytes(tone(16000, 0.1), 16000, 2, 1)
+    with pytest.raises(AudioDecodeError):
+        decode_audio(data[:12] + b"junk" * 4)
+
+@pytest.mark.parametrize("sample_rate, sample_width, channels", [
+    (44100, 2, 2), (8000, 2, 1), (8000, 1, 1), (22050, 1, 2), (48000, 2, 1),
+])
+def test_resample_to_16k_mono(sample_rate, sample_width, channels):
+    pcm = to_pcm16_mono(tone(sample_rate, 0.5, sample_width, channels), sample_rate, sample_width, channels)
+    # Half a second at 16 kHz, 16-bit: 8,000 samples, give or take the resampler's edge
+    assert abs(len(pcm) // 2 - STT_SAMPLE_RATE // 2) <= 2
+    # Signal survives: about 10,000 for 16-bit input, 100 << 8 for 8-bit input
+    expected = 10000 if sample_width == 2 else 100 * 256
+    assert 0.8 * expected <= peak(pcm) <= 1.05 * expected
+
+def test_16k_mono_is_passed_through():
+    pcm = tone(16000, 0.1)
+    assert to_pcm16_mono(pcm, 16000, 2, 1) is pcm
+
+def test_unsupported_channel_count():
+    with pytest.raises(AudioDecodeError):
+        to_pcm16_mono(tone(16000, 0.1, channels=4), 16000, 2, 4)
+
+def test_iter_chunks():
+    pcm = bytes(2 * 16000)   # one second
+    assert [len(chunk) for chunk in iter_chunks(pcm, seconds=0.4)] == [12800, 12800, 6400]
+
+def test_transcribe_wav_with_stub_engine():
+    data = wav_bytes(tone(44100, 1.2, 2, 2), 44100, 2, 2)
+    seen = []
+    result = transcribe(data, "question.wav", engine=StubEngine("how many keyboards"), on_segment=seen.append)
+    assert result["text"] == "how many keyboards"
+    assert seen == ["how many", "how many keyboards"]
+    assert result["engine"] == "stub"
+    assert result["audio_seconds"] == pytest.approx(1.2, abs=0.01)
+    assert {"decode_ms", "resample_ms", "recognize_ms", "first_segment_ms"} <= set(result["timings"])
+
+
+# --- Engine per language ---
+
+@pytest.fixture
+def engines(monkeypatch):
+    monkeypatch.setattr(speech_to_text, "_engines", {})
+    monkeypatch.delenv("STT_ENGINE", raising=False)
+    return monkeypatch
+
+def test_stt_engine_setting_applies_to_every_language(engines):
+    engines.setenv("STT_ENGINE", "stub")
+    assert isinstance(get_stt_engine("en"), StubEngine)
+    assert get_stt_engine("hi") is get_stt_engine("en")
+
+def test_vosk_only_for_languages_with_a_model(engines):
+    engines.setattr(VoskEngine, "is_available", lambda self, lang="en": lang == "en")
+    assert isinstance(get_stt_engine("en"), VoskEngine)
+    assert isinstance(get_stt_engine("hi"), GoogleEngine)
+    # Asking for Hindi first does not stop English from using Vosk
+    assert isinstance(get_stt_engine("en"), VoskEngine)
+
+def test_vosk_model_lookup_per_language(tmp_path):
+    pytest.importorskip("vosk")
+    (tmp_path / "en").mkdir()
+    engine = VoskEngine({"en": str(tmp_path / "en"), "hi": str(tmp_path / "missing")})
+    assert engine.is_available("en") and not engine.is_available("hi")
+
+def test_without_vosk_every_language_uses_google(engines):
+    engines.setattr(VoskEngine, "is_available", lambda self, lang="en": False)
+    assert isinstance(get_stt_engine("en"), GoogleEngine)
+    assert isinstance(get_stt_engine("hi"), GoogleEngine)
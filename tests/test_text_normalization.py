@@ -0,0 +1,29 @@
+# tests/test_text_normalization.py (Speech cleaning: golden replies and legacy equivalence)
+import random
+
+import pytest
+
+from benchmark_text_normalization import (
+    ASCII_ALPHABET, GOLDEN, fuzz_text, legacy_clean_text_for_speech,
+)
+from text_normalization import clean_text_for_speech, clean_texts
+
+@pytest.mark.parametrize("text, expected", GOLDEN)
+def test_golden_reply(text, expected):
+    assert clean_text_for_speech(text) == expected
+    assert legacy_clean_text_for_speech(text) == expected
+
+def test_golden_batch():
+    assert clean_texts(text for text, _ in GOLDEN) == [expected for _, expected in GOLDEN]
+    assert clean_texts([]) == []
+
+def test_batch_with_nul_characters():
+    texts = ["**a**\0b", "c\n\0\n*d*"]
+    assert clean_texts(texts) == [clean_text_for_speech(text) for text in texts]
+
+def test_matches_legacy_on_random_markdown():
+    rng = random.Random(42)
+    samples = [fuzz_text(rng) for _ in range(2_000)] + [fuzz_text(rng, ASCII_ALPHABET) for _ in range(2_000)]
+    expected = [legacy_clean_text_for_speech(text) for text in samples]
+    assert [clean_text_for_speech(text) for text in samples] == expected
+    assert clean_texts(samples) == expected
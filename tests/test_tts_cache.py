@@ -0,0 +1,88 @@
+# tests/test_tts_cache.py (Content-addressed, size-bounded speech cache)
+import os
+
+import pytest
+
+import tts_cache
+from tts_cache import StubEngine, TTSCache
+
+# StubEngine: 320 bytes of 8 kHz 16-bit audio per character plus a 44-byte header
+FILE_BYTES = 320 * 10 + 44
+
+def text(n):
+    return f"reply {n:04d}"   # 10 characters
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+    def make(max_files=3, **options):
+        engine = options.pop("engine", None) or StubEngine()
+        caches.append(TTSCache(engine, cache_dir=str(tmp_path / "tts"), max_bytes=max_files * FILE_BYTES, **options))
+        return caches[-1]
+    yield make
+    for cache in caches:
+        cache.shutdown()
+
+def test_repeated_text_is_synthesised_once(make_cache):
+    cache = make_cache()
+    first = cache.synthesize(text(1), "en")
+    assert cache.synthesize(text(1), "en") == first
+    assert len(first) == FILE_BYTES
+    assert cache.engine.calls == 1
+    assert cache.get_stats()["hits"] == 1
+    # Another language is another entry
+    cache.synthesize(text(1), "hi")
+    assert cache.engine.calls == 2
+
+def test_concurrent_requests_join_one_synthesis(make_cache):
+    cache = make_cache(engine=StubEngine(latency=0.2))
+    futures = [cache.submit(text(1), "en") for _ in range(5)]
+    assert len({future.result(timeout=5) for future in futures}) == 1
+    assert cache.engine.calls == 1
+    assert cache.get_stats()["joined"] == 4
+
+def test_least_recently_played_is_evicted(make_cache):
+    cache = make_cache(max_files=3)
+    for n in range(3):
+        cache.synthesize(text(n), "en")
+    assert cache.get(text(0), "en") is not None       # 0 is now the most recent
+    cache.synthesize(text(3), "en")
+    assert cache.get(text(1), "en") is None
+    assert all(cache.get(text(n), "en") is not None for n in (0, 2, 3))
+    stats = cache.get_stats()
+    assert (stats["files"], stats["bytes"], stats["evicted"]) == (3, 3 * FILE_BYTES, 1)
+    assert len(os.listdir(cache.cache_dir)) == 3
+
+def test_restart_keeps_files_and_limit(make_cache):
+    cache = make_cache(max_files=3)
+    for n in range(3):
+        cache.synthesize(text(n), "en")
+    restarted = make_cache(max_files=2)
+    assert restarted.get_stats()["files"] == 2
+    assert restarted.get(text(2), "en") is not None
+    assert restarted.engine.calls == 0
+
+def test_file_deleted_before_read_is_a_miss(make_cache):
+    cache = make_cache()
+    cache.synthesize(text(1), "en")
+    os.remove(cache._path(cache.key(text(1), "en")))
+    assert cache.get(text(1), "en") is None
+    assert cache.get_stats()["bytes"] == 0
+    assert cache.synthesize(text(1), "en") is not None
+    assert cache.engine.calls == 2
+
+def test_file_evicted_between_read_and_utime_is_a_miss(make_cache, monkeypatch):
+    cache = make_cache()
+    cache.synthesize(text(1), "en")
+    real_utime = os.utime
+
+    def evicted_meanwhile(path, *args, **kwargs):
+        os.remove(path)        # a concurrent _evict() wins the race
+        return real_utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(tts_cache.os, "utime", evicted_meanwhile)
+    future = cache.submit(text(1), "en")         # must not raise FileNotFoundError
+    monkeypatch.setattr(tts_cache.os, "utime", real_utime)
+    assert future.result(timeout=5) is not None
+    assert cache.engine.calls == 2
+    assert cache.get_stats()["files"] == 1
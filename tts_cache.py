@@ -0,0 +1,262 @@
+# tts_cache.py (Cached, background text-to-speech)
+"""
+Text-to-speech for chat replies without blocking the reply itself.
+
+* Content-addressed cache: audio is stored under a hash of (engine,
+  language, cleaned text) in TTS_CACHE_DIR, so "Play Last Reply" and
+  repeated answers never synthesise the same text twice.
+* Size-bounded: once the cache passes MAX_CACHE_BYTES the least recently
+  played files are deleted.
+* Background synthesis: submit() returns a Future right away and runs the
+  engine on a small worker pool; a request for text that is already being
+  synthesised joins that job.
+
+Engines are small adapters with synthesize(text, lang) -> bytes plus name,
+mime and extension attributes: GTTSEngine (Google TTS, needs network),
+Pyttsx3Engine (offline, uses the OS voices) and StubEngine (a short
+generated tone, for benchmarks and offline checks). The engine is picked
+with the TTS_ENGINE environment variable (default: gtts).
+"""
+import concurrent.futures
+import hashlib
+import io
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+TTS_CACHE_DIR = 'tts_cache'
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+TTS_WORKERS = 2
+TTS_TIMEOUT = 20.0   # seconds the app waits for audio before giving up on it
+
+
+# --- Engines ---
+
+class GTTSEngine:
+    """Google Translate TTS via gTTS (MP3, needs network)."""
+    name = "gtts"
+    mime = "audio/mp3"
+    extension = "mp3"
+
+    def synthesize(self, text, lang):
+        from gtts import gTTS
+        mp3_buffer = io.BytesIO()
+        gTTS(text=text, lang=lang, slow=False).write_to_fp(mp3_buffer)
+        return mp3_buffer.getvalue()
+
+
+class Pyttsx3Engine:
+    """Offline TTS through the operating system's voices (WAV)."""
+    name = "pyttsx3"
+    mime = "audio/wav"
+    extension = "wav"
+
+    def __init__(self):
+        # pyttsx3 engines are not thread-safe
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang):
+        import pyttsx3
+        with self._lock, tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "speech.wav")
+            engine = pyttsx3.init()
+            for voice in engine.getProperty("voices"):
+                if any(lang in str(code) for code in getattr(voice, "languages", [])) or lang in voice.id:
+                    engine.setProperty("voice", voice.id)
+                    break
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+
+
+class StubEngine:
+    """Fake engine: sleeps for latency, then returns a short tone as WAV."""
+    name = "stub"
+    mime = "audio/wav"
+    extension = "wav"
+
+    def __init__(self, latency=0.0, sample_rate=8000):
+        self.latency = latency
+        self.sample_rate = sample_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        # 20 ms of tone per character, pitch depending on the text
+        frames = self.sample_rate * len(text) // 50
+        pitch = 200 + sum(text.encode()) % 400
+        samples = (int(8000 * math.sin(2 * math.pi * pitch * i / self.sample_rate)) for i in range(frames))
+        wav_buffer = io.BytesIO()
+        with wave.open(wav_buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(struct.pack(f"<{frames}h", *samples))
+        return wav_buffer.getvalue()
+
+
+ENGINES = {
+    "gtts": GTTSEngine,
+    "pyttsx3": Pyttsx3Engine,
+    "stub": StubEngine,
+}
+
+
+# --- Cache ---
+
+class TTSCache:
+    """Content-addressed, size-bounded audio cache with a background synthesis pool."""
+
+    def __init__(self, engine, cache_dir=TTS_CACHE_DIR, max_bytes=MAX_CACHE_BYTES, max_workers=TTS_WORKERS):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="tts")
+        self._inflight = {}          # key -> Future of the synthesis producing it
+        self._files = OrderedDict()  # key -> size in bytes, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hits": 0, "joined": 0, "synthesized": 0,
+                       "evicted": 0, "errors": 0, "synth_seconds": 0.0}
+        os.makedirs(cache_dir, exist_ok=True)
+        # Pick up files from earlier runs, oldest first
+        suffix = "." + engine.extension
+        entries = []
+        for entry in os.scandir(cache_dir):
+            if entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self._size += size
+        self._evict()
+
+    def key(self, text, lang):
+        return hashlib.sha256(f"{self.engine.name}\0{lang}\0{text}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.{self.engine.extension}")
+
+    def get(self, text, lang):
+        """Returns cached audio bytes, or None if this text has not been synthesised yet."""
+        key = self.key(text, lang)
+        with self._lock:
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # Marks it recently played for the next run's LRU order
+            os.utime(path)
+        except OSError:
+            # Deleted behind our back, or evicted between the read and the utime
+            with self._lock:
+                self._size -= self._files.pop(key, 0)
+            return None
+        return audio
+
+    def submit(self, text, lang):
+        """Returns a Future of the audio for text: done at once on a cache hit."""
+        with self._lock:
+            self._stats["requests"] += 1
+        audio = self.get(text, lang)
+        if audio is not None:
+            self._count("hits")
+            future = concurrent.futures.Future()
+            future.set_result(audio)
+            return future
+
+        key = self.key(text, lang)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["joined"] += 1
+                return future
+            future = self._executor.submit(self._synthesize, key, text, lang)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def synthesize(self, text, lang, timeout=TTS_TIMEOUT):
+        """Blocking version of submit()."""
+        return self.submit(text, lang).result(timeout=timeout)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats, files=len(self._files), bytes=self._size, in_flight=len(self._inflight))
+        stats["avg_synth_ms"] = 1000 * stats["synth_seconds"] / stats["synthesized"] if stats["synthesized"] else 0.0
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _synthesize(self, key, text, lang):
+        start = time.monotonic()
+        try:
+            audio = self.engine.synthesize(text, lang)
+        except Exception:
+            self._count("errors")
+            raise
+        self._count("synth_seconds", time.monotonic() - start)
+        self._count("synthesized")
+
+        # Write under a temporary name so readers never see half a file
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._size += len(audio) - self._files.pop(key, 0)
+            self._files[key] = len(audio)
+        self._evict()
+        return audio
+
+    def _evict(self):
+        """Deletes least recently used files until the cache fits in max_bytes."""
+        evicted = []
+        with self._lock:
+            # The newest file always stays, even if it alone is over the limit
+            while self._size > self.max_bytes and len(self._files) > 1:
+                key, size = self._files.popitem(last=False)
+                self._size -= size
+                evicted.append(key)
+            self._stats["evicted"] += len(evicted)
+        for key in evicted:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tts_cache():
+    """Returns the process-wide TTS cache, using the engine named by TTS_ENGINE."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            engine = ENGINES[os.environ.get("TTS_ENGINE", "gtts")]()
+            _cache = TTSCache(engine)
+        return _cache